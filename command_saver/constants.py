@@ -1,5 +1,4 @@
-from os import path, makedirs
-import time
+from os import path, environ, name as os_name
 
 version = '2.2.2'
 
@@ -13,8 +12,61 @@ disposition_path = path.join(directory, folder, 'disposition.txt')
 database_version = 'v2'  # Some versions may not be compatible with each other
 dabase_name = "command_saver_{}.db".format(database_version)
 database_path: str = path.join(directory, folder, dabase_name)
-# Create the directory if it doesn't exist
-makedirs(path.dirname(log_path), exist_ok=True)
+# Database of the previous version, imported when this version's database is created
+previous_database_path: str = path.join(directory, folder, "command_saver_v1.db")
+# Version of the database schema, kept in the database header (PRAGMA user_version).
+# Raise it together with a new migration in utils/migrations.py.
+schema_version = 9
+# Number of prepared SQL statements kept compiled on the shared connection
+cached_statements = 256
+# Concurrency mode used when many terminals share the same database.
+# 'wal': readers never wait for a writer in another terminal. 'rollback': SQLite's classic journal.
+concurrency_mode = environ.get('CS_CONCURRENCY_MODE', 'wal')
+journal_modes = {'wal': 'WAL', 'rollback': 'DELETE'}
+# Seconds SQLite waits for another terminal to release its lock before reporting "database is locked"
+busy_timeout = float(environ.get('CS_BUSY_TIMEOUT', 5.0))
+# If the database is still locked, retry this many times, waiting longer after each try (seconds, doubled)
+busy_retries = 5
+busy_backoff = 0.05
+# Performance profiles: SQLite settings applied to every connection, trading durability for speed.
+# safe: SQLite's defaults, every commit is synced to disk.
+# balanced: in WAL mode a power cut may lose the last commits, but never corrupts the database.
+# fast: nothing is synced, a power cut or OS crash may corrupt the database. Only for fast local disks.
+performance_profiles = {
+    'safe': {'mmap_size': 0, 'cache_size': -2000, 'synchronous': 'FULL', 'temp_store': 'DEFAULT',
+             'journal_size_limit': 67108864},
+    'balanced': {'mmap_size': 67108864, 'cache_size': -8000, 'synchronous': 'NORMAL', 'temp_store': 'MEMORY',
+                 'journal_size_limit': 67108864},
+    'fast': {'mmap_size': 268435456, 'cache_size': -32000, 'synchronous': 'OFF', 'temp_store': 'MEMORY',
+             'journal_size_limit': 16777216},
+}
+# Active profile, chosen here or with the CS_PERFORMANCE_PROFILE environment variable. Unknown names use 'safe'.
+performance_profile = environ.get('CS_PERFORMANCE_PROFILE', 'safe')
+if performance_profile not in performance_profiles:
+    performance_profile = 'safe'
+# Store of the saved commands, chosen here or with the CS_STORAGE_BACKEND environment variable.
+# 'sqlite': the saved_commands table, read together with the shared libraries. 'jsonl': a log kept in memory,
+# without the shared libraries. Unknown names use 'sqlite'. Executions, workflows and the other tables
+# stay in SQLite either way. The backends can be compared with `python -m command_saver.storage.benchmark`.
+storage_backends = ('sqlite', 'jsonl')
+storage_backend = environ.get('CS_STORAGE_BACKEND', 'sqlite')
+if storage_backend not in storage_backends:
+    storage_backend = 'sqlite'
+# The JSON-lines backend keeps an append-only log next to the database, compacted once it has more than
+# jsonl_compaction_ratio outdated lines per command (and at least jsonl_compaction_min_lines),
+# and syncs every write unless the performance profile turns syncing off.
+jsonl_log_path: str = path.splitext(database_path)[0] + '.jsonl'
+jsonl_compaction_ratio = 1.0
+jsonl_compaction_min_lines = 1000
+jsonl_sync = performance_profiles[performance_profile]['synchronous'] != 'OFF'
+# Number of commits between passive checkpoints that move the WAL file back into the database
+checkpoint_every = 100
+# Maintenance that gives free pages back to the file system. It runs when the session ends,
+# once the database has more than freelist_threshold free pages, in chunks of vacuum_chunk_pages
+# and never for longer than maintenance_time_budget seconds.
+freelist_threshold = 256
+vacuum_chunk_pages = 64
+maintenance_time_budget = 0.25
 
 
 class MenuOption:
@@ -33,9 +85,15 @@ mo_edit = MenuOption('edit', 'edit', 'Edit an existing command')
 mo_d = MenuOption('d', 'delete', 'Delete a command')
 mo_ss = MenuOption('ss', 'show single', 'Show single command full data')
 mo_t = MenuOption('t', 'terminal', 'Write a command directly for the terminal')
+mo_s = MenuOption('s', 'search', 'Search saved commands by text, e.g. s git log')
+mo_f = MenuOption('f', 'find', 'Fuzzy-find saved commands by letters in order, e.g. f gtlg')
+mo_lib = MenuOption('lib', 'libraries',
+                    'Show shared libraries, add one (lib team /path/team.db) or remove one (lib team)')
 mo_mm = MenuOption('mm', 'main menu', 'Go to the Main Menu')
 mo_scm = MenuOption('sc', 'saved commands menu',
                     'Go to the Saved Commands Menu')
+mo_next = MenuOption('n', 'next page', 'Show the next page of the Saved Commands Menu')
+mo_prev = MenuOption('p', 'previous page', 'Show the previous page of the Saved Commands Menu')
 mo_help = MenuOption('h', 'help', 'Go to the Help Page')
 mo_r = MenuOption('r', 'repeat', 'Repeat last command')
 mo_q = MenuOption('q', 'quit', 'Exit program')
@@ -44,17 +102,29 @@ mo_exp = MenuOption(
 mo_username = MenuOption('user', 'username', "Set user's name.")
 mo_userdep = MenuOption('setuserdep', 'user department',
                         "Set user's department.")
+mo_wf = MenuOption('wf', 'workflows',
+                   'Show workflows, save one (wf release 3 then 7 8 then 12) or remove one (wf release)')
+mo_w = MenuOption('w', 'run workflow', 'Run a workflow, its independent steps at the same time, e.g. w release')
 
 # Menu options - these cannot be changed by the user, but if admin chooses to, they can do it here.
-timestamp_now = time.time()
-
 menu_options_to_include = [
     mo_e, mo_d, mo_a, mo_edit, mo_ss, mo_t, mo_mm, mo_scm, mo_help, mo_r, mo_q, mo_exp, mo_username, mo_userdep,
+    mo_s, mo_f, mo_lib, mo_next, mo_prev, mo_wf, mo_w,
 ]
 
-# Create a list of tuples excluding the timestamp
-menu_options_data = [(menu_option.key, menu_option.description, timestamp_now)
-                     for menu_option in menu_options_to_include]
+
+def menu_options_rows(timestamp: float):
+    """
+    Rows of the menu options table. Importing this module does no work, the rows are made when a database needs them.
+    Args:
+        timestamp: time the options are added to the database.
+
+    Returns: a list of (option key, option description, timestamp).
+
+    """
+    return [(menu_option.key, menu_option.description, timestamp)
+            for menu_option in menu_options_to_include]
+
 
 # Prepare prompt and usage instructions to use in all layouts.
 prompt = 'Please select one of the available Menu Options or an option and a command.\n'
@@ -65,6 +135,7 @@ using_from_terminal = '\nTo use CommandSaver directly from the terminal, set an
     '[ALIAS] [OPTION] [COMMAND]'
 # Prepare contents for each of the layouts
 help_menu_info = ['Help Page', 'Application version: ', version,
+                  'Performance profile: ', performance_profile,
                   '\n', usage,
                   'This is a command line interface application that is used the same way as aliases, '
                   'but meant for longer and more complex commands.',
@@ -79,12 +150,84 @@ valid_no = ['N', 'n', 'No', 'no', 'NO']
 
 global_commands = [mo_q.key, mo_mm.key, mo_scm.key, mo_help]
 
+# Saved Commands Summary in the Main Menu: number of most recent and of most popular commands shown
+recent_commands_count = 3
+popular_commands_count = 8
+
+# Search: maximum number of results shown, words shown around a match in long commands,
+# and the characters SQLite puts around matched words (replaced by colours when printed)
+search_results_limit = 50
+search_snippet_words = 16
+search_highlight_start = '\x02'
+search_highlight_end = '\x03'
+# Saved Commands Menu: number of commands shown per page. Only one page is read from the database at a time.
+saved_commands_page_size = 50
+# Number of rows fetched from SQLite at a time when commands are streamed
+fetch_batch_size = 500
+# Shell that runs the commands, the same one os.system uses. None on Windows, where the default shell (cmd) is used.
+command_shell = '/bin/sh' if os_name == 'posix' else None
+# Number of commands whose words are kept by the command analyzer, so they are split once per session
+argv_cache_size = 1024
+# Number of saved commands whose placeholders, e.g. {ns}, are kept compiled, so each is parsed once per session
+template_cache_size = 1024
+# Running one saved command over many values (cs e 12 --each ns --from namespaces.txt): runs started ahead
+# of the ones finished per job, runs saved at a time, and values of each result listed in the summary
+fan_out_queued_per_job = 2
+fan_out_flush_size = 500
+fan_out_values_shown = 10
+# Size asked for the pipes of captured output, and of each read from them (bytes)
+pipe_buffer_size = 1024 * 1024
+read_chunk_size = 64 * 1024
+# Running many saved commands at once (cs e 3 7 12 --jobs 4): commands run at the same time by default,
+# seconds between two refreshes of their output, lines shown per command in each turn,
+# and lines a command may have waiting to be shown before it is paused
+parallel_jobs = 1
+parallel_render_interval = 0.05
+parallel_lines_per_turn = 100
+parallel_buffered_lines = 5000
+# Exit statuses of one-shot calls like `cs e 3`, when the command cannot run. Otherwise the command's own status is used,
+# and 128 + the signal number if a signal stopped it, as shells do.
+command_not_found_status = 127
+command_failed_status = 1
+# Background daemon started with cs --daemon: Unix socket it listens on, seconds without clients before it exits,
+# and seconds between its checks for finished clients and changed databases
+daemon_socket_path: str = path.join(directory, folder, 'cs.sock')
+daemon_idle_timeout = 15 * 60
+daemon_poll_interval = 1
+# Environment variables the settings above are read from when the program starts. The daemon read them once,
+# so a client whose values differ (e.g. another CS_PERFORMANCE_PROFILE) runs the program in its own process.
+daemon_settings_variables = ('HOME', 'CS_CONCURRENCY_MODE', 'CS_BUSY_TIMEOUT', 'CS_PERFORMANCE_PROFILE',
+                             'CS_STORAGE_BACKEND')
+# Number of slowest packages and modules shown by cs --startup-profile
+startup_profile_top = 15
+# Number of rendered screens (main menu, help page, pages of saved commands) kept by the screen cache
+screen_cache_size = 8
+# Number of query results kept by the query cache (least recently used are dropped first)
+query_cache_size = 32
+# Number of latest executions shown with a single command
+execution_history_count = 10
+# Fuzzy find: maximum number of commands scored per query, so every keystroke takes about the same time
+fuzzy_scored_limit = 1000
+# Shared libraries: other CommandSaver databases read together with the user's own, e.g. a team library.
+# Their commands have IDs named after the library, e.g. team:42, and cannot be edited or deleted from here.
+# Library names must match library_alias_pattern, and cannot be one of SQLite's own schema names.
+library_alias_pattern = r'[a-z][a-z0-9_]*'
+library_id_separator = ':'
+reserved_library_aliases = ['main', 'temp']
+# Workflows: saved commands run in steps, e.g. build, then test and lint at the same time, then deploy.
+# Names must match workflow_name_pattern. The steps are written as Command IDs with the separator between stages.
+# Steps that do not wait for each other run at the same time, workflow_jobs of them by default.
+workflow_name_pattern = r'[a-z][a-z0-9_-]*'
+workflow_stage_separator = 'then'
+workflow_jobs = 4
+
 items_before_break = [
-    mo_e.key, mo_a.key, mo_edit.key, mo_d.key, mo_t.key, mo_r.key, mo_ss.key,
+    mo_e.key, mo_a.key, mo_edit.key, mo_d.key, mo_t.key, mo_r.key, mo_ss.key, mo_s.key, mo_f.key,
 ]
 
 options_within_main_menu = [
     mo_e.key, mo_a.key, mo_edit.key, mo_d.key, mo_ss.key, mo_t.key, mo_help.key, mo_q.key, mo_mm.key, mo_r.key, mo_scm.key,
+    mo_s.key, mo_f.key, mo_lib.key, mo_next.key, mo_prev.key, mo_wf.key, mo_w.key,
 ]
 
 options_within_input_menu = [
@@ -1,17 +1,46 @@
-import logging
-from command_saver.run_me import RunMe
+import sys
+from os import path, makedirs
+from command_saver.daemon.client import DaemonClient
 from command_saver.constants import log_path
 
 
 def main():
+    # Report how long starting the program takes, module by module, instead of running it
+    if '--startup-profile' in sys.argv[1:]:
+        from command_saver.utils.startup_profile import StartupProfile
+        StartupProfile().print_report()
+        return
+    # Let a running daemon serve the call, so nothing else has to be imported here
+    if '--daemon' not in sys.argv[1:]:
+        status = DaemonClient().run(sys.argv[1:])
+        if status is not None:
+            sys.exit(status)
+    # The rest of the program is only loaded when it runs in this process
+    import logging
+    from command_saver.run_me import RunMe
+    from command_saver.one_shot import OneShot
+    from command_saver.utils.maintenance import Maintenance
+    # Create the program's folder if it doesn't exist
+    makedirs(path.dirname(log_path), exist_ok=True)
     # Set up logger configuration for the program.
     logging.basicConfig(level=logging.DEBUG,
                         format='%(asctime)s %(name)-12s %(levelname)-8s %(message)s',
                         datefmt='%m-%d %H:%M',
                         filename=log_path,
                         filemode='w')
+    # Keep the program warm in the background for later calls
+    if '--daemon' in sys.argv[1:]:
+        from command_saver.daemon.server import Daemon
+        Daemon().serve()
+        return
+    # Options like `cs e 3` run straight away, without the menus, and exit with the command's status
+    one_shot = OneShot.from_args(sys.argv[1:])
+    if one_shot is not None:
+        sys.exit(one_shot.run())
     # Run the program
-    RunMe().run_program()
+    RunMe(args=sys.argv[1:]).run_program()
+    # The session has ended, so tidy up the database while nobody waits for it
+    Maintenance().run_if_needed()
 
 
 if __name__ == '__main__':
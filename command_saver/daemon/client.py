@@ -0,0 +1,114 @@
+import json
+import os
+import signal
+import socket
+from command_saver.constants import daemon_socket_path, command_failed_status
+
+# Signals typed in the terminal are passed on to the command the daemon runs
+FORWARDED_SIGNALS = ('SIGINT', 'SIGQUIT', 'SIGTERM', 'SIGHUP')
+
+
+class DaemonClient:
+    """
+    Thin client of the background daemon (cs --daemon). It only imports what talking to the daemon needs:
+    it sends the command line, the working folder and the environment together with its terminal (stdin,
+    stdout and stderr), so the daemon's output goes straight to this terminal, and it waits for the exit status.
+    If no daemon is running, the program runs in this process as usual.
+    """
+
+    def __init__(self, socket_path: str = daemon_socket_path):
+        """
+        Prepares the client.
+        Args:
+            socket_path: Unix socket the daemon listens on.
+        """
+        self.socket_path = socket_path
+
+    @staticmethod
+    def is_supported():
+        """
+        Checks whether this system can pass a terminal to another process (Unix, Python 3.9 or newer).
+        Returns: True or False
+
+        """
+        return hasattr(socket, 'AF_UNIX') and hasattr(socket, 'send_fds')
+
+    def run(self, args: list):
+        """
+        Asks the daemon to run the command line.
+        Args:
+            args: command line arguments, without the program name.
+
+        Returns: the exit status, or None if the daemon cannot run it and the program has to run in this process.
+
+        """
+        if not self.is_supported():
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # No daemon, or one that has stopped without removing its socket
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                return None
+            request = json.dumps({'args': args, 'cwd': os.getcwd(), 'env': dict(os.environ)}).encode() + b'\n'
+            # The terminal travels with the first byte, the request follows
+            socket.send_fds(sock, [b'\0'], [0, 1, 2])
+            sock.sendall(request)
+            return self.__wait(sock)
+        # The daemon went away before it started the command (e.g. it stopped for being idle)
+        except OSError:
+            return None
+        finally:
+            sock.close()
+
+    @staticmethod
+    def forward(pid: int, signum: int):
+        """
+        Passes a signal on to the command the daemon runs.
+        Args:
+            pid: process group of the command.
+            signum: signal to pass on.
+
+        """
+        try:
+            os.killpg(pid, signum)
+        # The command has just finished
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def __wait(sock):
+        """
+        Follows the daemon's replies until the command has finished.
+        Args:
+            sock: connection to the daemon.
+
+        Returns: the exit status, or None if the program has to run in this process.
+
+        """
+        started = False
+        try:
+            for line in sock.makefile('rb'):
+                reply = json.loads(line)
+                # The daemon leaves options that need the menus to this process
+                if reply.get('fallback'):
+                    return None
+                # The command has started in its own process group: pass the terminal's signals on to it
+                if 'pid' in reply:
+                    started = True
+                    for name in FORWARDED_SIGNALS:
+                        if hasattr(signal, name):
+                            try:
+                                signal.signal(getattr(signal, name),
+                                              lambda signum, frame, pid=reply['pid']: DaemonClient.forward(pid, signum))
+                            # Signal handlers can only be set by the main thread
+                            except ValueError:
+                                pass
+                if 'status' in reply:
+                    return reply['status']
+        # Lost the connection: nothing is run twice
+        except OSError:
+            pass
+        # The daemon stopped before the command finished
+        return command_failed_status if started else None
@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from command_saver.run_me import RunMe
+from command_saver.one_shot import OneShot
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.query_cache import QueryCache
+from command_saver.utils.fuzzy_finder import FuzzyFinder
+from command_saver.daemon.client import DaemonClient
+from command_saver.constants import (
+    database_path,
+    daemon_socket_path,
+    daemon_idle_timeout,
+    daemon_poll_interval,
+    daemon_settings_variables,
+    command_failed_status
+)
+
+
+class Daemon:
+    """
+    Background daemon that keeps the program warm between calls: its modules and rich are imported,
+    the database has been checked and the fuzzy finder index is built. Every client session is served by a
+    forked copy of it, so many sessions run at the same time and none of them starts from scratch.
+    The copy runs in the client's terminal and folder, with the client's environment. The settings read from
+    the environment when the daemon started (database, performance profile, busy timeout...) cannot change
+    afterwards, so clients with other values are left to run in their own process.
+    Only options that run straight from the command line (see OneShot) are served, the menus run in the client.
+    Start it with: cs --daemon. It exits after daemon_idle_timeout seconds without clients.
+    """
+
+    def __init__(self,
+                 socket_path: str = daemon_socket_path,
+                 idle_timeout: float = daemon_idle_timeout,
+                 database_path: str = database_path,
+                 ):
+        """
+        Prepares the daemon.
+        Args:
+            socket_path: Unix socket to listen on.
+            idle_timeout: seconds without clients before the daemon exits.
+            database_path: database the clients use.
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.database = database_path
+        # Processes serving clients right now
+        self.sessions = set()
+        # State of the database when the fuzzy finder index was built, None if it has to be built again
+        self.index_state = None
+
+    def is_running(self):
+        """
+        Checks whether a daemon already listens on the socket.
+        Returns: True or False
+
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def __warm_up(self):
+        """
+        Loads everything the clients would otherwise load on every call.
+
+        """
+        # Check the database once
+        RunMe.prepare_database()
+        # Import rich, which draws every table
+        import rich.console
+        import rich.table
+        import rich.markup
+        # Build the fuzzy finder index
+        self.__build_index()
+
+    def __build_index(self):
+        """
+        Builds the fuzzy finder index again and notes the state of the database it was built from.
+
+        """
+        FuzzyFinder.forget(self.database)
+        state = QueryCache.database_state(self.database)
+        FuzzyFinder.for_database(self.database, SavedCommands(database_path=self.database).iter_commands)
+        # Never keep a read transaction open while waiting, it would stop other terminals' checkpoints
+        ConnectionManager.commit(self.database)
+        self.index_state = state
+
+    def __check_index(self):
+        """
+        Drops the fuzzy finder index if the database has changed since it was built, e.g. by a client
+        or by another terminal. It is built again when the daemon has nothing else to do.
+
+        """
+        if self.index_state is not None and QueryCache.database_state(self.database) != self.index_state:
+            FuzzyFinder.forget(self.database)
+            self.index_state = None
+
+    def __reap(self):
+        """
+        Collects the sessions that have finished.
+
+        """
+        for pid in list(self.sessions):
+            try:
+                finished, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                finished = pid
+            if finished:
+                self.sessions.discard(pid)
+
+    @staticmethod
+    def __is_same_user(conn):
+        """
+        Checks that the client runs as the user of the daemon, where the system tells (Linux).
+        Elsewhere only the permissions of the socket file keep other users out.
+        Args:
+            conn: connection of the client.
+
+        Returns: True or False
+
+        """
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        credentials = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        pid, uid, gid = struct.unpack('3i', credentials)
+        return uid == os.getuid()
+
+    def serve(self):
+        """
+        Listens for clients until the daemon has been idle for idle_timeout seconds.
+
+        """
+        if not DaemonClient.is_supported() or not hasattr(os, 'fork'):
+            print("The daemon needs a Unix system and Python 3.9 or newer.")
+            return
+        if self.is_running():
+            print("A daemon is already running on {}.".format(self.socket_path))
+            return
+        # A socket file left behind by a daemon that was killed
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user may connect: the daemon runs commands
+        old_umask = os.umask(0o077)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(socket.SOMAXCONN)
+        listener.settimeout(daemon_poll_interval)
+        self.__warm_up()
+        logging.info("Daemon listening on {}".format(self.socket_path))
+        print("CommandSaver daemon listening on {}, pid {}.".format(self.socket_path, os.getpid()))
+        last_active = time.monotonic()
+        # Being stopped with kill still removes the socket
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            while True:
+                self.__reap()
+                # Sessions still running keep the daemon alive
+                if self.sessions:
+                    last_active = time.monotonic()
+                elif time.monotonic() - last_active > self.idle_timeout:
+                    break
+                try:
+                    conn, address = listener.accept()
+                # Nothing to do: build the index again if the database has changed
+                except socket.timeout:
+                    self.__check_index()
+                    if self.index_state is None:
+                        self.__build_index()
+                    continue
+                last_active = time.monotonic()
+                if not self.__is_same_user(conn):
+                    conn.close()
+                    continue
+                self.__check_index()
+                pid = os.fork()
+                # The copy serves the client and never comes back
+                if pid == 0:
+                    listener.close()
+                    self.__serve_client(conn)
+                conn.close()
+                self.sessions.add(pid)
+        finally:
+            listener.close()
+            os.unlink(self.socket_path)
+            logging.info("Daemon stopped")
+
+    @staticmethod
+    def __reply(conn, **reply):
+        """
+        Sends a reply to the client.
+        Args:
+            conn: connection of the client.
+            **reply: values to send.
+
+        """
+        conn.sendall(json.dumps(reply).encode() + b'\n')
+
+    @staticmethod
+    def __has_same_settings(env: dict):
+        """
+        Checks whether the client's environment gives the settings the daemon started with.
+        Args:
+            env: environment of the client.
+
+        Returns: True or False
+
+        """
+        return all(env.get(name) == os.environ.get(name) for name in daemon_settings_variables)
+
+    def __serve_client(self, conn):
+        """
+        Serves one client in the forked copy of the daemon, then ends the copy.
+        Args:
+            conn: connection of the client.
+
+        """
+        status = command_failed_status
+        try:
+            conn.settimeout(None)
+            # The client's terminal comes with the first byte, the request follows
+            message, fds, flags, address = socket.recv_fds(conn, 1, 3)
+            request = json.loads(conn.makefile('rb').readline())
+            one_shot = OneShot.from_args(request['args'])
+            if one_shot is None or len(fds) != 3 or not self.__has_same_settings(request['env']):
+                self.__reply(conn, fallback=True)
+                return
+            # The client's signals reach the command as they would without the daemon
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # SQLite connections must not cross a fork, so this copy opens its own
+            ConnectionManager.forget_all()
+            QueryCache.clear()
+            # Run in the client's terminal, folder and environment, in its own process group
+            # so the client can pass the terminal's signals on to it
+            sys.stdout.flush()
+            sys.stderr.flush()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            sys.stdout.reconfigure(line_buffering=True)
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+            os.setpgid(0, 0)
+            self.__reply(conn, pid=os.getpid())
+            status = one_shot.run()
+        except Exception as e:
+            logging.error("The daemon could not serve a client: {}".format(e))
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                self.__reply(conn, status=status)
+            except OSError:
+                pass
+            # Leave without the parent's exit handlers, which would close its database connections
+            os._exit(0)
+
@@ -1,8 +1,11 @@
 import logging
 import sqlite3
+import time
 from command_saver.string_templates.logging_str import *
 from command_saver.string_templates.error_str import *
 from command_saver.errors.err import Err
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.constants import busy_retries, busy_backoff
 
 
 class SQL_err:
@@ -14,23 +17,18 @@ class SQL_err:
     def sql_confirmation(method_description: str, method):
         """
         Takes a method that tries to use sql and tries to execute it, logs this. If it fails,
-        error is logged and flagged up to the user.
+        error is logged and flagged up to the user. If the database is locked by another terminal,
+        the method is retried with a growing pause (backoff) before the error is reported.
         Args:
             method_description: the description of the method being executed. This is for logging.
             method: a function that will be executed.
         Returns: method's return value.
 
         """
-        # try to do call the method
-        try:
-            # Log the event
-            logging.info(LOG_ACTION_TEMPLATE.format(method_description))
-            # call the method
-            result = method()
-            return result
-        # except if SQL crashes
-        except sqlite3.Error as e:
-            Err(error=e, action=method_description).error()
+        # Log the event
+        logging.info(LOG_ACTION_TEMPLATE.format(method_description))
+        # call the method
+        return SQL_err.__call_with_retry(method_description, method)
 
     @staticmethod
     def sql_confirmation_2args(method_description: str, method,
@@ -38,7 +36,8 @@ class SQL_err:
                                arg2: str = None):
         """
         Takes a method that tries to use sql and tries to execute it, logs this. If it fails,
-        error is logged and flagged up to the user.
+        error is logged and flagged up to the user. If the database is locked by another terminal,
+        the method is retried with a growing pause (backoff) before the error is reported.
         Args:
             method_description: the description of the method being executed. This is for logging.
             method: a function that will be executed.
@@ -48,13 +47,56 @@ class SQL_err:
         Returns: method's return value
 
         """
-        # try to do call the method
-        try:
-            # Log the event
-            logging.info(LOG_ACTION_TEMPLATE.format(method_description))
-            # call the method
-            result = method(arg1, arg2)
-            return result
-        # except if SQL crashes
-        except sqlite3.Error as e:
-            Err(error=e, action=method_description).error()
+        # Log the event
+        logging.info(LOG_ACTION_TEMPLATE.format(method_description))
+        # call the method
+        return SQL_err.__call_with_retry(method_description, lambda: method(arg1, arg2))
+
+    @staticmethod
+    def __call_with_retry(method_description: str, method):
+        """
+        Calls the method, retrying it while the database is locked by another terminal.
+        Args:
+            method_description: the description of the method being executed. This is for logging.
+            method: a function without arguments that will be executed.
+
+        Returns: method's return value or None if it failed.
+
+        """
+        # Count the retries done so far
+        retry = 0
+        while True:
+            # try to do call the method
+            try:
+                return method()
+            # except if SQL crashes
+            except sqlite3.Error as e:
+                # If another terminal holds the lock, wait and try again while retries are left,
+                # undoing what the failed attempt left uncommitted first
+                if SQL_err.is_busy_error(e) and retry < busy_retries and ConnectionManager.rollback_pending():
+                    # Wait longer after every retry
+                    pause = busy_backoff * (2 ** retry)
+                    retry += 1
+                    logging.warning(DATABASE_BUSY_TEMPLATE.format(method_description, pause, retry, busy_retries))
+                    time.sleep(pause)
+                    continue
+                # Otherwise report the error
+                Err(error=e, action=method_description).error()
+                return None
+
+    @staticmethod
+    def is_busy_error(error: sqlite3.Error):
+        """
+        Checks whether the error was caused by another connection holding the database lock.
+        Args:
+            error: SQLite error to check.
+
+        Returns: True or False
+
+        """
+        # Python 3.11+ tells the SQLite result code
+        code = getattr(error, 'sqlite_errorcode', None)
+        if code is not None:
+            return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+        # Older versions only tell the message
+        return 'locked' in str(error) or 'busy' in str(error)
@@ -47,8 +47,12 @@ class InputWindow:
                 # Print valid answers
                 if valid_answers == 'any_string':
                     valid_print_text = 'any text.'
-                else:
+                # Lists of answers are printed in full
+                elif isinstance(valid_answers, (list, tuple)):
                     valid_print_text = ', '.join(str(x) for x in valid_answers)
+                # Anything else, e.g. the command IDs, describes itself instead of being gone through
+                else:
+                    valid_print_text = str(valid_answers)
                 print(VALID_ANSWERS_TEMPLATE.format(valid_print_text))
                 if msg_info is not None:
                     # Print information/instructions
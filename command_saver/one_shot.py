@@ -0,0 +1,128 @@
+from command_saver.run_me import RunMe
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.table.libraries import Libraries
+from command_saver.table.command_ids import CommandIds
+from command_saver.visual_design.view_contents import ViewContents
+from command_saver.visual_design.formatter import StringFormatter
+from command_saver.constants import (
+    mo_e,
+    mo_t,
+    mo_ss,
+    mo_s,
+    mo_f,
+    mo_w,
+    command_not_found_status,
+    command_failed_status
+)
+
+
+class OneShot:
+    """
+    Runs one option given on the command line, e.g. `cs e 3`, without the menus: no lists are read,
+    the Command ID is checked with a single lookup by rowid, and the program exits with the command's status.
+    Options that need the user's answers (add, edit, delete...) still go through the program's menus.
+    """
+    # Options that can run straight from the command line, and whether they take a Command ID (or text)
+    options = {mo_e.key: 'id', mo_ss.key: 'id', mo_t.key: 'text', mo_s.key: 'text', mo_f.key: 'text',
+               mo_w.key: 'text'}
+
+    def __init__(self, option: str, argument: str):
+        """
+        Prepares the option.
+        Args:
+            option: option to run.
+            argument: Command ID, the text of the t, s and f options, the name of a workflow for w,
+                or the words after e to execute many commands or give values, e.g. ['3', '7', '--jobs', '2'].
+        """
+        self.option = option
+        self.argument = argument
+
+    @classmethod
+    def from_args(cls, args: list):
+        """
+        Checks whether the command line asks for an option that can run straight away.
+        Args:
+            args: command line arguments, without the program name.
+
+        Returns: OneShot, or None if the program's menus are needed.
+
+        """
+        # An option and its Command ID or text are needed
+        if len(args) < 2 or args[0] not in cls.options:
+            return None
+        # Text may be made of many words, e.g. `cs t ls -la`
+        if cls.options[args[0]] == 'text':
+            return cls(args[0], ' '.join(args[1:]))
+        # Many commands can be executed at once, e.g. `cs e 3 7 12 --jobs 4`, or one with values, e.g. `cs e 12 ns=prod`
+        if args[0] == mo_e.key and len(args) > 2:
+            return cls(args[0], args[1:])
+        # otherwise a Command ID is one word
+        if len(args) != 2:
+            return None
+        return cls(args[0], args[1])
+
+    def __is_valid_id(self):
+        """
+        Checks the Command ID without looking it up.
+        Returns: True or False, after telling the user what is wrong.
+
+        """
+        try:
+            Libraries.split_id(self.argument)
+            return True
+        except ValueError:
+            StringFormatter(text_to_format='Error! {} is not a Command ID.'.format(self.argument)).print_error()
+            return False
+
+    def __is_found(self):
+        """
+        Checks the Command ID and looks it up by rowid.
+        Returns: True or False, after telling the user on the standard error that it was not found.
+
+        """
+        if not self.__is_valid_id():
+            return False
+        if self.argument not in CommandIds():
+            StringFormatter(text_to_format='Error! Command ID {} not found.'.format(self.argument)).print_error()
+            return False
+        return True
+
+    def run(self):
+        """
+        Runs the option.
+        Returns: the status the program exits with.
+
+        """
+        # Make sure the database exists and is up to date
+        RunMe.prepare_database()
+        # Run many saved commands at once, or one with values for its placeholders
+        if self.option == mo_e.key and isinstance(self.argument, list):
+            return RunMe.execute_many(self.argument)
+        # Run a saved command. Checking and finding it are two lookups by rowid.
+        if self.option == mo_e.key:
+            if not self.__is_found():
+                return command_not_found_status
+            result = SavedCommands(command_id=self.argument).execute_command()
+            if result is ValueError:
+                return command_not_found_status
+            return command_failed_status if result is None else result.exit_status
+        # Run text written for the terminal
+        if self.option == mo_t.key:
+            result = SavedCommands(option=mo_t.key).execute_command(text_to_terminal=True,
+                                                                    text_for_terminal=self.argument)
+            return command_failed_status if result is None else result.exit_status
+        # Show one command
+        if self.option == mo_ss.key:
+            if not self.__is_found():
+                return command_not_found_status
+            ViewContents.print_one_full_command(command_id=self.argument)
+            return 0
+        # Run a workflow
+        if self.option == mo_w.key:
+            return RunMe.run_workflow(self.argument.split())
+        # Search or fuzzy-find
+        if self.option == mo_s.key:
+            ViewContents.print_search_results(query=self.argument)
+        else:
+            ViewContents.print_fuzzy_results(query=self.argument)
+        return 0
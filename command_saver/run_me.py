@@ -1,12 +1,23 @@
+import sys
 import sqlite3
 import argparse
+import contextlib
 
 from command_saver.visual_design.view_contents import ViewContents
 from command_saver.input_window.input_window import InputWindow
 from command_saver.visual_design.formatter import StringFormatter
 from command_saver.table.saved_commands import SavedCommands
 from command_saver.table.user_data import UserData
+from command_saver.table.libraries import Libraries
+from command_saver.table.workflows import Workflows
+from command_saver.table.menu_options import MenuOptions
+from command_saver.table.command_ids import CommandIds
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.migrations import Migrations
+from command_saver.utils.command_runner import CommandResult
+from command_saver.utils.parallel_runner import ParallelRunner
+from command_saver.utils.command_template import CommandTemplate
+from command_saver.string_templates.user_prompts import COMMAND_FAILED_TEMPLATE
 import re
 from pathlib import Path
 from command_saver.constants import (
@@ -17,15 +28,30 @@ from command_saver.constants import (
     mo_edit,
     mo_ss,
     mo_t,
+    mo_s,
+    mo_f,
+    mo_lib,
+    mo_wf,
+    mo_w,
     mo_mm,
     mo_scm,
+    mo_next,
+    mo_prev,
     mo_help,
     mo_r,
     mo_q,
     mo_exp,
     mo_username,
     mo_userdep,
-    global_commands
+    global_commands,
+    library_alias_pattern,
+    library_id_separator,
+    valid_yes,
+    valid_no,
+    soft_yes_no,
+    command_not_found_status,
+    command_failed_status,
+    workflow_jobs
 )
 
 
@@ -34,7 +60,10 @@ class RunMe:
     Manages the running of the CommandSaver program. Call run_program() to run it.
     """
     valid_options = []
-    valid_ids = []
+    # Valid command IDs, looked up one at a time instead of being loaded all at once
+    valid_ids = CommandIds()
+    # IDs of the first and last command of the Saved Commands Menu page shown last, None if none is shown
+    page = None
     # Prepare variables for the user's choice of option and command_id
     option = None
     command_id = None
@@ -42,17 +71,10 @@ class RunMe:
     last_command = None
     # Prepare a variable to allow user to repeat the same command multiple times
     repeat_last_command = False
-    # Check if database exists before doing anything else
     # Load database path used in the program
     database = database_path
-    # If path exists
-    if Path(database).is_file():
-        # Pass and do nothing
-        pass
-    # If path does not exist
-    else:
-        # Create a new default database and let the user know it was done
-        DefaultDatabase().create_default_database()
+    # Whether the database has been checked this session
+    database_ready = False
     # Track one-time commands (straight into terminal using args)
     one_action_only = False
     one_action_only_executed = False
@@ -67,8 +89,9 @@ class RunMe:
         self.parser.add_argument("command_id", nargs="?", default=None,
                                  help="Specify the Command ID (number) of the command")
 
-        # If submitted as terminal call for a single execute
-        args = self.parser.parse_args()
+        # If submitted as terminal call for a single execute. Only the arguments given are read,
+        # so the program can also be started from other code
+        args = self.parser.parse_args(args if args is not None else [])
         args_option = args.option
         args_command_id = args.command_id
 
@@ -84,26 +107,41 @@ class RunMe:
                 self.option = args_option
                 self.one_action_only = True
 
+    @classmethod
+    def prepare_database(cls):
+        """
+        Checks the database before anything else uses it, once per session: creates it if it does not exist,
+        otherwise applies the migrations this version needs. Done when the program runs, not when it is imported.
+
+        """
+        # Nothing to do if it has been checked already
+        if cls.database_ready:
+            return
+        # If path exists
+        if Path(cls.database).is_file():
+            # Apply the migrations this version needs
+            Migrations().migrate()
+        # If path does not exist
+        else:
+            # Create a new default database and let the user know it was done
+            DefaultDatabase().create_default_database()
+            # and bring over the commands saved by the previous version, if there are any
+            Migrations().import_database()
+        cls.database_ready = True
+
     def __refresh_lists(self):
         """
-        Refreshes lists of valid menu options and command ids.
+        Refreshes the list of valid menu options. Command IDs are checked when they are used.
         Returns: updated class variables.
 
         """
-        # Use menu options list of the program to get values
-        t = ViewContents().menu_options_list
+        # Read the list. It comes from the query cache, so nothing is queried if the database has not changed.
+        t = MenuOptions().view_options() or []
         self.valid_options.clear()
         # for index in the menu list of tuples
         for i in range(len(t)):
             # add each menu option to valid_options
             self.valid_options.append(t[i][1])
-        # from existing saved commands list
-        t2 = ViewContents().all_saved_commands_list
-        self.valid_ids.clear()
-        # for index in the saved commands list of tuples
-        for i in range(len(t2)):
-            # add the command_id to the valid_ids list
-            self.valid_ids.append(t2[i][0])
 
     def run_program(self):
         """
@@ -111,6 +149,8 @@ class RunMe:
         Returns: running program in the terminal.
 
         """
+        # Make sure the database exists and is up to date
+        self.prepare_database()
         if self.option == None:
             # Launch the main menu to ask user what they want to do
             ViewContents().print_main_menu()
@@ -144,7 +184,7 @@ class RunMe:
                         msg='\nValidating input...',
                         valid_answers='any_string',
                         is_input_from_args=True,
-                        input_from_args=self.option + str(self.command_id) if self.command_id is not None else self.option)))
+                        input_from_args=self.option + ' ' + str(self.command_id) if self.command_id is not None else self.option)))
             # If answer for option is None, there was an error,
             # go back to Main Menu to remind user of options available.
             # Main Menu.
@@ -166,8 +206,14 @@ class RunMe:
                 continue
             # Saved Commands Menu
             if self.option == mo_scm.key:
-                # Print the Saved Commands Menu
-                ViewContents().print_saved_commands_menu()
+                # Print the first page of the Saved Commands Menu
+                self.page = ViewContents().print_saved_commands_menu()
+                # and return to the start of the loop
+                continue
+            # Next or previous page of the Saved Commands Menu
+            if self.option in [mo_next.key, mo_prev.key]:
+                # Turn the page, starting from the first page if none is shown yet
+                self.__option_to_turn_page()
                 # and return to the start of the loop
                 continue
             # Help page
@@ -215,6 +261,51 @@ class RunMe:
                     print("----End of Terminal execute----")
                 if self.one_action_only:
                     self.option = mo_q.key
+            # If chosen option is to search or fuzzy-find the saved commands
+            if self.option in [mo_s.key, mo_f.key]:
+                if self.command_id is None:
+                    self.command_id = InputWindow().ask_input(
+                        msg='Search text not found. Please enter text: ',
+                        valid_answers="any_string")
+                # If provided text is not a search but a request of an option
+                global_cmd = self.__global_option_checker(self.command_id)
+                if global_cmd:
+                    continue
+                # Use option search function and keep note whether error occurred
+                self.do_repeatable_menu_option(error=sqlite3.Error,
+                                               menu_option=self.__option_to_search)
+                # and return to the start of the loop
+                continue
+            # If chosen option is to show, add or remove shared libraries
+            if self.option == mo_lib.key:
+                # Use option libraries function and keep note whether error occurred
+                self.do_repeatable_menu_option(error=sqlite3.Error,
+                                               menu_option=self.__option_to_manage_libraries)
+                # and return to the start of the loop
+                continue
+            # If chosen option is to show, save or remove workflows
+            if self.option == mo_wf.key:
+                # Use option workflows function and keep note whether error occurred
+                self.do_repeatable_menu_option(error=sqlite3.Error,
+                                               menu_option=self.__option_to_manage_workflows)
+                # and return to the start of the loop
+                continue
+            # If chosen option is to run a workflow
+            if self.option == mo_w.key:
+                if self.command_id is None:
+                    self.command_id = InputWindow().ask_input(
+                        msg='Workflow not found. Please enter its name: ',
+                        valid_answers="any_string")
+                # If provided name is not a workflow but a request of an option
+                global_cmd = self.__global_option_checker(self.command_id)
+                if global_cmd:
+                    continue
+                # Run it and keep note whether error occurred
+                self.do_repeatable_menu_option(error=sqlite3.Error,
+                                               menu_option=lambda: self.run_workflow(str(self.command_id).split()))
+                print("----End of Terminal execute----")
+                # and return to the start of the loop
+                continue
             # If option to execute, delete, edit or show one command is chosen
             if self.option in [mo_e.key, mo_d.key, mo_edit.key, mo_ss.key]:
                 # Check if a command_id has been provided
@@ -333,16 +424,29 @@ class RunMe:
                 return option, command_id
             else:
                 return option, None
-        # Use regex to find the command integer (any first digit)
+        if option in [mo_s.key, mo_f.key, mo_lib.key, mo_wf.key, mo_w.key]:
+            search_text = re.search(
+                r'^{}\s*(.+)'.format(option), answer
+            )
+            if search_text:
+                return option, search_text.group(1)
+            else:
+                return option, None
+        # Many commands to execute at once (e.g. e 3 7 12 --jobs 4) or values for a command's placeholders
+        # (e.g. e 12 ns=prod): keep the words for execute_many
+        if option == mo_e.key and len(answer.split()) > 2:
+            return option, answer.split()[1:]
+        # Use regex to find the command integer (any first digit), with the library name for library commands
         search2 = re.search(
-            r'([0-9]+)', answer
+            r'((?:{}{})?[0-9]+)'.format(library_alias_pattern, library_id_separator), answer
         )
         # Check if a match was found
         if search2:
             # and if so, assign it to the command_id
             command_id = search2.group(1)
-            # if not text, make it an integer
-            command_id = int(command_id)
+            # if not a library command, make it an integer
+            if library_id_separator not in command_id:
+                command_id = int(command_id)
             # then check if it is a valid integer
             # if it is valid
             if command_id in self.valid_ids:
@@ -456,10 +560,97 @@ class RunMe:
         to print out any instructions relevant to the command.
 
         """
+        # Many commands, or a command with values for its placeholders
+        if isinstance(self.command_id, list):
+            self.execute_many(self.command_id)
+            return
         # Try to execute the command. OS sends the command to the terminal.
-        SavedCommands(command_id=self.command_id).execute_command()
-        # # Print success message if an error was not thrown
-        # StringFormatter(text_to_format='Success! Command executed.').print_green_bold()
+        result = SavedCommands(command_id=self.command_id).execute_command()
+        # Tell the user if the command failed
+        self.__report_result(result)
+
+    @classmethod
+    def execute_many(cls, words: list):
+        """
+        Executes what the words after the execute option ask for, and prints how it ended:
+        many commands at the same time (e.g. 3 7 12 --jobs 4), a command with values for its placeholders
+        (e.g. 12 ns=prod), or a command once for every value of a file or of the standard input
+        (e.g. 12 --each ns --from namespaces.txt --jobs 8).
+        Args:
+            words: words after the option.
+
+        Returns: the status the program exits with.
+
+        """
+        try:
+            values, each, source, words = CommandTemplate.parse_arguments(words)
+            command_ids, jobs, fail_fast = ParallelRunner.parse_options(words)
+            if each is not None and len(command_ids) != 1:
+                raise ValueError("Values can only be given to one Command ID at a time")
+        except ValueError as e:
+            StringFormatter(text_to_format='Error! {}.'.format(e)).print_red_bold()
+            return command_failed_status
+        # One command, with the values of its placeholders
+        if each is None and len(command_ids) == 1:
+            result = SavedCommands(command_id=command_ids[0]).execute_command(values=values)
+            if result is ValueError:
+                return command_not_found_status
+            cls.__report_result(result)
+            return command_failed_status if result is None else result.exit_status
+        # Many commands at the same time
+        if each is None:
+            runs = SavedCommands().execute_commands(command_ids, jobs=jobs, fail_fast=fail_fast, values=values)
+            # The user has been told what is wrong
+            if runs is ValueError:
+                return command_not_found_status
+            if runs is None:
+                return command_failed_status
+            ViewContents.print_parallel_summary(runs)
+            return ParallelRunner.exit_status([result for command_id, description, result in runs])
+        # One command for every value, read as the commands run
+        try:
+            lines = open(source) if source not in [None, '-'] else contextlib.nullcontext(sys.stdin)
+        except OSError as e:
+            StringFormatter(text_to_format='Error! Could not read {}: {}.'.format(source, e.strerror)).print_red_bold()
+            return command_failed_status
+        with lines as values_to_run:
+            ran = SavedCommands(command_id=command_ids[0]).execute_fan_out(values_to_run, each=each, values=values,
+                                                                          jobs=jobs, fail_fast=fail_fast)
+        if ran is ValueError:
+            return command_not_found_status
+        if ran is None:
+            return command_failed_status
+        outcomes, status = ran
+        ViewContents.print_fan_out_summary(outcomes)
+        return status
+
+    @staticmethod
+    def run_workflow(words: list):
+        """
+        Runs the workflow named in the words after the option, e.g. release --jobs 4 --fail-fast,
+        and prints how each of its steps ended.
+        Args:
+            words: words after the option: the name of the workflow, its options and values for placeholders.
+
+        Returns: the status the program exits with.
+
+        """
+        try:
+            values, each, source, words = CommandTemplate.parse_arguments(words)
+            names, jobs, fail_fast = ParallelRunner.parse_options(words, jobs=workflow_jobs)
+            if each is not None or len(names) != 1:
+                raise ValueError("Give the name of one workflow, e.g. w release --jobs 4")
+        except ValueError as e:
+            StringFormatter(text_to_format='Error! {}.'.format(e)).print_red_bold()
+            return command_failed_status
+        runs = Workflows().execute_workflow(names[0], jobs=jobs, fail_fast=fail_fast, values=values)
+        # The user has been told what is wrong
+        if runs is ValueError:
+            return command_not_found_status
+        if runs is None:
+            return command_failed_status
+        ViewContents.print_parallel_summary(runs, table_title='WORKFLOW {}'.format(names[0].upper()))
+        return ParallelRunner.exit_status([result for command_id, description, result in runs])
 
     def __option_to_execute_text_in_terminal(self):
         """
@@ -468,8 +659,101 @@ class RunMe:
 
         """
         # Try to execute the command. OS sends the command to the terminal.
-        SavedCommands(command_id=self.command_id, option=mo_t.key).execute_command(
+        result = SavedCommands(command_id=self.command_id, option=mo_t.key).execute_command(
             text_to_terminal=True, text_for_terminal=self.command_id)
+        # Tell the user if the command failed
+        self.__report_result(result)
+
+    @staticmethod
+    def __report_result(result):
+        """
+        Prints the exit status of a command that has failed.
+        Args:
+            result: what execute_command returned.
+
+        """
+        if isinstance(result, CommandResult) and not result.succeeded:
+            StringFormatter(text_to_format=COMMAND_FAILED_TEMPLATE.format(result.exit_status)).print_red_bold()
+
+    def __option_to_search(self):
+        """
+        Uses module to search the saved commands and
+        to print out the matching commands.
+
+        """
+        # Print the commands that match the letters, if fuzzy find was chosen
+        if self.option == mo_f.key:
+            ViewContents.print_fuzzy_results(query=self.command_id)
+        # or the commands that match the search text
+        else:
+            ViewContents.print_search_results(query=self.command_id)
+
+    def __option_to_turn_page(self):
+        """
+        Prints the next or the previous page of the Saved Commands Menu.
+
+        """
+        # Without a page shown, start from the first one
+        if self.page is None:
+            self.page = ViewContents().print_saved_commands_menu()
+            return
+        first_id, last_id = self.page
+        # Read the page after the last command shown, or before the first one
+        if self.option == mo_next.key:
+            page = ViewContents().print_saved_commands_menu(after_id=last_id)
+        else:
+            page = ViewContents().print_saved_commands_menu(before_id=first_id)
+        # At either end of the list, stay on the page shown
+        if page is not None:
+            self.page = page
+
+    def __option_to_manage_libraries(self):
+        """
+        Uses module to show the shared libraries, add one (lib team /path/team.db)
+        or remove one (lib team).
+
+        """
+        # Split the text into the library name and its database
+        words = str(self.command_id).split(maxsplit=1) if self.command_id is not None else []
+        # Add a library, if a database is given
+        if len(words) == 2:
+            Libraries().add_library(alias=words[0], library_path=words[1])
+        # Remove a library, if only its name is given and the user confirms it
+        elif len(words) == 1:
+            confirmation = InputWindow().ask_input(
+                msg='Remove the library {}? Its database is not changed. {} '.format(words[0], soft_yes_no),
+                valid_answers=valid_yes + valid_no)
+            if confirmation in valid_yes:
+                Libraries().remove_library(alias=words[0])
+            # If user has chosen to leave
+            elif self.__global_option_checker(confirmation):
+                return True
+        # Show the libraries
+        ViewContents.print_libraries()
+
+    def __option_to_manage_workflows(self):
+        """
+        Uses module to show the workflows, save one (wf release 3 then 7 8 then 12)
+        or remove one (wf release).
+
+        """
+        # Split the text into the workflow name and its steps
+        words = str(self.command_id).split() if self.command_id is not None else []
+        # Save a workflow, if steps are given
+        if len(words) > 1:
+            Workflows().save_workflow(name=words[0], words=words[1:])
+        # Remove a workflow, if only its name is given and the user confirms it
+        elif len(words) == 1:
+            confirmation = InputWindow().ask_input(
+                msg='Remove the workflow {}? Its commands are not changed. {} '.format(words[0], soft_yes_no),
+                valid_answers=valid_yes + valid_no)
+            if confirmation in valid_yes:
+                Workflows().remove_workflow(name=words[0])
+            # If user has chosen to leave
+            elif self.__global_option_checker(confirmation):
+                return True
+        # Show the workflows
+        ViewContents.print_workflows()
 
     def __option_to_delete(self):
         """
@@ -0,0 +1,67 @@
+import logging
+import sqlite3
+from os import path
+from command_saver.storage.sqlite_backend import SQLiteBackend
+from command_saver.storage.jsonl_backend import JSONLinesBackend
+from command_saver.constants import (
+    database_path,
+    storage_backend
+)
+
+
+class Backends:
+    """
+    Opens the storage backend of a database once per session and shares it, like ConnectionManager
+    shares the connection, so the JSON-lines log is read into memory only once.
+    """
+    # Open backends, keyed by (backend name, database path)
+    opened = {}
+    # How every backend is opened for a database
+    openers = {
+        SQLiteBackend.name: lambda database: SQLiteBackend(database),
+        JSONLinesBackend.name: lambda database: Backends.open_log(database),
+    }
+
+    @staticmethod
+    def open_log(database_path: str = database_path):
+        """
+        Opens the JSON-lines log kept next to the database. The first time, when there is no log yet,
+        it is started with the commands saved in the database, so switching backends keeps them.
+        Args:
+            database_path: database the saved commands belong to.
+
+        Returns: JSONLinesBackend.
+
+        """
+        log_path = path.splitext(database_path)[0] + '.jsonl'
+        is_new = not path.exists(log_path)
+        log = JSONLinesBackend(log_path)
+        if is_new:
+            try:
+                database = SQLiteBackend(database_path)
+                saved_commands = list(database.export_commands())
+                next_id = database.next_command_id()
+            # Without a database there is nothing to copy yet, so the log is started on the next session
+            except sqlite3.Error as e:
+                logging.warning("Could not copy the saved commands of {} into {}: {}".format(
+                    database_path, log_path, e))
+                return log
+            log.import_commands(saved_commands, next_id=next_id)
+        return log
+
+    @classmethod
+    def open(cls, database_path: str = database_path, name: str = storage_backend):
+        """
+        Returns the storage backend of a database, opening it on first use.
+        Args:
+            database_path: database the saved commands belong to.
+            name: name of the backend, storage_backend (CS_STORAGE_BACKEND) by default.
+
+        Returns: StorageBackend.
+
+        """
+        key = (name, database_path)
+        if key not in cls.opened:
+            cls.opened[key] = cls.openers[name](database_path)
+        return cls.opened[key]
+
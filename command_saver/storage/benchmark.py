@@ -0,0 +1,137 @@
+import argparse
+import random
+import tempfile
+import time
+from os import path
+from command_saver.storage.sqlite_backend import SQLiteBackend
+from command_saver.storage.jsonl_backend import JSONLinesBackend
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.constants import (
+    recent_commands_count,
+    popular_commands_count,
+    performance_profile
+)
+
+
+class StorageBenchmark:
+    """
+    Measures the throughput of the storage backends with the same operations, in a temporary folder,
+    so the fastest one for an install can be picked. Run it with:
+    python -m command_saver.storage.benchmark --commands 10000
+    """
+
+    def __init__(self, commands_count: int = 10000, lookups: int = 1000, seed: int = 1):
+        """
+        Prepares the benchmark.
+        Args:
+            commands_count: number of commands added to each backend.
+            lookups: number of single lookups, and of commands per bulk lookup.
+            seed: seed of the random IDs, so runs can be compared.
+        """
+        self.commands_count = commands_count
+        self.lookups = lookups
+        self.seed = seed
+
+    @staticmethod
+    def __timed(operations: int, action):
+        """
+        Runs an action and measures it.
+        Args:
+            operations: number of operations the action does.
+            action: function to run.
+
+        Returns: operations per second.
+
+        """
+        started = time.perf_counter()
+        action()
+        return operations / max(time.perf_counter() - started, 1e-9)
+
+    def __run_backend(self, open_backend):
+        """
+        Runs every operation on one backend.
+        Args:
+            open_backend: function that opens the backend.
+
+        Returns: a list of (operation, operations per second).
+
+        """
+        random_ids = random.Random(self.seed)
+        backend = open_backend()
+        results = []
+        # Writes: every command is added on its own, like a user adding commands
+        results.append(('add', self.__timed(self.commands_count, lambda: [
+            backend.add_command('Command {}'.format(i), 'echo {} && ls -la /tmp/{}'.format(i, i), 'admin')
+            for i in range(self.commands_count)])))
+        ids = [row[0] for row in backend.all_commands()]
+        # Opening the store again, as a new session does
+        backend.close()
+        opened = []
+        results.append(('open', self.__timed(1, lambda: opened.append(open_backend()))))
+        backend = opened[0]
+        # Reads
+        results.append(('list all', self.__timed(10, lambda: [backend.all_commands() for _ in range(10)])))
+        results.append(('find one', self.__timed(self.lookups, lambda: [
+            backend.full_command(random_ids.choice(ids)) for _ in range(self.lookups)])))
+        results.append(('find many', self.__timed(self.lookups * 10, lambda: [
+            backend.find_commands(random_ids.sample(ids, min(self.lookups, len(ids)))) for _ in range(10)])))
+        results.append(('main menu', self.__timed(100, lambda: [
+            backend.recent_and_popular(recent_commands_count, popular_commands_count) for _ in range(100)])))
+        # Changes
+        changed = max(self.lookups // 10, 1)
+        results.append(('update', self.__timed(changed, lambda: [
+            backend.update_command(random_ids.choice(ids), 'echo updated') for _ in range(changed)])))
+        results.append(('count calls', self.__timed(changed, lambda: [
+            backend.add_calls({random_ids.choice(ids): 1}) for _ in range(changed)])))
+        results.append(('delete', self.__timed(changed, lambda: [
+            backend.delete_command(command_id) for command_id in random_ids.sample(ids, changed)])))
+        backend.close()
+        return results
+
+    def run(self):
+        """
+        Runs the benchmark on every backend.
+        Returns: a list of (backend, operation, operations per second).
+
+        """
+        results = []
+        with tempfile.TemporaryDirectory() as folder:
+            # SQLite, starting from an empty saved commands table
+            database = path.join(folder, 'benchmark.db')
+            DefaultDatabase(database).create_default_database()
+            ConnectionManager.connect(database).execute("DELETE FROM saved_commands")
+            ConnectionManager.connect(database).execute("DELETE FROM sqlite_sequence")
+            ConnectionManager.commit(database)
+            results += [(SQLiteBackend.name, operation, speed)
+                        for operation, speed in self.__run_backend(lambda: SQLiteBackend(database))]
+            ConnectionManager.close(database)
+            # JSON lines
+            log = path.join(folder, 'benchmark.jsonl')
+            results += [(JSONLinesBackend.name, operation, speed)
+                        for operation, speed in self.__run_backend(lambda: JSONLinesBackend(log))]
+        return results
+
+
+def main(args=None):
+    """
+    Runs the benchmark from the terminal and prints the results.
+    Args:
+        args: arguments, taken from the command line if not given.
+
+    """
+    parser = argparse.ArgumentParser(description="Compare the throughput of the storage backends.")
+    parser.add_argument('--commands', type=int, default=10000, help="Number of commands added to each backend")
+    parser.add_argument('--lookups', type=int, default=1000, help="Number of lookups per read test")
+    options = parser.parse_args(args)
+    # Run it
+    results = StorageBenchmark(commands_count=options.commands, lookups=options.lookups).run()
+    # and print the operations per second of each backend
+    print("Performance profile: {}".format(performance_profile))
+    print("{:<10} {:<12} {:>14}".format('Backend', 'Operation', 'Operations/s'))
+    for backend, operation, speed in results:
+        print("{:<10} {:<12} {:>14,.0f}".format(backend, operation, speed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+import re
+import heapq
+import json
+import logging
+import mmap
+import os
+import time
+from datetime import date
+from command_saver.storage.storage_backend import StorageBackend
+from command_saver.table.libraries import Libraries
+from command_saver.constants import (
+    jsonl_log_path,
+    jsonl_compaction_ratio,
+    jsonl_compaction_min_lines,
+    jsonl_sync,
+    search_results_limit,
+    search_highlight_start,
+    search_highlight_end
+)
+
+# Positions of the fields in a full command
+ID, DESCRIPTION, COMMAND, DATE_CREATED, CREATED, TIMES_CALLED, AUTHOR, LAST_EDITED = range(8)
+
+
+class JSONLinesBackend(StorageBackend):
+    """
+    Stores saved commands in an append-only log of JSON lines, one change per line, and keeps
+    every command in memory, so reading never touches the disk. The log is read with mmap when opened.
+    Lines that have been overwritten by later changes are dropped by compaction, which rewrites the log
+    once it has more than jsonl_compaction_ratio outdated lines per command.
+    Made for read-heavy installs with a single writer: another process's appends are picked up
+    before reading, but two processes writing at the same time are not coordinated.
+    Only the user's own commands are kept here: shared libraries are SQLite databases.
+    """
+    name = 'jsonl'
+
+    def __init__(self,
+                 log_path: str = jsonl_log_path,
+                 compaction_ratio: float = jsonl_compaction_ratio,
+                 compaction_min_lines: int = jsonl_compaction_min_lines,
+                 sync: bool = jsonl_sync):
+        """
+        Opens the store, reading the log into memory.
+        Args:
+            log_path: file of the log.
+            compaction_ratio: outdated lines per command that trigger compaction.
+            compaction_min_lines: logs with fewer outdated lines are never compacted.
+            sync: whether every write is synced to disk (fsync).
+        """
+        self.log_path = log_path
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_lines = compaction_min_lines
+        self.sync = sync
+        # Commands in memory, keyed by command ID: lists of the full command fields
+        self.commands = {}
+        # ID the next new command gets. IDs are never reused, even after a delete.
+        self.next_id = 1
+        # Lines in the log that later lines have made outdated
+        self.outdated_lines = 0
+        # Size and modification time of the log when it was last read or written by this store
+        self.log_state = None
+        # Log file kept open for appending
+        self.log_file = None
+        # Read the log
+        self.__load()
+
+    def __current_log_state(self):
+        """
+        Returns: size and modification time of the log, or None if it does not exist.
+
+        """
+        try:
+            log_stat = os.stat(self.log_path)
+            return log_stat.st_size, log_stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def __load(self):
+        """
+        Reads the whole log into memory, mapping the file instead of copying it into Python first.
+
+        """
+        # Start from nothing
+        self.commands = {}
+        self.next_id = 1
+        self.outdated_lines = 0
+        self.log_state = self.__current_log_state()
+        # An empty log cannot be mapped, and has nothing to read
+        if self.log_state is None or self.log_state[0] == 0:
+            return
+        with open(self.log_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+                # Apply every line in order
+                for line in iter(log.readline, b''):
+                    try:
+                        self.__apply(json.loads(line))
+                    # A line cut short by a crash during a write is skipped
+                    except ValueError:
+                        logging.warning("Skipping a damaged line in {}.".format(self.log_path))
+
+    def __refresh(self):
+        """
+        Reads the log again if another process has changed it since this store last read or wrote it.
+
+        """
+        if self.__current_log_state() != self.log_state:
+            self.__load()
+
+    def __apply(self, entry: dict):
+        """
+        Applies one change of the log to the commands in memory.
+        Args:
+            entry: one line of the log.
+
+        """
+        operation = entry.get('op')
+        command_id = entry.get('id')
+        # A new or changed command replaces the earlier line of the same command
+        if operation == 'put':
+            if command_id in self.commands:
+                self.outdated_lines += 1
+            self.commands[command_id] = entry['command']
+            self.next_id = max(self.next_id, command_id + 1)
+        # A deleted command makes its put line and the delete line itself outdated
+        elif operation == 'delete':
+            if self.commands.pop(command_id, None) is not None:
+                self.outdated_lines += 2
+        # Executions add to the popularity, and are folded into the command by compaction
+        elif operation == 'calls':
+            if command_id in self.commands:
+                self.commands[command_id][TIMES_CALLED] += entry['count']
+            self.outdated_lines += 1
+        # Written by compaction, so IDs of deleted commands stay used
+        elif operation == 'next_id':
+            self.next_id = max(self.next_id, command_id)
+
+    def __append(self, entries: list):
+        """
+        Writes changes at the end of the log and applies them in memory.
+        Args:
+            entries: lines to write.
+
+        """
+        # Pick up what another process may have written first
+        self.__refresh()
+        # Open the log for appending on first write
+        if self.log_file is None:
+            self.log_file = open(self.log_path, 'a', encoding='utf-8')
+        # Write all lines at once
+        self.log_file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        self.log_file.flush()
+        if self.sync:
+            os.fsync(self.log_file.fileno())
+        # Apply them in memory
+        for entry in entries:
+            self.__apply(entry)
+        self.log_state = self.__current_log_state()
+        # Compact the log if it has grown too much
+        if self.outdated_lines >= self.compaction_min_lines and \
+                self.outdated_lines > self.compaction_ratio * max(len(self.commands), 1):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the log with one line per command, dropping outdated lines. The new log is written
+        to a temporary file and swapped in at once, so a crash leaves either the old or the new log.
+
+        """
+        temporary_path = self.log_path + '.compacting'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            # Keep the next ID, so IDs of deleted commands are not reused
+            f.write(json.dumps({'op': 'next_id', 'id': self.next_id}) + '\n')
+            # and every command as it is now
+            for command_id in sorted(self.commands):
+                f.write(json.dumps({'op': 'put', 'id': command_id, 'command': self.commands[command_id]}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        # Close the old log and swap the new one in
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        os.replace(temporary_path, self.log_path)
+        logging.info("Compacted {}, dropped {} outdated lines.".format(self.log_path, self.outdated_lines))
+        self.outdated_lines = 0
+        self.log_state = self.__current_log_state()
+
+    @staticmethod
+    def __own_id(command_id):
+        """
+        Reads the ID of one of the user's own commands.
+        Args:
+            command_id: ID of the command, e.g. 42.
+
+        Returns: the ID as a number. Raises ValueError if it is not valid or names a shared library.
+
+        """
+        alias, num_row = Libraries.split_id(command_id)
+        if alias is not None:
+            raise ValueError("Library {} is not available".format(alias))
+        return num_row
+
+    def all_commands(self):
+        # Read from memory, after picking up changes of other processes
+        self.__refresh()
+        return [(command_id, command[DESCRIPTION], command[COMMAND])
+                for command_id, command in sorted(self.commands.items())]
+
+    def export_commands(self):
+        self.__refresh()
+        return [tuple(command) for command_id, command in sorted(self.commands.items())]
+
+    def import_commands(self, full_commands, next_id: int = 1):
+        """
+        Copies commands into the log with their IDs, e.g. the commands already saved in SQLite
+        when the log is started. The log is written even if there are no commands,
+        so it is only done once.
+        Args:
+            full_commands: iterable of full commands.
+            next_id: ID the next new command gets, so IDs deleted in the other backend are not given again.
+
+        """
+        entries = [{'op': 'put', 'id': int(command[ID]), 'command': [int(command[ID])] + list(command[1:])}
+                   for command in full_commands]
+        # New commands are numbered after the imported ones
+        next_id = max([self.next_id, next_id] + [entry['id'] + 1 for entry in entries])
+        self.__append([{'op': 'next_id', 'id': next_id}] + entries)
+        logging.info("Imported {} commands into {}.".format(len(entries), self.log_path))
+
+    def iter_commands(self, after_id=None, before_id=None, limit: int = None):
+        self.__refresh()
+        # Take the IDs past the start, nearest first
+        if before_id is not None:
+            start = self.__own_id(before_id)
+            command_ids = sorted((command_id for command_id in self.commands if command_id < start), reverse=True)
+        else:
+            start = 0 if after_id is None else self.__own_id(after_id)
+            command_ids = sorted(command_id for command_id in self.commands if command_id > start)
+        if limit is not None and int(limit) >= 0:
+            command_ids = command_ids[:int(limit)]
+        return [(command_id, self.commands[command_id][DESCRIPTION], self.commands[command_id][COMMAND])
+                for command_id in command_ids]
+
+    def search_commands(self, query: str):
+        self.__refresh()
+        # Every word of the query must start a word of the description or the command
+        words = [re.compile(r'\b' + re.escape(word) + r'\w*', re.IGNORECASE)
+                 for word in re.findall(r'\w+', str(query))]
+        if len(words) == 0:
+            return []
+
+        def highlight(text):
+            return re.sub('|'.join(word.pattern for word in words),
+                          lambda found: search_highlight_start + found.group(0) + search_highlight_end,
+                          text, flags=re.IGNORECASE)
+        # There is no relevance ranking, the matches come in ID order
+        found = []
+        for command_id, command in sorted(self.commands.items()):
+            if all(word.search(command[DESCRIPTION]) or word.search(command[COMMAND]) for word in words):
+                found.append((command_id, highlight(command[DESCRIPTION]), highlight(command[COMMAND])))
+                if len(found) == search_results_limit:
+                    break
+        return found
+
+    def full_command(self, command_id):
+        self.__refresh()
+        # Look up the command in memory
+        command = self.commands.get(self.__own_id(command_id))
+        return None if command is None else tuple(command)
+
+    def find_commands(self, command_ids: list):
+        self.__refresh()
+        # Look up every ID in memory, leaving out IDs that are not valid and library IDs
+        found = {}
+        for command_id in command_ids:
+            try:
+                command = self.commands.get(self.__own_id(command_id))
+            except (TypeError, ValueError):
+                continue
+            if command is not None:
+                found[command[ID]] = (command[ID], command[DESCRIPTION], command[COMMAND])
+        return found
+
+    def recent_and_popular(self, recent_count: int, popular_count: int):
+        self.__refresh()
+        commands = self.commands.values()
+        # Same order as the SQLite query: newest first, then most called, older IDs first on ties
+        recent = heapq.nsmallest(recent_count, commands, key=lambda c: (-c[CREATED], c[ID]))
+        popular = heapq.nsmallest(popular_count, commands, key=lambda c: (-c[TIMES_CALLED], c[ID]))
+        recent_ids = {command[ID] for command in recent}
+        popular = [command for command in popular if command[ID] not in recent_ids]
+        return [(command[ID], command[DESCRIPTION], command[COMMAND]) for command in recent + popular]
+
+    def add_command(self, description: str, command: str, author: str):
+        self.__refresh()
+        # The new command takes the next ID
+        command_id = self.next_id
+        timestamp_now = int(time.time() * 1000)
+        self.__append([{'op': 'put', 'id': command_id, 'command': [
+            command_id, description, command, str(date.today()), timestamp_now, 0, author, timestamp_now]}])
+        return command_id
+
+    def update_command(self, command_id: int, command: str):
+        self.__refresh()
+        # Nothing to update if the command does not exist
+        existing = self.commands.get(int(command_id))
+        if existing is None:
+            return False
+        # Write the whole changed command as a new line
+        updated = list(existing)
+        updated[COMMAND] = command
+        updated[LAST_EDITED] = int(time.time() * 1000)
+        self.__append([{'op': 'put', 'id': int(command_id), 'command': updated}])
+        return True
+
+    def delete_command(self, command_id: int):
+        self.__refresh()
+        # Nothing to delete if the command does not exist
+        if int(command_id) not in self.commands:
+            return False
+        # Note the delete in the log
+        self.__append([{'op': 'delete', 'id': int(command_id)}])
+        return True
+
+    def add_calls(self, calls: dict):
+        # One line per command, folded into the command by compaction
+        self.__append([{'op': 'calls', 'id': int(command_id), 'count': count}
+                       for command_id, count in calls.items()])
+
+    def close(self):
+        # Every write has been flushed already, only the file is left to close
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
@@ -0,0 +1,295 @@
+import re
+import json
+import logging
+import time
+from datetime import date
+from command_saver.storage.storage_backend import StorageBackend
+from command_saver.table.libraries import Libraries
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.constants import (
+    database_path,
+    search_results_limit,
+    search_snippet_words,
+    search_highlight_start,
+    search_highlight_end,
+    fetch_batch_size
+)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Stores saved commands in the SQLite database used by the program, through the shared connection,
+    which is borrowed for every operation, so the backend outlives a closed connection.
+    Reads also cover the shared libraries attached to it, whose commands have IDs like team:42.
+    """
+    name = 'sqlite'
+    cacheable = True
+
+    def __init__(self, database_path: str = database_path):
+        """
+        Opens the store.
+        Args:
+            database_path: database with the saved_commands table.
+        """
+        self.database = database_path
+
+    def __connection(self):
+        """
+        Returns: the shared connection of the database, opened again if it has been closed.
+
+        """
+        return ConnectionManager.connect(self.database)
+
+    def __sources(self, searchable_only: bool = False):
+        """
+        Lists where saved commands are read from: the user's own database and every shared library,
+        which is attached to the shared connection first.
+        Args:
+            searchable_only: leave out the libraries that have no search index.
+
+        Returns: a list of (library name or None for the user's own commands, schema name, order of the source).
+
+        """
+        # The user's own commands come first
+        sources = [(None, 'main', 0)]
+        # then the libraries, ordered by name
+        for order, (alias, searchable) in enumerate(Libraries(database_path=self.database).attach(), start=1):
+            if searchable or not searchable_only:
+                sources.append((alias, '"{}"'.format(alias), order))
+        return sources
+
+    @staticmethod
+    def __id_column(alias, column: str = 'num_row'):
+        """
+        Writes the SQL of the command ID of a source.
+        Args:
+            alias: library name, None for the user's own commands.
+            column: column holding the ID in the source's database.
+
+        Returns: SQL of the ID. The user's own commands keep their IDs, library commands get IDs like team:42.
+
+        """
+        if alias is None:
+            return column
+        return "'{}' || {}".format(Libraries.library_id(alias, ''), column)
+
+    def __schema_and_row(self, command_id):
+        """
+        Finds where a command is saved.
+        Args:
+            command_id: ID of the command, e.g. 42 or team:42.
+
+        Returns: (schema name, ID in that database). Raises ValueError if the ID is not valid
+        or its library is not available.
+
+        """
+        alias, num_row = Libraries.split_id(command_id)
+        # The user's own commands
+        if alias is None:
+            return 'main', num_row
+        # Library commands, if the library is attached
+        if alias not in [library[0] for library in Libraries(database_path=self.database).attach()]:
+            raise ValueError("Library {} is not available".format(alias))
+        return '"{}"'.format(alias), num_row
+
+    def all_commands(self):
+        sources = self.__sources()
+        # Without libraries, read the commands in rowid order
+        if len(sources) == 1:
+            return self.__connection().execute("SELECT num_row, command_description, saved_command "
+                                               "FROM saved_commands ORDER BY num_row").fetchall()
+        # Otherwise read every library in the same query, the user's own commands first
+        return self.__connection().execute(
+            "SELECT command_id, command_description, saved_command FROM (" +
+            " UNION ALL ".join(
+                "SELECT {} AS command_id, command_description, saved_command, "
+                "{} AS source_order, num_row FROM {}.saved_commands".format(self.__id_column(alias), order, schema)
+                for alias, schema, order in sources) +
+            ") ORDER BY source_order, num_row").fetchall()
+
+    def export_commands(self):
+        # Only the user's own commands, in rowid order, read in batches
+        cur = self.__connection().cursor()
+        cur.execute("SELECT num_row, command_description, saved_command, date_created, "
+                    "timestamp_when_created, times_called, author_name, last_edited "
+                    "FROM saved_commands ORDER BY num_row")
+        return self.__fetch_in_batches(cur)
+
+    def next_command_id(self):
+        """
+        Returns: the ID the next new command gets. IDs of deleted commands are never given again.
+
+        """
+        row = self.__connection().execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'saved_commands'), 0), "
+            "COALESCE((SELECT MAX(num_row) FROM saved_commands), 0)) + 1").fetchone()
+        return row[0]
+
+    def iter_commands(self, after_id=None, before_id=None, limit: int = None):
+        backwards = before_id is not None
+        sources = self.__sources()
+        # Find the source and rowid to start from
+        start = None
+        if after_id is not None or backwards:
+            alias, num_row = Libraries.split_id(before_id if backwards else after_id)
+            start = ([source[2] for source in sources if source[0] == alias] or [None])[0], num_row
+            # A library that is not available has no commands to start from
+            if start[0] is None:
+                raise ValueError("Library {} is not available".format(alias))
+        # Every source reads the rows past the start, by rowid
+        members = []
+        parameters = []
+        for alias, schema, order in sources:
+            # Sources before the start are left out
+            if start is not None and (order > start[0] if backwards else order < start[0]):
+                continue
+            member = "SELECT {} AS command_id, command_description, saved_command, {} AS source_order, num_row " \
+                     "FROM {}.saved_commands".format(self.__id_column(alias), order, schema)
+            # and the source of the start only reads past it
+            if start is not None and order == start[0]:
+                member += " WHERE num_row {} ?".format('<' if backwards else '>')
+                parameters.append(start[1])
+            members.append(member)
+        direction = 'DESC' if backwards else 'ASC'
+        # A cursor of its own, so other queries can run while it is read
+        cur = self.__connection().cursor()
+        # A single source is read in rowid order directly, many sources are merged by source and rowid
+        if len(members) == 1:
+            query = members[0] + " ORDER BY num_row {} LIMIT ?".format(direction)
+        else:
+            query = "SELECT * FROM (" + " UNION ALL ".join(members) + \
+                    ") ORDER BY source_order {0}, num_row {0} LIMIT ?".format(direction)
+        cur.execute("SELECT command_id, command_description, saved_command FROM (" + query + ")",
+                    parameters + [-1 if limit is None else int(limit)])
+        return self.__fetch_in_batches(cur)
+
+    @staticmethod
+    def __fetch_in_batches(cur):
+        """
+        Reads the rows of a running query fetch_batch_size at a time, so only one batch is in memory.
+        Args:
+            cur: cursor with the query running. It is closed once the rows are read.
+
+        Returns: a generator of the rows.
+
+        """
+        try:
+            while True:
+                rows = cur.fetchmany(fetch_batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
+
+    def search_commands(self, query: str):
+        # Take the words of the query (punctuation is not indexed)
+        words = re.findall(r'\w+', str(query))
+        # If there are no words, nothing can match
+        if len(words) == 0:
+            return []
+        # Quote every word so it is not read as a search operator, and allow any ending
+        match = ' '.join('"{}"*'.format(word) for word in words)
+        # Look up the best matches of every index by relevance (BM25), and keep the best of them all
+        return self.__connection().execute(
+            "SELECT command_id, description, command FROM (" +
+            " UNION ALL ".join(
+                "SELECT * FROM (SELECT {} AS command_id, "
+                "highlight(saved_commands_search, 0, :start, :end) AS description, "
+                "snippet(saved_commands_search, 1, :start, :end, '...', :words) AS command, "
+                "rank AS search_rank "
+                "FROM {}.saved_commands_search WHERE saved_commands_search MATCH :match "
+                "ORDER BY rank LIMIT :limit)".format(self.__id_column(alias, 'rowid'), schema)
+                for alias, schema, order in self.__sources(searchable_only=True)) +
+            ") ORDER BY search_rank LIMIT :limit",
+            {'start': search_highlight_start, 'end': search_highlight_end, 'words': search_snippet_words,
+             'match': match, 'limit': search_results_limit}).fetchall()
+
+    def full_command(self, command_id):
+        # Look up the command by rowid, in the user's own database or in the library named in the ID
+        schema, num_row = self.__schema_and_row(command_id)
+        return self.__connection().execute("SELECT num_row, command_description, saved_command, date_created, "
+                                           "timestamp_when_created, times_called, author_name, last_edited "
+                                           "FROM {}.saved_commands WHERE num_row = ?".format(schema),
+                                           (num_row,)).fetchone()
+
+    def find_commands(self, command_ids: list):
+        # Group the valid IDs by the database they are saved in (anything else cannot be a command ID)
+        ids = {}
+        for command_id in command_ids:
+            try:
+                alias, num_row = Libraries.split_id(command_id)
+                ids.setdefault(alias, []).append(num_row)
+            except (TypeError, ValueError):
+                logging.info("Skipping command ID that is not valid: {}".format(command_id))
+        # The libraries are only looked up if a library ID is asked for
+        sources = [(None, 'main', 0)] if list(ids) == [None] else self.__sources()
+        sources = [source for source in sources if source[0] in ids]
+        if len(sources) == 0:
+            return {}
+        # One round trip, the IDs of every database passed as one JSON array, so the statement
+        # is the same for any number of IDs and stays in the statement cache
+        rows = self.__connection().execute(
+            " UNION ALL ".join(
+                "SELECT {}, command_description, saved_command FROM {}.saved_commands "
+                "WHERE num_row IN (SELECT value FROM json_each(?))".format(self.__id_column(alias), schema)
+                for alias, schema, order in sources),
+            [json.dumps(ids[alias]) for alias, schema, order in sources]).fetchall()
+        return {row[0]: row for row in rows}
+
+    def recent_and_popular(self, recent_count: int, popular_count: int):
+        # The top commands of every source, read from its recent or popular index with LIMIT
+        def top_commands(rank_column, limit):
+            return " UNION ALL ".join(
+                "SELECT * FROM (SELECT {0} AS command_id, command_description, saved_command, "
+                "{1} AS rank_value, {2} AS source_order, num_row FROM {3}.saved_commands "
+                "ORDER BY {1} DESC, num_row LIMIT :{4})".format(self.__id_column(alias), rank_column, order, schema, limit)
+                for alias, schema, order in self.__sources())
+        # Select the recent commands, then the popular commands that are not recent, in one query,
+        # so this takes the same time for any number of saved commands
+        return self.__connection().execute(
+            "WITH recent AS ("
+            "SELECT * FROM (" + top_commands('timestamp_when_created', 'recent') + ") "
+            "ORDER BY rank_value DESC, source_order, num_row LIMIT :recent), "
+            "popular AS ("
+            "SELECT * FROM (" + top_commands('times_called', 'popular') + ") "
+            "ORDER BY rank_value DESC, source_order, num_row LIMIT :popular) "
+            "SELECT command_id, command_description, saved_command FROM ("
+            "SELECT *, 0 AS part FROM recent "
+            "UNION ALL "
+            "SELECT *, 1 AS part FROM popular WHERE command_id NOT IN (SELECT command_id FROM recent)) "
+            "ORDER BY part, rank_value DESC, source_order, num_row",
+            {'recent': recent_count, 'popular': popular_count}).fetchall()
+
+    def add_command(self, description: str, command: str, author: str):
+        timestamp_now = int(time.time() * 1000)
+        # Insert the command and return the ID SQLite gave it
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("INSERT INTO saved_commands (command_description, saved_command, date_created, "
+                        "timestamp_when_created, times_called, author_name, last_edited) "
+                        "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                        (description, command, str(date.today()), timestamp_now, author, timestamp_now))
+            return cur.lastrowid
+
+    def update_command(self, command_id: int, command: str):
+        # Update the command and its last edited timestamp
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("UPDATE saved_commands SET saved_command = ?, last_edited = ? WHERE num_row = ?",
+                        (command, int(time.time() * 1000), int(command_id)))
+            return cur.rowcount > 0
+
+    def delete_command(self, command_id: int):
+        # Delete the command, IDs are not renumbered
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("DELETE FROM saved_commands WHERE num_row = ?", (int(command_id),))
+            return cur.rowcount > 0
+
+    def add_calls(self, calls: dict):
+        # Add all executions in one transaction, or in the unit of work already open
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.executemany("UPDATE saved_commands SET times_called = times_called + ? WHERE num_row = ?",
+                            [(count, int(command_id)) for command_id, count in calls.items()])
+
+    def close(self):
+        # The shared connection stays open for the rest of the session
+        ConnectionManager.commit(self.database)
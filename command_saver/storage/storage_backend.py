@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+
+
+class StorageBackend(ABC):
+    """
+    Interface of a store of saved commands. Every backend keeps the same fields as the
+    saved_commands table and the same command IDs, so backends can be swapped and compared.
+    A full command is a tuple of (command ID, description, terminal command, date created,
+    timestamp when created, times called, author, last edited timestamp).
+    The backend of the program is chosen with storage_backend, see Backends.open.
+    """
+    # Name used to choose the backend
+    name = None
+    # Whether QueryCache may keep the results. It only notices changes made to SQLite database files.
+    cacheable = False
+
+    @abstractmethod
+    def all_commands(self):
+        """
+        Returns: a list of (command ID, description, terminal command) of all commands, ordered by ID.
+
+        """
+
+    @abstractmethod
+    def export_commands(self):
+        """
+        Reads the user's own commands in full, e.g. to copy them into another backend.
+        Returns: an iterable of full commands, ordered by ID.
+
+        """
+
+    @abstractmethod
+    def iter_commands(self, after_id=None, before_id=None, limit: int = None):
+        """
+        Reads one page of commands, found by the ID it starts after.
+        Args:
+            after_id: start after this command ID, None to start from the first command.
+            before_id: go backwards from this command ID instead, nearest first.
+            limit: maximum number of commands, None for all.
+
+        Returns: an iterable of (command ID, description, terminal command). The lookup has already run,
+        so errors are raised here and not while the rows are read.
+
+        """
+
+    @abstractmethod
+    def search_commands(self, query: str):
+        """
+        Args:
+            query: text to look for. Every word must match, the last letters may be missing.
+
+        Returns: a list of (command ID, highlighted description, highlighted command) of the best matches.
+
+        """
+
+    @abstractmethod
+    def full_command(self, command_id):
+        """
+        Args:
+            command_id: ID of the command.
+
+        Returns: the full command, or None if it does not exist.
+        Raises ValueError if the ID is not valid.
+
+        """
+
+    @abstractmethod
+    def find_commands(self, command_ids: list):
+        """
+        Args:
+            command_ids: IDs of the commands to look for.
+
+        Returns: a dictionary of (command ID, description, terminal command) keyed by command ID.
+        IDs that are not found or not valid are left out.
+
+        """
+
+    @abstractmethod
+    def recent_and_popular(self, recent_count: int, popular_count: int):
+        """
+        Args:
+            recent_count: number of most recently created commands.
+            popular_count: number of most called commands.
+
+        Returns: a list of (command ID, description, terminal command): the most recent first,
+        then the most popular that are not recent, like the Main Menu summary.
+
+        """
+
+    @abstractmethod
+    def add_command(self, description: str, command: str, author: str):
+        """
+        Args:
+            description: description of the new command.
+            command: terminal command.
+            author: author of the command.
+
+        Returns: ID of the new command. IDs of deleted commands are never reused.
+
+        """
+
+    @abstractmethod
+    def update_command(self, command_id: int, command: str):
+        """
+        Args:
+            command_id: ID of the command.
+            command: new terminal command.
+
+        Returns: True if the command exists and has been updated.
+
+        """
+
+    @abstractmethod
+    def delete_command(self, command_id: int):
+        """
+        Args:
+            command_id: ID of the command.
+
+        Returns: True if the command existed and has been deleted.
+
+        """
+
+    @abstractmethod
+    def add_calls(self, calls: dict):
+        """
+        Adds executions to the popularity of commands.
+        Args:
+            calls: number of new executions keyed by command ID.
+
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        Saves everything and releases the files.
+
+        """
@@ -2,3 +2,7 @@
 LOG_ACTION_TEMPLATE = "Trying to do: {}."
 FIND_ITEM_TEMPLATE = "Trying to find item(s) {} {} in {}."
 EXECUTING_COMMAND_TEMPLATE = "Executing {} request with command ID {}"
+DATABASE_BUSY_TEMPLATE = "Database is locked by another terminal while trying to {}. Retrying in {} seconds (retry {} of {})."
+MIGRATION_TEMPLATE = "Upgrading the database schema to version {} ({}) in {}."
+IMPORT_DATABASE_TEMPLATE = "Importing the saved commands of the older database {} into {}."
+LIBRARY_SKIPPED_TEMPLATE = "Skipping the shared library {} at {}: {}."
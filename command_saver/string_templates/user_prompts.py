@@ -5,6 +5,7 @@ SORRY_NOT_VALID_TEMPLATE = "Sorry! {} is not a valid answer. Please try again or
 RISKY_ACTION_TEMPLATE = "Are you sure you want to {} the command {}: {}? {}"
 SUCCESSFUL_ACTION_TEMPLATE = "Success! Command with ID: {} has been {}."
 TEXT_IN_TERMINAL_TEMPLATE = "Trying to execute text into terminal. The text: {}"
+COMMAND_FAILED_TEMPLATE = "The command exited with status {}."
 TEXT_EDIT_TEMPLATE = "\nEdit command selected, command being edited: {}"
 TEXT_UPDATE_TIMESTAMP_TEMPLATE = "Trying to update timestamp of the command with commadn_id: {}."
 TEXT_AUTHOR_SUCCESS = "Author successfully changed from {} to {}."
@@ -0,0 +1,62 @@
+import sys
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.table.libraries import Libraries
+from command_saver.constants import database_path, mo_scm
+
+
+class CommandIds:
+    """
+    The valid command IDs, used like a list of them. Nothing is loaded up front:
+    checking an ID looks up that one command by rowid, and going through all IDs streams them,
+    so the program does not have to keep every command ID of huge libraries in memory.
+    """
+
+    def __init__(self,
+                 database_path: str = database_path,
+                 ):
+        """
+        Valid command IDs of a database and its shared libraries.
+        Args:
+            database_path: database to use.
+        """
+        self.database = database_path
+
+    def __contains__(self, command_id):
+        """
+        Checks whether a command with this ID exists.
+        Args:
+            command_id: ID to check, e.g. 42 or team:42.
+
+        Returns: True or False
+
+        """
+        # Anything that is not a command ID cannot be found
+        try:
+            Libraries.split_id(command_id)
+        except (TypeError, ValueError):
+            return False
+        # Look up the one command
+        return bool(SavedCommands(database_path=self.database).find_commands([command_id]))
+
+    def __iter__(self):
+        """
+        Goes through all command IDs in order, reading them in batches.
+        Returns: a generator of command IDs.
+
+        """
+        for command_id, description, command in SavedCommands(database_path=self.database).iter_commands():
+            yield command_id
+
+    def __str__(self):
+        """
+        Describes the valid IDs without going through them, for the valid answers of a question.
+        Returns: the range of the user's own command IDs, and where to see them all.
+
+        """
+        saved_commands = SavedCommands(database_path=self.database)
+        # The first and the last of the user's own commands, looked up by rowid
+        first = next(iter(saved_commands.iter_commands(limit=1)), None)
+        last = next(iter(saved_commands.iter_commands(before_id=sys.maxsize, limit=1)), None)
+        if first is None or last is None:
+            return 'a saved Command ID, see {}.'.format(mo_scm.key)
+        return 'a Command ID from {} to {}, see {}.'.format(first[0], last[0], mo_scm.key)
@@ -0,0 +1,137 @@
+import atexit
+import logging
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.execution_stats import ExecutionStats
+from command_saver.storage.backends import Backends
+from command_saver.errors.sql_err import SQL_err
+from command_saver.constants import database_path, execution_history_count
+
+
+class Executions:
+    """
+    Append-only log of executed commands: saved commands and text written directly for the terminal.
+    Each execution keeps its start time, duration, exit code, CPU time, peak memory, directory and user.
+    Executions are kept in memory while the command runs and written afterwards in one transaction,
+    which also adds them to the commands' popularity (times_called).
+    Launching a command therefore never waits for the disk.
+    """
+    # Executions not written yet, keyed by the database path: lists of executions table rows
+    pending = {}
+
+    @classmethod
+    def record(cls, stats: ExecutionStats, database_path: str = database_path):
+        """
+        Notes a finished execution in memory. Nothing is written until flush.
+        Args:
+            stats: measurement of the execution.
+            database_path: database of the command.
+
+        """
+        cls.pending.setdefault(database_path, []).append(stats.as_row())
+
+    @classmethod
+    def flush(cls, database_path: str = database_path):
+        """
+        Writes the pending executions of the database and adds them to the commands' popularity,
+        all in one transaction. If it fails, they stay pending and are written by the next flush.
+        Args:
+            database_path: database to write to.
+
+        Returns: number of executions written.
+
+        """
+        # Nothing to write
+        executions = cls.pending.get(database_path)
+        if not executions:
+            return 0
+        # Write them through the sql error checker, which retries while another terminal holds the lock
+        written = SQL_err.sql_confirmation_2args(method_description='save the executed commands.',
+                                                 method=cls.__flush_method,
+                                                 arg1=database_path,
+                                                 arg2=list(executions))
+        if written is None:
+            return 0
+        # Forget what has been written
+        del executions[:written]
+        return written
+
+    @staticmethod
+    def __flush_method(database_path: str, executions: list):
+        """
+        Appends executions to the log and adds them to the popularity of the commands.
+        Args:
+            database_path: database to write to.
+            executions: list of executions table rows.
+
+        Returns: number of executions written.
+
+        """
+        # Count the executions of each saved command
+        times_called = {}
+        for execution in executions:
+            if execution['num_row'] is not None:
+                times_called[execution['num_row']] = times_called.get(execution['num_row'], 0) + 1
+        # Write the log and the counters as one unit of work. The user is read by SQLite while inserting.
+        with ConnectionManager.transaction(database_path) as cur:
+            cur.executemany("INSERT INTO executions (num_row, command_text, timestamp_when_called, duration_ms, "
+                            "exit_code, user_time_ms, system_time_ms, max_rss_kb, cwd, username) "
+                            "VALUES (:num_row, :command_text, :timestamp_when_called, :duration_ms, "
+                            ":exit_code, :user_time_ms, :system_time_ms, :max_rss_kb, :cwd, "
+                            "(SELECT username FROM user_data ORDER BY user_data_id LIMIT 1))", executions)
+            # The popularity is kept by the store of the saved commands, which joins this unit of work if it is SQLite
+            if times_called:
+                Backends.open(database_path).add_calls(times_called)
+        logging.info("Saved {} executed command(s) to {}.".format(len(executions), database_path))
+        return len(executions)
+
+    @classmethod
+    def history(cls, command_id: int, database_path: str = database_path, limit: int = execution_history_count):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            command_id: ID of the saved command.
+            database_path: database of the command.
+            limit: maximum number of executions.
+
+        Returns: a list of the latest executions of the command, newest first.
+
+        """
+        # Executions still in memory belong to the history too
+        cls.flush(database_path)
+        msg = 'fetch the execution history of command {}'.format(command_id)
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        return SQL_err.sql_confirmation_2args(method_description=msg,
+                                              method=cls.__history_method,
+                                              arg1=database_path,
+                                              arg2=(int(command_id), int(limit)))
+
+    @staticmethod
+    def __history_method(database_path: str, command_id_and_limit: tuple):
+        """
+        Fetches the latest executions of a saved command.
+        Args:
+            database_path: database of the command.
+            command_id_and_limit: ID of the saved command and maximum number of executions.
+
+        Returns: a list of (start timestamp, duration, exit code, user CPU time, system CPU time,
+        peak memory, directory, user), newest first.
+
+        """
+        con = ConnectionManager.connect(database_path)
+        return con.execute("SELECT timestamp_when_called, duration_ms, exit_code, user_time_ms, system_time_ms, "
+                           "max_rss_kb, cwd, username FROM executions WHERE num_row = ? "
+                           "ORDER BY execution_id DESC LIMIT ?", command_id_and_limit).fetchall()
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Writes the pending executions of every database. Called when the program exits.
+
+        """
+        for path in list(cls.pending):
+            cls.flush(path)
+
+
+# Write what is still pending before the shared connections are closed
+# (exit functions run in reverse order of registration)
+atexit.register(Executions.flush_all)
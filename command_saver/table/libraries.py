@@ -0,0 +1,234 @@
+import re
+import time
+import logging
+from os import path
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.query_cache import QueryCache
+from command_saver.utils.fuzzy_finder import FuzzyFinder
+from command_saver.visual_design.formatter import StringFormatter
+from command_saver.errors.sql_err import SQL_err
+from command_saver.errors.err import Err
+from command_saver.constants import (
+    database_path,
+    library_alias_pattern,
+    library_id_separator,
+    reserved_library_aliases
+)
+from command_saver.string_templates.logging_str import *
+
+
+class Libraries:
+    """
+    Manages the shared libraries: other CommandSaver databases, e.g. a team library, that are attached
+    to the user's own database, so one query reads the commands of all of them.
+    Library commands have IDs named after their library, e.g. team:42.
+    """
+    # Libraries checked since they were attached, keyed by (database path, alias, library path):
+    # True if the library has a search index
+    checked = {}
+
+    def __init__(self,
+                 database_path: str = database_path,
+                 ):
+        """
+        Manages the libraries of a database.
+        Args:
+            database_path: database the libraries are attached to.
+        """
+        self.database = database_path
+        # Try to connect to database
+        try:
+            # Borrow the shared connection with SQL
+            self.con = ConnectionManager.connect(self.database)
+            # Allows to navigate in SQL
+            self.cur = self.con.cursor()
+        # Except it if database path is not found
+        except FileNotFoundError as e:
+            Err(error=e, action="locate the database at expected location").error()
+            # Create a new database in the expected location
+            DefaultDatabase().create_default_database()
+
+    def commit_and_close_database(self):
+        """
+        Commits the changes and closes the cursor. The shared connection stays open.
+
+        """
+        # commit the command
+        ConnectionManager.commit(self.database)
+        # close the cursor
+        self.cur.close()
+
+    @staticmethod
+    def is_valid_alias(alias: str):
+        """
+        Checks whether a name can be used for a library.
+        Args:
+            alias: name to check.
+
+        Returns: True or False
+
+        """
+        return re.fullmatch(library_alias_pattern, str(alias)) is not None and alias not in reserved_library_aliases
+
+    @staticmethod
+    def library_id(alias: str, command_id: int):
+        """
+        Names a command of a library.
+        Args:
+            alias: name of the library.
+            command_id: ID of the command in the library's database.
+
+        Returns: the command ID with the library name, e.g. team:42.
+
+        """
+        return '{}{}{}'.format(alias, library_id_separator, command_id)
+
+    @staticmethod
+    def split_id(command_id):
+        """
+        Splits a command ID into its library name and its ID in that library.
+        Args:
+            command_id: ID of the command, e.g. 42 for the user's own commands or team:42.
+
+        Returns: (library name, or None for the user's own commands, ID as a number).
+        Raises ValueError if the ID is not valid.
+
+        """
+        # The user's own commands have plain numbers
+        if library_id_separator not in str(command_id):
+            return None, int(command_id)
+        # Library commands have the library name in front
+        alias, _, number = str(command_id).partition(library_id_separator)
+        if not Libraries.is_valid_alias(alias):
+            raise ValueError("No library can be named {}".format(alias))
+        return alias, int(number)
+
+    def registered(self):
+        """
+        Calls the method through sql error checker and step logger.
+        Returns: a list of (library name, database path), read from the cache while nothing has changed.
+
+        """
+        msg = 'fetch the shared libraries.'
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        return QueryCache.get(self.database, 'libraries',
+                              lambda: SQL_err.sql_confirmation(method_description=msg,
+                                                               method=self.__registered_method))
+
+    def __registered_method(self):
+        """
+        Fetches the shared libraries.
+        Returns: a list of (library name, database path), ordered by name.
+
+        """
+        self.cur.execute("SELECT alias, library_path FROM libraries ORDER BY alias")
+        return list(self.cur.fetchall())
+
+    def attach(self):
+        """
+        Attaches every shared library to the shared connection. Libraries that are attached already are kept,
+        libraries whose file is missing or is not a CommandSaver database are skipped.
+        Returns: a list of (library name, True if it can be searched) of the attached libraries.
+
+        """
+        attached = []
+        for alias, library_path in self.registered() or []:
+            # Never put a name that is not a valid library name into SQL
+            if not self.is_valid_alias(alias):
+                logging.warning(LIBRARY_SKIPPED_TEMPLATE.format(alias, library_path, 'the name is not valid'))
+                continue
+            # Attaching a missing file would create an empty database
+            if not path.isfile(library_path):
+                logging.warning(LIBRARY_SKIPPED_TEMPLATE.format(alias, library_path, 'the file is missing'))
+                continue
+            if not ConnectionManager.attach(self.database, alias, library_path):
+                logging.warning(LIBRARY_SKIPPED_TEMPLATE.format(
+                    alias, library_path, 'a unit of work is open, the library must be attached before it starts'))
+                continue
+            # Check the tables of a newly attached library once
+            key = (self.database, alias, library_path)
+            if key not in self.checked:
+                self.cur.execute('SELECT name FROM "{}".sqlite_master WHERE name IN '
+                                 '(\'saved_commands\', \'saved_commands_search\')'.format(alias))
+                tables = [row[0] for row in self.cur.fetchall()]
+                if 'saved_commands' not in tables:
+                    logging.warning(LIBRARY_SKIPPED_TEMPLATE.format(alias, library_path, 'it has no saved commands'))
+                    ConnectionManager.detach(self.database, alias)
+                    continue
+                self.checked[key] = 'saved_commands_search' in tables
+            attached.append((alias, self.checked[key]))
+        return attached
+
+    def add_library(self, alias: str, library_path: str):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            alias: name of the library, used in front of its command IDs.
+            library_path: CommandSaver database of the library.
+
+        """
+        # Check the name and the file first
+        library_path = path.abspath(path.expanduser(str(library_path)))
+        if not self.is_valid_alias(alias):
+            StringFormatter(text_to_format='Error! Library names use lowercase letters, digits and _, '
+                                           'and start with a letter.').print_red_bold()
+            return
+        if not path.isfile(library_path):
+            StringFormatter(text_to_format='Error! Library database {} not found.'.format(library_path)).print_red_bold()
+            return
+        msg = 'add the shared library {} at {}'.format(alias, library_path)
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        SQL_err.sql_confirmation_2args(method_description=msg,
+                                       method=self.__add_library_method,
+                                       arg1=alias,
+                                       arg2=library_path)
+
+    def __add_library_method(self, alias: str, library_path: str):
+        """
+        Adds a shared library, or moves an existing one to another database.
+        Args:
+            alias: name of the library.
+            library_path: CommandSaver database of the library.
+
+        """
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("INSERT OR REPLACE INTO libraries (alias, library_path, timestamp_when_added) "
+                        "VALUES (?, ?, ?)", (alias, library_path, int(time.time() * 1000)))
+        # The fuzzy finder index is built again with the library's commands
+        FuzzyFinder.forget(self.database)
+        # Let the user know that it has been a success
+        StringFormatter(text_to_format='Success! Library {} added, its commands are named {}.'.format(
+            alias, self.library_id(alias, 'ID'))).print_green_bold()
+
+    def remove_library(self, alias: str):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            alias: name of the library to remove. Its database is not changed.
+
+        """
+        msg = 'remove the shared library {}'.format(alias)
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        SQL_err.sql_confirmation_2args(method_description=msg,
+                                       method=self.__remove_library_method,
+                                       arg1=alias)
+
+    def __remove_library_method(self, alias: str, arg2):
+        """
+        Removes a shared library and detaches it.
+        Args:
+            alias: name of the library.
+            arg2: argument needed for the SQL checker. Does nothing.
+
+        """
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("DELETE FROM libraries WHERE alias = ?", (alias,))
+            removed = cur.rowcount > 0
+        # Detach it, so its commands are not shown or found any more
+        ConnectionManager.detach(self.database, alias)
+        FuzzyFinder.forget(self.database)
+        if removed:
+            StringFormatter(text_to_format='Success! Library {} removed.'.format(alias)).print_green_bold()
+        else:
+            StringFormatter(text_to_format='Error! Library {} not found.'.format(alias)).print_red_bold()
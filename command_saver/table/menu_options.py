@@ -1,5 +1,6 @@
-import sqlite3
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.query_cache import QueryCache
 from command_saver.errors.sql_err import SQL_err
 from command_saver.constants import database_path
 from command_saver.string_templates.error_str import *
@@ -20,8 +21,8 @@ class MenuOptions:
         self.database = database_path
         # Try to connect to database
         try:
-            # Open connection with SQL
-            self.con = sqlite3.connect(self.database)
+            # Borrow the shared connection with SQL
+            self.con = ConnectionManager.connect(self.database)
             # Allows to navigate in SQL
             self.cur = self.con.cursor()
         # Except it if database path is not found
@@ -32,13 +33,13 @@ class MenuOptions:
 
     def commit_and_close_database(self):
         """
-        Commits and closes the database.
+        Commits the changes and closes the cursor. The shared connection stays open.
 
         """
         # commit the command
-        self.con.commit()
-        # close the connection
-        self.con.close()
+        ConnectionManager.commit(self.database)
+        # close the cursor
+        self.cur.close()
 
     def view_options(self):
         """
@@ -47,9 +48,11 @@ class MenuOptions:
         # Prepare a message to log
         msg = "Trying to fetch all menu options from menu options table."
         # Pass the method to the error checker. This way it only executes when the other function calls it.
-        list_all_options = SQL_err.sql_confirmation(method_description=msg,
-                                                    method=self.__view_options_method,
-                                                    )
+        # The list is read from the cache while the database has not changed.
+        list_all_options = QueryCache.get(self.database, 'view_options',
+                                          lambda: SQL_err.sql_confirmation(method_description=msg,
+                                                                           method=self.__view_options_method,
+                                                                           ))
         # return a list of menu options
         return list_all_options
 
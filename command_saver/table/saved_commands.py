@@ -1,11 +1,18 @@
-import os
+import heapq
 import sqlite3
-import time
 import logging
-from datetime import date
 from command_saver.input_window.input_window import InputWindow
 from command_saver.table.user_data import UserData
+from command_saver.table.executions import Executions
+from command_saver.table.libraries import Libraries
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.query_cache import QueryCache
+from command_saver.utils.command_runner import CommandRunner
+from command_saver.utils.parallel_runner import ParallelRunner
+from command_saver.utils.command_template import CommandTemplate
+from command_saver.utils.fuzzy_finder import FuzzyFinder
+from command_saver.storage.backends import Backends
 from command_saver.visual_design.formatter import StringFormatter
 from command_saver.errors.sql_err import SQL_err
 from command_saver.errors.err import Err
@@ -13,6 +20,12 @@ from command_saver.constants import (
     database_path,
     disposition_path,
     mo_t,
+    recent_commands_count,
+    popular_commands_count,
+    parallel_jobs,
+    fan_out_flush_size,
+    fan_out_values_shown,
+    command_failed_status,
     soft_yes_no,
     valid_no,
     valid_yes,
@@ -43,11 +56,13 @@ class SavedCommands:
         self.command_id = command_id
         self.database = database_path
         self.option = option
+        # Store of the saved commands, chosen with storage_backend
+        self.backend = Backends.open(self.database)
         try:
-            self.con = sqlite3.connect(self.database)
+            # Borrow the shared connection instead of opening a new one
+            self.con = ConnectionManager.connect(self.database)
             if self.con is None:
-                Err(error="Connection failed, connection is None. Database loc: {}".format(self.database),
-                    msg="connect to the database").error()
+                Err(error="Connection failed, connection is None. Database loc: {}".format(self.database), action="connect to the database").error()
             self.cur = self.con.cursor()
         except FileNotFoundError as e:
             Err(error=e, action="locate the database at expected location").error()
@@ -61,13 +76,14 @@ class SavedCommands:
 
     def commit_and_close_database(self):
         """
-        Commits and closes the database opened by the class.
+        Commits the changes and closes the cursor opened by the class.
+        The shared connection stays open for the rest of the session.
 
         """
         # Commit the command
-        self.con.commit()
-        # Close the connection
-        self.con.close()
+        ConnectionManager.commit(self.database)
+        # Close the cursor
+        self.cur.close()
 
     def print_row_ids(self):
         self.cur.execute(
@@ -86,20 +102,33 @@ class SavedCommands:
         print(list_all_tables)
         self.commit_and_close_database()
 
+    def __read(self, query_name: str, msg: str, method):
+        """
+        Runs a read through the sql error checker and step logger. Results of the SQLite backend
+        are read from the cache while the database has not changed.
+        Args:
+            query_name: name of the read in the cache.
+            msg: description of the read for the logs.
+            method: function doing the read.
+
+        Returns: result of the read.
+
+        """
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        def load():
+            return SQL_err.sql_confirmation(method_description=msg, method=method)
+        if not self.backend.cacheable:
+            return load()
+        return QueryCache.get(self.database, query_name, load)
+
     def __view_all_saved_commands_method(self):
         """
-        Fetches all saved commands from the database.
+        Fetches all saved commands, also those of the shared libraries.
         Returns: a list of all saved commands from the database.
 
         """
-        # Select all saved entities in the table
-        self.cur.execute(
-            "SELECT num_row, command_description, saved_command "
-            "FROM saved_commands "
-            "ORDER BY num_row"
-        )
         # Fetch the command list
-        list_all_commands = list(self.cur.fetchall())
+        list_all_commands = list(self.backend.all_commands())
         # Commit and close the database
         self.commit_and_close_database()
         # return the command list
@@ -111,93 +140,187 @@ class SavedCommands:
 
         """
         msg = f'Trying to fetch all saved commands .'
-        # Pass the method to the error checker. This way it only executes when the other function calls it.
-        list_all_commands = SQL_err.sql_confirmation(method_description=msg,
-                                                     method=self.__view_all_saved_commands_method,
-                                                     )
+        list_all_commands = self.__read('view_all_saved_commands', msg, self.__view_all_saved_commands_method)
         return list_all_commands
 
+    def iter_commands(self, after_id=None, limit: int = None, before_id=None):
+        """
+        Streams saved commands in ID order: the user's own commands first, then every shared library's.
+        Pages are found by the ID they start after (keyset pagination), so the SQLite backend jumps straight
+        to them through the rowid, and rows are fetched fetch_batch_size at a time, so only one batch is in memory.
+        Args:
+            after_id: start after this command ID, None to start from the first command.
+            limit: maximum number of commands, None for all.
+            before_id: go backwards from this command ID instead, nearest first (for the previous page).
+
+        Returns: a generator of (command ID, description, terminal command).
+
+        """
+        msg = 'stream saved commands after {} before {}'.format(after_id, before_id)
+        # Start the lookup through the error checker, then read the rows while they are used
+        rows = SQL_err.sql_confirmation_2args(method_description=msg,
+                                              method=self.__iter_commands_method,
+                                              arg1=(after_id, before_id),
+                                              arg2=limit)
+        if rows is None:
+            return
+        yield from rows
+
+    def __iter_commands_method(self, after_and_before: tuple, limit: int):
+        """
+        Starts the lookup of one page of saved commands.
+        Args:
+            after_and_before: (ID to start after, ID to go backwards from), both None for the first page.
+            limit: maximum number of commands, None for all.
+
+        Returns: an iterable of the commands of the page.
+
+        """
+        after_id, before_id = after_and_before
+        return self.backend.iter_commands(after_id=after_id, before_id=before_id, limit=limit)
+
     def recent_commands_list(self):
+        """
+        Calls the method through sql error checker and step logger.
+        Returns: a list of recently used commands.
+
+        """
+        recent_commands_list = self.__read('recent_commands_list', 'fetch the recent and popular commands.',
+                                           self.__recent_commands_list_method)
+        # return the command list
+        return recent_commands_list
+
+    def __recent_commands_list_method(self):
         """
         Orders the top three most recent saved commands and top eight most popular saved commands
-        into a list of firstly, three most recent, then secondly, five most popular, without duplication.
+        into a list of firstly, three most recent, then secondly, the most popular, without duplication.
+        The SQLite backend reads both top lists from their indexes, also in every shared library,
+        so this takes the same time for any number of saved commands.
         Returns: a list of recently used commands.
 
         """
-        # Fetch top 3 latest records
-        t3l = self.__fetch_top_three_recent()
-        # Fetch top 8 most popular records
-        t8l = self.__fetch_top_eight_frequent()
-        recent_commands_list = []
-        # Add all recent commands
-        for i in range(len(t3l)):
-            recent_commands_list.append(t3l[i])
-        # Add popular commands, but not the ones that are also recent
-        # because they have already been added.
-        # for item in the range of 8 commands or max available
-        # if 7 is more than length of command list
-        if 7 >= len(t8l) - 1:
-            # use shorter length
-            r = len(t8l) - 1
-        # else
-        else:
-            # use max length for list to be shown (8 entities)
-            r = 7
-        for i in range(r):
-            # if command is already in the list
-            if t8l[i] in recent_commands_list:
-                # look at the next command
-                continue
-            # otherwise (not in the list)
-            else:
-                # add it to the list
-                recent_commands_list.append(t8l[i])
+        # fetch the commands
+        recent_commands_list = list(self.backend.recent_and_popular(recent_commands_count, popular_commands_count))
+        logging.info(
+            "Fetched the recent and popular commands from the database. The results: \n{}".format(recent_commands_list))
         # return the command list
         return recent_commands_list
 
+    def search_commands(self, query: str):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            query: text to look for in command descriptions and commands.
+
+        Returns: a list of the best matching commands.
+
+        """
+        msg = f'search saved commands for: {query}'
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        found_commands = SQL_err.sql_confirmation_2args(method_description=msg,
+                                                        method=self.__search_commands_method,
+                                                        arg1=query)
+        return found_commands
+
+    def __search_commands_method(self, query: str, arg2):
+        """
+        Looks up the query in the saved commands. The SQLite backend uses the full-text search index
+        of the user's own database and of every shared library, ranking the results together by relevance (BM25).
+        Matched words are wrapped in search_highlight_start and search_highlight_end.
+        Args:
+            query: text to look for. Every word must match, the last letters may be missing.
+            arg2: argument needed for the SQL checker. Does nothing.
+
+        Returns: a list of (command ID, highlighted description, highlighted command snippet).
+
+        """
+        # Look up the query and fetch the results
+        found_commands = list(self.backend.search_commands(query))
+        # return the results
+        return found_commands
+
+    def fuzzy_find_commands(self, query: str):
+        """
+        Finds commands whose description or command contains the letters of the query in order,
+        e.g. "gtlg" finds "Git log". Uses the in-memory index, which is built on first use
+        and kept up to date when commands are added, edited or deleted.
+        Args:
+            query: letters to look for.
+
+        Returns: a list of (command ID, highlighted description, highlighted command), best matches first.
+
+        """
+        # Borrow the index of this database, streaming the commands into it only the first time
+        index = FuzzyFinder.for_database(self.database, self.iter_commands)
+        # and look up the query in memory
+        return index.search(query)
+
     def find_command(self, command_id: int = None):
         """
         Finds a command in the saved commands database table.
         Args:
             command_id: command's id to look for.
 
-        Returns: The value of the command - text that is executed in the terminal.
+        Returns: The value of the command - text that is executed in the terminal, or None if it is not found.
 
         """
         # By default, look for the tag defined in the class,
         # but method can be used for other tags as well
         if command_id is None:
             command_id = self.command_id
-        else:
-            command_id = command_id
         # Try to fetch the command
         try:
-            # fetch the tag
-            self.cur.execute(
-                "SELECT saved_command FROM saved_commands WHERE num_row LIKE ?", (self.command_id,))
-            # return the tag in the format of a basic string
-            command = ''.join(self.cur.fetchone())
-            return command
-        # if command was not found
-        except TypeError as e:
-            # Call the error manager
-            Err(error=e, msg='locate the Command ID').error()
-            return None
+            # fetch the tag by its exact ID, in the user's own commands or in the library named in the ID
+            row = self.backend.full_command(command_id)
+            # if command was not found
+            if row is None:
+                StringFormatter(text_to_format='Error! Command ID {} not found.'.format(command_id)).print_red_bold()
+                return None
+            # return the terminal command
+            return str(row[2])
+        # if the ID is not a number
         except ValueError as e:
             # Call the error manager
-            Err(error=e, msg='locate the Command ID').error()
+            Err(error=e, action='locate the Command ID {}'.format(command_id)).error()
             return None
         # if sqlite happened to run into problems
-        except KeyError as e:
-            msg = "locate the Command ID {}".format(command_id)
-            Err(error=e,  msg=msg).error()
         except sqlite3.Error as e:
             # Prepare message for the error
             msg = 'access SQLite, err: %s' % (' '.join(e.args))
             # Call the error manager
-            Err(error=e, msg=msg).error()
+            Err(error=e, action=msg).error()
             return None
 
+    def find_commands(self, command_ids: list):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            command_ids: IDs of the commands to look for.
+
+        Returns: a dictionary of (command ID, description, terminal command) keyed by command ID.
+        IDs that are not found are left out.
+
+        """
+        msg = 'find {} commands by their IDs'.format(len(command_ids))
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        found_commands = SQL_err.sql_confirmation_2args(method_description=msg,
+                                                        method=self.__find_commands_method,
+                                                        arg1=command_ids)
+        return found_commands
+
+    def __find_commands_method(self, command_ids: list, arg2):
+        """
+        Looks up many commands at once, also in the shared libraries. The SQLite backend does it in one query
+        whose statement is the same for any number of IDs, so it stays in the statement cache.
+        Args:
+            command_ids: IDs of the commands to look for.
+            arg2: argument needed for the SQL checker. Does nothing.
+
+        Returns: a dictionary of (command ID, description, terminal command) keyed by command ID.
+
+        """
+        return self.backend.find_commands(command_ids)
+
     def __risky_action_confirmation(self, action_name: str, action):
         """
         Takes action and asks user to confirm action, which then is found and actioned.
@@ -206,6 +329,11 @@ class SavedCommands:
             action: a function that will be executed. Takes "command" as an argument.
             Catches SQL exceptions from this action.
         """
+        # Commands of shared libraries are only changed in their own database
+        if Libraries.split_id(self.command_id)[0] is not None:
+            StringFormatter(text_to_format='Error! Command {} belongs to a shared library and cannot be changed '
+                                           'here.'.format(self.command_id)).print_red_bold()
+            return ValueError
         # Look for the command in the database
         command = self.find_command()
         # If None has been returned, command not found
@@ -232,7 +360,7 @@ class SavedCommands:
                     msg = "process {} request with command ID {}".format(
                         action_name, self.command_id)
                     # Call the error manager
-                    Err(error=e, msg=msg).error()
+                    Err(error=e, action=msg).error()
             # If they choose not to delete the command,
             if confirmation in valid_no:
                 print("{} command stopped.".format(action_name))
@@ -260,22 +388,14 @@ class SavedCommands:
             command: the terminal command being deleted.
 
         """
-        # Delete the command in the database
-        self.cur.execute(
-            "DELETE FROM saved_commands WHERE num_row=?", (
-                self.command_id,
-            )
-        )
-        # Update num_row values for remaining rows
-        self.cur.execute(
-            "UPDATE saved_commands SET num_row = num_row - 1 WHERE num_row > ?", (
-                self.command_id,
-            )
-        )
-        # Commit the transaction to apply the changes and release the lock
-        self.con.commit()
-        # Execute the VACUUM command to optimize the database (and reset rows)
-        self.cur.execute("VACUUM")
+        # Delete the command, committed at once to apply the changes and release the lock.
+        # Command IDs are never renumbered, so only this one command is touched
+        # and the other IDs keep pointing to the same commands.
+        self.backend.delete_command(self.command_id)
+        # Remove the command from the fuzzy finder index
+        FuzzyFinder.command_deleted(self.database, int(self.command_id))
+        # Free space is given back later by the maintenance at the end of the session,
+        # not here, so the delete does not have to rewrite the database file.
         # Commit delete and close the database
         self.commit_and_close_database()
         # Let the user know that the update has been a success.
@@ -284,44 +404,196 @@ class SavedCommands:
 
     def execute_command(self,
                         text_to_terminal=False,
-                        text_for_terminal=None):
+                        text_for_terminal=None,
+                        values: dict = None):
         """
         Executes saved commands.
-        Returns: os call with the command or None: command not found.
+        Args:
+            text_to_terminal: run text_for_terminal instead of a saved command.
+            text_for_terminal: text for the terminal.
+            values: values of the saved command's placeholders, e.g. {'ns': 'prod'} for {ns}.
+
+        Returns: CommandResult of the run, ValueError: command not found,
+        or None: the command could not be started, e.g. a placeholder has no value.
 
         """
         if text_to_terminal:
             try:
                 logging.info(
                     TEXT_IN_TERMINAL_TEMPLATE.format(text_for_terminal))
-                # Run the command in the terminal
+                # Run the command in the terminal, measuring it
                 print("----Terminal----")
-                return os.system(str(text_for_terminal))
+                result = CommandRunner().run(str(text_for_terminal))
+                # Now that the command has returned, save the execution
+                Executions.record(stats=result.stats, database_path=self.database)
+                Executions.flush(database_path=self.database)
+                return result
             except OSError as e:
-                Err(error=e, msg="execute the command").error()
+                Err(error=e, action="execute the command").error()
+                return None
         # Look for the command in the database
         command_to_execute = self.find_command()
         # If None has been returned, command not found
         if command_to_execute is None:
             # Return to main menu with ValueError and ask user there to try again
             return ValueError
+        # Fill the placeholders, if the command has any
+        try:
+            command_to_execute = CommandTemplate.compile(command_to_execute).fill(values or {})
+        except ValueError as e:
+            StringFormatter(text_to_format='Error! {}.'.format(e)).print_red_bold()
+            return None
         else:
             # try to execute the command
             try:
-                logging.info(
-                    "Trying to update popularity and to execute a command.")
-                # Update how many times the command has been called
-                self.__update_popularity()
-                # Save data and close the database.
+                logging.info("Trying to execute a command.")
+                # Close the database cursor. Nothing is written before the command starts.
                 self.commit_and_close_database()
-                # Run the command in the terminal
+                # Run the command in the terminal, measuring it
                 print("----Terminal----")
-                return os.system(command_to_execute)
-            # except if something goes wrong with OS or sqlite
-            except sqlite3.Error as e:
-                Err(error=e, msg="update the command's popularity").error()
+                # Executions of library commands are logged, but only the user's own commands count their popularity
+                alias, num_row = Libraries.split_id(self.command_id)
+                result = CommandRunner().run(command_to_execute, command_id=num_row if alias is None else None)
+                # Now that the command has returned, save the execution and the command's popularity
+                Executions.record(stats=result.stats, database_path=self.database)
+                Executions.flush(database_path=self.database)
+                return result
+            # except if something goes wrong with OS
             except OSError as e:
-                Err(error=e, msg="execute the command in terminal using os.system").error()
+                Err(error=e, action="execute the command in terminal").error()
+                return None
+
+    def commands_to_run(self, command_ids: list, values: dict = None):
+        """
+        Looks up the commands to run together, in one query, and fills their placeholders.
+        Args:
+            command_ids: IDs of the commands.
+            values: values of the commands' placeholders, e.g. {'ns': 'prod'} for {ns}.
+
+        Returns: list of (command ID, description, text for the terminal, ID its execution is saved for or None),
+        ValueError: a command was not found, or None: a placeholder has no value. The user has been told.
+
+        """
+        found = self.find_commands(command_ids) or {}
+        commands = []
+        for command_id in command_ids:
+            try:
+                alias, num_row = Libraries.split_id(command_id)
+            except ValueError:
+                alias, num_row = None, None
+            # IDs are found as numbers, or with their library's name
+            key = num_row if alias is None else Libraries.library_id(alias, num_row)
+            if key not in found:
+                StringFormatter(text_to_format='Error! Command ID {} not found.'.format(command_id)).print_red_bold()
+                return ValueError
+            try:
+                command = CommandTemplate.compile(found[key][2]).fill(values or {})
+            except ValueError as e:
+                StringFormatter(text_to_format='Error! Command ID {}: {}.'.format(command_id, e)).print_red_bold()
+                return None
+            # Only the user's own commands count their popularity
+            commands.append((key, found[key][1], command, num_row if alias is None else None))
+        return commands
+
+    def save_executions(self, results: list):
+        """
+        Saves the executions of commands run together, and the commands' popularity, in one transaction.
+        Args:
+            results: CommandResult of every command, None for the commands that did not run.
+
+        """
+        for result in results:
+            if result is not None:
+                Executions.record(stats=result.stats, database_path=self.database)
+        Executions.flush(database_path=self.database)
+
+    def execute_commands(self, command_ids: list, jobs: int = parallel_jobs, fail_fast: bool = False,
+                         values: dict = None):
+        """
+        Executes many saved commands at the same time, their output shown line by line with their command ID.
+        Args:
+            command_ids: IDs of the commands, in the order they start.
+            jobs: number of commands run at the same time.
+            fail_fast: stop everything at the first command that fails, otherwise run them all.
+            values: values of the commands' placeholders, e.g. {'ns': 'prod'} for {ns}.
+
+        Returns: list of (command ID, description, CommandResult or None if it did not run),
+        ValueError: a command was not found, or None: a placeholder has no value. Then nothing has run.
+
+        """
+        # Look them all up in one query before anything runs
+        commands = self.commands_to_run(command_ids, values=values)
+        if commands is ValueError or commands is None:
+            return commands
+        # Close the database cursor. Nothing is written before the commands start.
+        self.commit_and_close_database()
+        results = ParallelRunner(jobs=jobs, fail_fast=fail_fast).run(
+            [(key, command, stats_id) for key, description, command, stats_id in commands])
+        # Now that they have all returned, save the executions and the commands' popularity
+        self.save_executions(results)
+        return [(key, description, result) for (key, description, command, stats_id), result in zip(commands, results)]
+
+    def execute_fan_out(self, lines, each: str = '', values: dict = None, jobs: int = parallel_jobs,
+                        fail_fast: bool = False):
+        """
+        Executes the saved command once for every value, like xargs, e.g. kubectl -n {ns} get pods for every
+        namespace of a file. Values are read as workers become free and results are counted as they come,
+        so any number of values can be given. The output is shown line by line with its value.
+        Args:
+            lines: iterable of values, one per line, e.g. an open file. Empty lines are skipped.
+            each: name of the placeholder filled by each value. If empty, the only placeholder without a value.
+            values: values of the other placeholders.
+            jobs: number of commands run at the same time.
+            fail_fast: stop everything at the first command that fails, otherwise run them all.
+
+        Returns: (number of runs and first values in input order of every result ('ok', 'failed', 'stopped',
+        'skipped'), exit status of the first run that failed or 0), ValueError: command not found,
+        or None: the placeholders are not clear. Then nothing has run.
+
+        """
+        command_to_execute = self.find_command()
+        if command_to_execute is None:
+            return ValueError
+        template = CommandTemplate.compile(command_to_execute)
+        try:
+            each = template.fan_out_name(each, values or {})
+            # Check the other placeholders before anything runs
+            template.fill(dict(values or {}, **{each: ''}))
+        except ValueError as e:
+            StringFormatter(text_to_format='Error! {}.'.format(e)).print_red_bold()
+            return None
+        alias, num_row = Libraries.split_id(self.command_id)
+        # Close the database cursor. Nothing is written before the commands start.
+        self.commit_and_close_database()
+        # The values are read only as workers become free
+        commands = ((value, template.fill(dict(values or {}, **{each: value})), num_row if alias is None else None)
+                    for value in (line.rstrip('\r\n') for line in lines) if value)
+        outcomes = {outcome: [0, []] for outcome in ['ok', 'failed', 'stopped', 'skipped']}
+        status = 0
+        for job, value, result in ParallelRunner(jobs=jobs, fail_fast=fail_fast).run_each(commands):
+            # Count the result, keeping the values of each that came first in the input, not first to finish:
+            # the heap holds the latest of the kept positions on top, so it is the one dropped
+            outcome = outcomes[ParallelRunner.outcome(result)]
+            outcome[0] += 1
+            heapq.heappush(outcome[1], (-job, value))
+            if len(outcome[1]) > fan_out_values_shown:
+                heapq.heappop(outcome[1])
+            if result is None:
+                continue
+            if status == 0 and not result.succeeded:
+                status = result.exit_status
+            # Save the executions now and then, so they are not all kept in memory
+            Executions.record(stats=result.stats, database_path=self.database)
+            if sum(count for count, shown in outcomes.values()) % fan_out_flush_size == 0:
+                Executions.flush(database_path=self.database)
+        Executions.flush(database_path=self.database)
+        # Put the kept values in the order they were given
+        for outcome in outcomes.values():
+            outcome[1] = [value for position, value in sorted(outcome[1], reverse=True)]
+        # Runs stopped before they started, e.g. by fail-fast
+        if status == 0 and outcomes['skipped'][0]:
+            status = command_failed_status
+        return outcomes, status
 
     def edit_command(self):
         """
@@ -350,10 +622,10 @@ class SavedCommands:
                                               msg_info=msg_panel,
                                               valid_answers='any_string'
                                               )
-        # Take the new table command and update the DB
+        # Take the new table command and update it with its last edited timestamp
         self.update_command(new_command=str(new_command))
-        # Update last_edited field timestamp in the database
-        self.__update_timestamp()
+        # Re-index the edited command for the fuzzy finder
+        FuzzyFinder.command_changed(self.database, int(self.command_id), str(new_command))
         # commit and close the database
         self.commit_and_close_database()
         # Let the user know that the update has been a success.
@@ -378,29 +650,23 @@ class SavedCommands:
         Adds a new command to the Saved Commands table in the database.
 
         """
-        # generate time and date
-        date_today = date.today()
-        timestamp_now = time.time()
         # get author
         open_data = UserData(database_path=self.database)
         # call find author to find the author
         author = open_data.find_author()
-        # Prepare a row to upload to the database.
-        new_command = (
-            command_description, new_command, str(
-                date_today), int(timestamp_now * 1000), 0, author,
-            int(timestamp_now * 1000))
-        # add the command to the database
-        self.cur.executemany("INSERT INTO saved_commands (command_description, saved_command, "
-                             "date_created, timestamp_when_created, times_called, author_name, last_edited)"
-                             "VALUES(?, ?, ?, ?, ?, ?, ?)", (new_command,))
+        # add the command, which is dated and given its ID by the store
+        command_id = self.backend.add_command(command_description, new_command, author)
+        # Add the command to the fuzzy finder index under its new ID
+        FuzzyFinder.command_added(self.database, command_id, command_description, new_command)
+        # Read back what has been saved, for the success message
+        saved_command = tuple(self.backend.full_command(command_id)[1:])
         # commit add and close the database
         self.commit_and_close_database()
         # Print the success message
         StringFormatter(
             f'Success! A new command added. Details: '
             f'(command_descr, command, date, timestamp, times called, author, last updated) '
-            f'{new_command} .').print_green_bold()
+            f'{saved_command} .').print_green_bold()
 
     def update_command(self, new_command):
         """
@@ -421,9 +687,9 @@ class SavedCommands:
             arg2: argument needed for the SQL checker. Does nothing.
 
         """
-        # by calling SQL with the new command and command_id
-        self.cur.execute(
-            "UPDATE saved_commands SET saved_command=? WHERE num_row=?", (new_command, self.command_id,))
+        # by calling the store with the new command and command_id, which also updates its last edited timestamp
+        logging.info(TEXT_UPDATE_TIMESTAMP_TEMPLATE.format(self.command_id))
+        self.backend.update_command(self.command_id, new_command)
 
     def export_all(self):
         """
@@ -431,8 +697,8 @@ class SavedCommands:
         Returns: a disposition document with all database commands.
 
         """
-        # Fetch existing command list
-        commands_to_save = self.view_all_saved_commands()
+        # Stream the saved commands into the file, so they are never all in memory at once
+        commands_to_save = self.iter_commands()
         # Make a file and record the data
         with open(disposition_path, 'w+') as f:
             for line in commands_to_save:
@@ -442,116 +708,20 @@ class SavedCommands:
         msg = disposition_success_str
         StringFormatter(text_to_format=msg).print_green_bold()
 
-    def __update_popularity(self):
-        """
-        Updates the command's popularity in the database.
-        """
-        # Try to increment
-        try:
-            logging.info('Trying to increment the popularity of the command.')
-            # Increment times called by one
-            self.cur.execute(
-                "UPDATE saved_commands SET times_called = times_called + 1 WHERE num_row=?", (self.command_id,))
-        # Except if an error is thrown
-        except sqlite3.Error as e:
-            Err(error=e, msg="increment popularity").error()
-
-    def __update_timestamp(self):
-        """
-        Updates command's last edited timestamp.
-        """
-        # Generate timestamp
-        timestamp_now = time.time()
-        # Try to update the timestamp
-        try:
-            # log the event
-            logging.info(
-                TEXT_UPDATE_TIMESTAMP_TEMPLATE.format(self.command_id))
-            # Do the update
-            self.cur.execute(
-                "UPDATE saved_commands SET last_edited=? WHERE num_row=?", (timestamp_now, self.command_id,))
-        # Except if an error is thrown
-        except sqlite3.Error as e:
-            # Prepare message for the error
-            msg = "update the timestamp of the command with command_id: {}".format(
-                self.command_id)
-            # Call the error manager
-            Err(error=e, msg=msg).error()
-
-    def __fetch_top_three_recent_method(self):
-        """
-        Looks at the list of saved commands and return the top 3 latest commands.
-        Returns: a list of top three commands with the most recent timestamp.
-
-        """
-        # Select all saved entities in the table, order by timestamp
-        self.cur.execute(
-            "SELECT num_row, command_description, saved_command "
-            "FROM saved_commands "
-            "ORDER BY timestamp_when_created DESC"
-        )
-        # fetch the commands
-        list_all_commands = list(self.cur.fetchall())
-        logging.info(
-            "Trying to fetch the top three latest commands from the database. The results: \n{}".format(list_all_commands))
-        # Return the commands to the user. Only top 3.
-        return list_all_commands[0:3]
-
-    def __fetch_top_three_recent(self):
-        """
-        Calls the method through sql error checker and step logger.
-
-        """
-        # Pass the method to the error checker. This way it only executes when the other function calls it.
-        list_of_commands = SQL_err.sql_confirmation(method_description='fetch top three latest commands.',
-                                                    method=self.__fetch_top_three_recent_method)
-        # return the list of commands
-        return list_of_commands
-
-    def __fetch_top_eight_frequent_method(self):
-        """
-        Looks at the list of saved commands and return the top 8 most popular commands.
-        Returns: a list of top eight commands with the highest times called count.
-
-        """
-        # Select all saved entities in the table, order by popularity
-        self.cur.execute(
-            "SELECT num_row, command_description, saved_command "
-            "FROM saved_commands "
-            "ORDER BY times_called DESC"
-        )
-        # fetch the commands
-        list_all_commands = list(self.cur.fetchall())
-        logging.info(
-            "Trying to fetch the top eight most popular commands from the database. The results: \n{}".format(list_all_commands))
-        # Return the commands to the user. Only top 8.
-        return list_all_commands[0:8]
-
-    def __fetch_top_eight_frequent(self):
-        """
-        Calls the method through sql error checker and step logger.
-
-        """
-        # Pass the method to the error checker. This way it oRotaOta-7
-        # executes when the other function calls it.
-        list_of_commands = SQL_err.sql_confirmation(method_description='fetch top eight most recent commands',
-                                                    method=self.__fetch_top_eight_frequent_method)
-        # return the list of commands
-        return list_of_commands
-
     def __fetch_one_full_command_method(self):
         """
         Fetches one saved command from the database.
         Returns: a list of all data of that saved command.
 
         """
-        # Select all saved entities in the table
-        self.cur.execute(
-            "SELECT num_row, command_description, saved_command, date_created, "
-            "timestamp_when_created, times_called, author_name, last_edited "
-            "FROM saved_commands WHERE num_row LIKE ?", (self.command_id,))
-        # Fetch the command list
-        one_full_command = list(self.cur.fetchall())
+        # Select all saved entities of the command, in the user's own commands or in its library
+        try:
+            row = self.backend.full_command(self.command_id)
+        except ValueError as e:
+            Err(error=e, action='locate the Command ID {}'.format(self.command_id)).error()
+            return []
+        # Make the command list
+        one_full_command = [] if row is None else [row]
         # Commit and close the database
         self.commit_and_close_database()
         # return the command list
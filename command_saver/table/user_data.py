@@ -1,6 +1,6 @@
-import sqlite3
 from command_saver.input_window.input_window import InputWindow
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
 from command_saver.visual_design.formatter import StringFormatter
 from command_saver.errors.sql_err import SQL_err
 from command_saver.constants import database_path, global_commands
@@ -22,8 +22,8 @@ class UserData:
         self.database = database_path
         # Try to connect to database
         try:
-            # Open connection with SQL
-            self.con = sqlite3.connect(self.database)
+            # Borrow the shared connection with SQL
+            self.con = ConnectionManager.connect(self.database)
             # Allows to navigate in SQL
             self.cur = self.con.cursor()
         # Except it if database path is not found
@@ -39,13 +39,13 @@ class UserData:
 
     def commit_and_close_database(self):
         """
-        Commits and closes the database.
+        Commits the changes and closes the cursor. The shared connection stays open.
 
         """
         # commit the command
-        self.con.commit()
-        # close the connection
-        self.con.close()
+        ConnectionManager.commit(self.database)
+        # close the cursor
+        self.cur.close()
 
     def find_author(self):
         """
@@ -96,8 +96,7 @@ class UserData:
         """
         # Find the author to edit.
         existing_author = self.find_author()
-        # Reopen the connection
-        self.con = sqlite3.connect(self.database)
+        # Open a new cursor on the shared connection
         self.cur = self.con.cursor()
         # get new author's name
         new_author = InputWindow().ask_input(msg='Please enter the new author name: ',
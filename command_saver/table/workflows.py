@@ -0,0 +1,251 @@
+import re
+import json
+import time
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.table.libraries import Libraries
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.query_cache import QueryCache
+from command_saver.utils.parallel_runner import ParallelRunner
+from command_saver.visual_design.formatter import StringFormatter
+from command_saver.errors.sql_err import SQL_err
+from command_saver.errors.err import Err
+from command_saver.constants import (
+    database_path,
+    workflow_name_pattern,
+    workflow_stage_separator,
+    workflow_jobs
+)
+
+
+class Workflows:
+    """
+    Manages the workflows: saved commands run in steps, e.g. build, then test and lint at the same time,
+    then deploy. Each step is a Command ID and waits for the steps it depends on. Steps that do not wait
+    for each other run at the same time, and the steps after a failed one are skipped.
+    """
+
+    def __init__(self,
+                 database_path: str = database_path,
+                 ):
+        """
+        Manages the workflows of a database.
+        Args:
+            database_path: database of the workflows.
+        """
+        self.database = database_path
+        # Try to connect to database
+        try:
+            # Borrow the shared connection with SQL
+            self.con = ConnectionManager.connect(self.database)
+            # Allows to navigate in SQL
+            self.cur = self.con.cursor()
+        # Except it if database path is not found
+        except FileNotFoundError as e:
+            Err(error=e, action="locate the database at expected location").error()
+            # Create a new database in the expected location
+            DefaultDatabase().create_default_database()
+
+    @staticmethod
+    def is_valid_name(name: str):
+        """
+        Checks whether a name can be used for a workflow.
+        Args:
+            name: name to check.
+
+        Returns: True or False
+
+        """
+        return re.fullmatch(workflow_name_pattern, str(name)) is not None and name != workflow_stage_separator
+
+    @staticmethod
+    def parse_stages(words: list):
+        """
+        Reads the steps of a workflow written in stages, e.g. 3 then 7 8 then 12:
+        every step of a stage waits for all the steps of the stage before.
+        Args:
+            words: Command IDs, with the stage separator between stages.
+
+        Returns: list of (Command ID, list of the Command IDs it waits for). Raises ValueError if the steps are not valid.
+
+        """
+        steps, before, stage = [], [], []
+        for word in list(words) + [workflow_stage_separator]:
+            # End of a stage
+            if word == workflow_stage_separator:
+                if not stage:
+                    raise ValueError("Every stage needs at least one Command ID")
+                steps.extend((command_id, list(before)) for command_id in stage)
+                before, stage = stage, []
+                continue
+            # Check the ID without looking it up
+            try:
+                Libraries.split_id(word)
+            except ValueError:
+                raise ValueError("{} is not a Command ID".format(word))
+            if word in stage or word in [command_id for command_id, depends_on in steps]:
+                raise ValueError("Command ID {} is more than once in the workflow".format(word))
+            stage.append(word)
+        return steps
+
+    @staticmethod
+    def stages(steps: list):
+        """
+        Groups the steps of a workflow into the stages they can run in: every step comes after the steps it waits for.
+        Args:
+            steps: list of (Command ID, list of the Command IDs it waits for).
+
+        Returns: list of stages, each a list of Command IDs.
+
+        """
+        stage_of = {}
+        for command_id, depends_on in steps:
+            stage_of[command_id] = 1 + max((stage_of.get(dependency, 0) for dependency in depends_on), default=-1)
+        stages = [[] for _ in range(max(stage_of.values(), default=-1) + 1)]
+        for command_id, stage in stage_of.items():
+            stages[stage].append(command_id)
+        return stages
+
+    def saved(self):
+        """
+        Calls the method through sql error checker and step logger.
+        Returns: a list of (workflow name, list of (Command ID, list of the Command IDs it waits for)),
+        read from the cache while nothing has changed.
+
+        """
+        msg = 'fetch the workflows.'
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        return QueryCache.get(self.database, 'workflows',
+                              lambda: SQL_err.sql_confirmation(method_description=msg,
+                                                               method=self.__saved_method))
+
+    def __saved_method(self):
+        """
+        Fetches the workflows and their steps.
+        Returns: a list of (workflow name, list of (Command ID, list of the Command IDs it waits for)), ordered by name.
+
+        """
+        self.cur.execute("SELECT workflows.workflow_name, command_id, depends_on FROM workflows "
+                         "LEFT JOIN workflow_steps USING (workflow_name) ORDER BY workflows.workflow_name, position")
+        workflows = {}
+        for name, command_id, depends_on in self.cur.fetchall():
+            steps = workflows.setdefault(name, [])
+            if command_id is not None:
+                steps.append((command_id, json.loads(depends_on)))
+        return list(workflows.items())
+
+    def save_workflow(self, name: str, words: list):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            name: name of the workflow. A workflow of the same name is replaced.
+            words: steps in stages, e.g. 3 then 7 8 then 12.
+
+        """
+        # Check the name and the steps first
+        if not self.is_valid_name(name):
+            StringFormatter(text_to_format='Error! Workflow names use lowercase letters, digits, _ and -, '
+                                           'and start with a letter.').print_red_bold()
+            return
+        try:
+            steps = self.parse_stages(words)
+        except ValueError as e:
+            StringFormatter(text_to_format='Error! {}.'.format(e)).print_red_bold()
+            return
+        # Every step must be a saved command, they are all looked up in one query
+        found = SavedCommands(database_path=self.database).find_commands(
+            [command_id for command_id, depends_on in steps]) or {}
+        for command_id, depends_on in steps:
+            alias, num_row = Libraries.split_id(command_id)
+            if (num_row if alias is None else Libraries.library_id(alias, num_row)) not in found:
+                StringFormatter(text_to_format='Error! Command ID {} not found.'.format(command_id)).print_red_bold()
+                return
+        msg = 'save the workflow {}'.format(name)
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        SQL_err.sql_confirmation_2args(method_description=msg,
+                                       method=self.__save_workflow_method,
+                                       arg1=name,
+                                       arg2=steps)
+
+    def __save_workflow_method(self, name: str, steps: list):
+        """
+        Saves a workflow, replacing the steps of a workflow of the same name.
+        Args:
+            name: name of the workflow.
+            steps: list of (Command ID, list of the Command IDs it waits for).
+
+        """
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("INSERT OR REPLACE INTO workflows (workflow_name, timestamp_when_created) VALUES (?, ?)",
+                        (name, int(time.time() * 1000)))
+            cur.execute("DELETE FROM workflow_steps WHERE workflow_name = ?", (name,))
+            cur.executemany("INSERT INTO workflow_steps (workflow_name, position, command_id, depends_on) "
+                            "VALUES (?, ?, ?, ?)",
+                            [(name, position, command_id, json.dumps(depends_on))
+                             for position, (command_id, depends_on) in enumerate(steps)])
+        # Let the user know that it has been a success
+        StringFormatter(text_to_format='Success! Workflow {} saved, run it with w {}.'.format(
+            name, name)).print_green_bold()
+
+    def remove_workflow(self, name: str):
+        """
+        Calls the method through sql error checker and step logger.
+        Args:
+            name: name of the workflow to remove. Its commands are not changed.
+
+        """
+        msg = 'remove the workflow {}'.format(name)
+        # Pass the method to the error checker. This way it only executes when the other function calls it.
+        SQL_err.sql_confirmation_2args(method_description=msg,
+                                       method=self.__remove_workflow_method,
+                                       arg1=name)
+
+    def __remove_workflow_method(self, name: str, arg2):
+        """
+        Removes a workflow and its steps.
+        Args:
+            name: name of the workflow.
+            arg2: argument needed for the SQL checker. Does nothing.
+
+        """
+        with ConnectionManager.transaction(self.database) as cur:
+            cur.execute("DELETE FROM workflow_steps WHERE workflow_name = ?", (name,))
+            cur.execute("DELETE FROM workflows WHERE workflow_name = ?", (name,))
+            removed = cur.rowcount > 0
+        if removed:
+            StringFormatter(text_to_format='Success! Workflow {} removed.'.format(name)).print_green_bold()
+        else:
+            StringFormatter(text_to_format='Error! Workflow {} not found.'.format(name)).print_red_bold()
+
+    def execute_workflow(self, name: str, jobs: int = workflow_jobs, fail_fast: bool = False, values: dict = None):
+        """
+        Executes a workflow: every step as soon as the steps it waits for have succeeded, the steps that do not
+        wait for each other at the same time. Their output is shown line by line with their command ID.
+        Args:
+            name: name of the workflow.
+            jobs: number of steps run at the same time.
+            fail_fast: stop everything at the first step that fails, otherwise only the steps after it are skipped.
+            values: values of the commands' placeholders, e.g. {'ns': 'prod'} for {ns}.
+
+        Returns: list of (command ID, description, CommandResult or None if it did not run) in the order of the steps,
+        ValueError: the workflow or a command was not found, or None: a placeholder has no value.
+        Then nothing has run.
+
+        """
+        steps = dict(self.saved() or []).get(name)
+        if not steps:
+            StringFormatter(text_to_format='Error! Workflow {} not found.'.format(name)).print_red_bold()
+            return ValueError
+        # Look up all the steps in one query before anything runs
+        saved_commands = SavedCommands(database_path=self.database)
+        command_ids = [command_id for command_id, depends_on in steps]
+        commands = saved_commands.commands_to_run(command_ids, values=values)
+        if commands is ValueError or commands is None:
+            return commands
+        saved_commands.commit_and_close_database()
+        results = ParallelRunner(jobs=jobs, fail_fast=fail_fast).run_graph(
+            [(key, command, stats_id) for key, description, command, stats_id in commands],
+            [[command_ids.index(dependency) for dependency in depends_on] for command_id, depends_on in steps])
+        # Now that they have all returned, save the executions and the commands' popularity
+        saved_commands.save_executions(results)
+        return [(key, description, result) for (key, description, command, stats_id), result in zip(commands, results)]
@@ -0,0 +1,90 @@
+import os
+import re
+import shlex
+import shutil
+from collections import OrderedDict
+from command_saver.constants import argv_cache_size
+
+# Characters that make the shell do something: pipes, lists, redirects, subshells, expansions,
+# globs, escapes, comments and history. A command with any of them, even quoted, runs in the shell.
+SHELL_CHARACTERS = set('|&;<>()$`\\*?[]{}~#!\n')
+# A variable assignment in front of the command, e.g. LANG=C sort
+ASSIGNMENT = re.compile(r'[A-Za-z_][A-Za-z0-9_]*=')
+# Words the shell runs itself, or that behave differently from the program of the same name (e.g. pwd)
+SHELL_WORDS = {
+    '.', ':', '[', '[[', 'alias', 'bg', 'break', 'builtin', 'case', 'cd', 'command', 'continue', 'declare',
+    'do', 'done', 'echo', 'elif', 'else', 'esac', 'eval', 'exec', 'exit', 'export', 'false', 'fc', 'fg', 'fi',
+    'for', 'function', 'getopts', 'hash', 'if', 'jobs', 'kill', 'let', 'local', 'printf', 'pwd', 'read',
+    'readonly', 'return', 'select', 'set', 'shift', 'source', 'test', 'then', 'time', 'times', 'trap', 'true',
+    'type', 'typeset', 'ulimit', 'umask', 'unalias', 'unset', 'until', 'wait', 'while',
+}
+
+
+class CommandAnalyzer:
+    """
+    Finds the commands that need no shell, e.g. git log --oneline, so they can be started directly
+    instead of through /bin/sh -c. Anything with shell syntax, variables, globs or shell built-ins
+    still runs in the shell. The words of every command analyzed are kept for the rest of the session.
+    """
+    # Analyzed commands, keyed by the command text: list of words, or None if the command needs the shell
+    words = OrderedDict()
+
+    @staticmethod
+    def split(command_text: str):
+        """
+        Splits a command into the words the shell would give to the program.
+        Args:
+            command_text: text for the terminal.
+
+        Returns: list of words, or None if the command needs the shell.
+
+        """
+        # Any character the shell acts on, anywhere
+        if SHELL_CHARACTERS.intersection(command_text):
+            return None
+        # Quotes are taken away exactly as the shell does, as there is nothing left to expand inside them
+        try:
+            words = shlex.split(command_text)
+        # Unbalanced quotes are the shell's to report
+        except ValueError:
+            return None
+        if not words or ASSIGNMENT.match(words[0]) or words[0] in SHELL_WORDS:
+            return None
+        return words
+
+    @classmethod
+    def argv(cls, command_text: str):
+        """
+        Returns the words of a command, splitting it only the first time it is seen in the session.
+        Args:
+            command_text: text for the terminal.
+
+        Returns: list of words, or None if the command needs the shell.
+
+        """
+        if command_text in cls.words:
+            cls.words.move_to_end(command_text)
+            return cls.words[command_text]
+        words = cls.split(command_text)
+        cls.words[command_text] = words
+        # Forget the least recently used commands
+        while len(cls.words) > argv_cache_size:
+            cls.words.popitem(last=False)
+        return words
+
+    @classmethod
+    def program(cls, command_text: str):
+        """
+        Finds the program of a command that needs no shell, in the PATH as the shell would.
+        Args:
+            command_text: text for the terminal.
+
+        Returns: path of the program, or None if the command needs the shell.
+
+        """
+        words = cls.argv(command_text)
+        if words is None:
+            return None
+        # A path is used as it is, a name is looked up in the PATH.
+        # If the program is not found, the shell reports it as usual.
+        return words[0] if os.sep in words[0] else shutil.which(words[0])
@@ -0,0 +1,233 @@
+import os
+import signal
+import subprocess
+from command_saver.utils.execution_stats import ExecutionStats
+from command_saver.utils.command_analyzer import CommandAnalyzer
+from command_saver.constants import command_shell, pipe_buffer_size, read_chunk_size
+
+# Signals sent to this process only (e.g. by kill) that are passed on to the running command.
+# SIGINT and SIGQUIT typed in the terminal already reach the command, so they are ignored here, like os.system does.
+FORWARDED_SIGNALS = ('SIGTERM', 'SIGHUP')
+IGNORED_SIGNALS = ('SIGINT', 'SIGQUIT')
+
+
+class CommandResult:
+    """
+    Result of one run of a command: its exit code, its output if it was captured, and its measurement.
+    """
+
+    def __init__(self, stats: ExecutionStats, stdout: bytes = None, stderr: bytes = None, pid: int = None):
+        """
+        Result of a finished command.
+        Args:
+            stats: measurement of the run, with the exit code.
+            stdout: captured standard output, None if it went to the terminal.
+            stderr: captured standard error, None if it went to the terminal.
+            pid: process ID the command had.
+        """
+        self.stats = stats
+        self.stdout = stdout
+        self.stderr = stderr
+        self.pid = pid
+
+    @property
+    def exit_code(self):
+        """
+        Returns: exit code of the command, or minus the signal number if a signal stopped it.
+
+        """
+        return self.stats.exit_code
+
+    @property
+    def exit_status(self):
+        """
+        Returns: exit status as a shell reports it: the exit code, or 128 + the signal number if a signal stopped it.
+
+        """
+        return 128 - self.exit_code if self.exit_code < 0 else self.exit_code
+
+    @property
+    def succeeded(self):
+        """
+        Returns: True if the command exited with code 0.
+
+        """
+        return self.exit_code == 0
+
+
+class CommandRunner:
+    """
+    Runs commands like the terminal does, with a handle on the process: its real exit code,
+    the CPU time and memory of that process alone, and, if asked, its output.
+    Commands made of plain words are started directly (see CommandAnalyzer), anything else in the shell.
+    Output is captured through non-blocking pipes with large buffers and can be streamed while the command runs.
+    """
+
+    def __init__(self, capture_output: bool = False, on_output=None, stdin=None, on_start=None,
+                 own_process_group: bool = False, keep_output: bool = True):
+        """
+        Prepares the runner.
+        Args:
+            capture_output: keep stdout and stderr instead of writing them to the terminal.
+            on_output: function called with ('stdout' or 'stderr', bytes) as soon as captured output arrives.
+            stdin: input of the command, the terminal if None (e.g. subprocess.DEVNULL for commands run side by side).
+            on_start: function called with the process ID as soon as the command has started.
+            own_process_group: run the command in a process group of its own, whose ID is its process ID,
+                so it can be stopped with everything it started. The terminal's signals then do not reach it.
+            keep_output: keep the captured output in the result. If False it only goes to on_output,
+                so commands that print a lot take no memory.
+        """
+        self.capture_output = capture_output
+        self.on_output = on_output
+        self.stdin = stdin
+        self.on_start = on_start
+        self.own_process_group = own_process_group
+        self.keep_output = keep_output
+
+    @staticmethod
+    def __enlarge_pipe(pipe):
+        """
+        Makes a pipe hold more output, so a chatty command waits less for the program to read it (Linux only).
+        Args:
+            pipe: file object of the pipe.
+
+        """
+        try:
+            import fcntl
+            fcntl.fcntl(pipe.fileno(), fcntl.F_SETPIPE_SZ, pipe_buffer_size)
+        # Not Linux, or larger than the system allows: keep the default size
+        except (ImportError, AttributeError, OSError):
+            pass
+
+    def __read_output(self, process):
+        """
+        Reads stdout and stderr of the process as output arrives, until both are closed.
+        Args:
+            process: running process.
+
+        Returns: (stdout, stderr) as bytes.
+
+        """
+        import selectors
+        output = {'stdout': [], 'stderr': []}
+        with selectors.DefaultSelector() as selector:
+            for name in output:
+                pipe = getattr(process, name)
+                self.__enlarge_pipe(pipe)
+                os.set_blocking(pipe.fileno(), False)
+                selector.register(pipe, selectors.EVENT_READ, name)
+            while selector.get_map():
+                for key, events in selector.select():
+                    try:
+                        chunk = os.read(key.fd, read_chunk_size)
+                    # Nothing more for now
+                    except BlockingIOError:
+                        continue
+                    # The command closed the pipe
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                        continue
+                    if self.keep_output:
+                        output[key.data].append(chunk)
+                    if self.on_output is not None:
+                        self.on_output(key.data, chunk)
+        return b''.join(output['stdout']), b''.join(output['stderr'])
+
+    @staticmethod
+    def __handle_signals(pid: int):
+        """
+        Sets what this process does with signals while the command runs.
+        Args:
+            pid: process ID of the command.
+
+        Returns: the previous handlers, to put back afterwards.
+
+        """
+        previous = {}
+        for name in FORWARDED_SIGNALS + IGNORED_SIGNALS:
+            if not hasattr(signal, name):
+                continue
+            signum = getattr(signal, name)
+            handler = signal.SIG_IGN if name in IGNORED_SIGNALS else \
+                lambda received, frame: CommandRunner.forward(pid, received)
+            try:
+                previous[signum] = signal.signal(signum, handler)
+            # Signal handlers can only be set by the main thread
+            except ValueError:
+                pass
+        return previous
+
+    @staticmethod
+    def forward(pid: int, signum: int, process_group: bool = False):
+        """
+        Passes a signal on to the command.
+        Args:
+            pid: process ID of the command.
+            signum: signal to pass on.
+            process_group: send it to the command's process group, i.e. also to what the command started.
+
+        """
+        try:
+            if process_group:
+                os.killpg(pid, signum)
+            else:
+                os.kill(pid, signum)
+        # The command has just finished
+        except ProcessLookupError:
+            pass
+
+    def __start(self, command_text: str):
+        """
+        Starts a command: directly if it needs no shell, otherwise in the shell.
+        Args:
+            command_text: text for the terminal.
+
+        Returns: the running process. Raises OSError if the shell cannot be started.
+
+        """
+        pipe = subprocess.PIPE if self.capture_output else None
+        # Descriptors are left open, so Python can start the program with posix_spawn instead of copying
+        # this process. Everything the program opens itself is closed in the command anyway (PEP 446).
+        program = CommandAnalyzer.program(command_text) if command_shell else None
+        if program is not None:
+            try:
+                return subprocess.Popen(CommandAnalyzer.argv(command_text), executable=program,
+                                        stdin=self.stdin, stdout=pipe, stderr=pipe, close_fds=False,
+                                        start_new_session=self.own_process_group)
+            # e.g. not executable: the shell reports it as usual
+            except OSError:
+                pass
+        return subprocess.Popen([command_shell, '-c', command_text] if command_shell else command_text,
+                                shell=not command_shell, stdin=self.stdin, stdout=pipe, stderr=pipe, close_fds=False,
+                                start_new_session=self.own_process_group)
+
+    def run(self, command_text: str, command_id: int = None):
+        """
+        Runs a command and waits for it.
+        Args:
+            command_text: text for the terminal.
+            command_id: ID of the saved command, None for text written directly for the terminal.
+
+        Returns: CommandResult. Raises OSError if the shell cannot be started.
+
+        """
+        stats = ExecutionStats(command_text=command_text, command_id=command_id).start()
+        process = self.__start(command_text)
+        if self.on_start is not None:
+            self.on_start(process.pid)
+        previous = self.__handle_signals(process.pid)
+        try:
+            stdout, stderr = self.__read_output(process) if self.capture_output else (None, None)
+            # wait4 also tells the CPU time and peak memory of this command alone
+            if hasattr(os, 'wait4'):
+                pid, status, usage = os.wait4(process.pid, 0)
+                # Let Popen know, so it does not wait for the process again
+                process.returncode = os.waitstatus_to_exitcode(status)
+            else:
+                process.wait()
+                status, usage = process.returncode, None
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        return CommandResult(stats=stats.stop(status, usage=usage), stdout=stdout, stderr=stderr, pid=process.pid)
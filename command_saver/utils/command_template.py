@@ -0,0 +1,162 @@
+import re
+import shlex
+from collections import OrderedDict
+from command_saver.constants import template_cache_size
+
+# A placeholder in a saved command, e.g. {ns}. Shell braces such as ${HOME}, {a,b} or awk '{print}' are left alone.
+PLACEHOLDER = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+# A value given on the command line, e.g. ns=prod
+VALUE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)=(.*)', re.S)
+# Options of a run over many values, and whether they are followed by a value
+FAN_OUT_OPTIONS = {'--each': 'name', '--from': 'file'}
+
+
+class CommandTemplate:
+    """
+    Saved command with placeholders, e.g. kubectl -n {ns} get pods, filled with values given on the command line.
+    Placeholders in single quotes are shell text and are not filled. Values are quoted for the shell,
+    so a value is always one word. Commands are compiled the first time they are seen in the session.
+    """
+    # Compiled commands, keyed by the command text
+    templates = OrderedDict()
+
+    def __init__(self, command_text: str):
+        """
+        Splits a command into the text around its placeholders.
+        Args:
+            command_text: text for the terminal, with placeholders.
+        """
+        # (text before the placeholder, name of the placeholder, whether it is in double quotes)
+        self.parts = []
+        literal, quote, position = [], None, 0
+        while position < len(command_text):
+            char = command_text[position]
+            placeholder = PLACEHOLDER.match(command_text, position) if quote != "'" else None
+            if placeholder is not None:
+                self.parts.append((''.join(literal), placeholder.group(1), quote == '"'))
+                literal, position = [], placeholder.end()
+                continue
+            # Escaped characters and shell variables like ${HOME} are kept as they are
+            if char == '\\' and quote != "'":
+                literal.append(command_text[position:position + 2])
+                position += 2
+                continue
+            if command_text.startswith('${', position) and quote != "'":
+                end = command_text.find('}', position)
+                end = len(command_text) if end < 0 else end + 1
+                literal.append(command_text[position:end])
+                position = end
+                continue
+            # Note where quotes open and close
+            if char in '\'"' and quote in [None, char]:
+                quote = char if quote is None else None
+            literal.append(char)
+            position += 1
+        # Text after the last placeholder
+        self.tail = ''.join(literal)
+        # Names of the placeholders, in the order they first appear
+        self.names = list(OrderedDict.fromkeys(name for text, name, in_double_quotes in self.parts))
+
+    @classmethod
+    def compile(cls, command_text: str):
+        """
+        Returns a compiled command, compiling it only the first time it is seen in the session.
+        Args:
+            command_text: text for the terminal, with placeholders.
+
+        Returns: CommandTemplate.
+
+        """
+        if command_text in cls.templates:
+            cls.templates.move_to_end(command_text)
+            return cls.templates[command_text]
+        template = cls(command_text)
+        cls.templates[command_text] = template
+        # Forget the least recently used commands
+        while len(cls.templates) > template_cache_size:
+            cls.templates.popitem(last=False)
+        return template
+
+    @staticmethod
+    def quote(value: str, in_double_quotes: bool = False):
+        """
+        Quotes a value so the shell reads it as it is.
+        Args:
+            value: value of a placeholder.
+            in_double_quotes: the placeholder is already in double quotes.
+
+        Returns: the quoted value.
+
+        """
+        if in_double_quotes:
+            return re.sub(r'([\\"$`])', r'\\\1', value)
+        return shlex.quote(value)
+
+    def fill(self, values: dict):
+        """
+        Fills the placeholders.
+        Args:
+            values: value of every placeholder, keyed by its name.
+
+        Returns: text for the terminal. Raises ValueError if a placeholder has no value.
+
+        """
+        missing = [name for name in self.names if name not in values]
+        if missing:
+            raise ValueError("No value for {}, give it as {}=value".format(
+                ', '.join('{' + name + '}' for name in missing), missing[0]))
+        return ''.join(text + self.quote(str(values[name]), in_double_quotes)
+                       for text, name, in_double_quotes in self.parts) + self.tail
+
+    @staticmethod
+    def parse_arguments(words: list):
+        """
+        Takes the values of the placeholders and the options of a run over many values out of the words
+        after the option, e.g. 12 ns=prod or 12 --each ns --from namespaces.txt --jobs 8.
+        Args:
+            words: words after the option.
+
+        Returns: (values keyed by name, name filled by each value: empty if not given and None if the command
+        runs once, file of the values or None for the standard input, the other words).
+        Raises ValueError if an option has no value.
+
+        """
+        values, options, rest = {}, {'--each': None, '--from': None}, []
+        words = list(words)
+        while words:
+            word = words.pop(0)
+            option, equals, value = word.partition('=')
+            if option in FAN_OUT_OPTIONS:
+                if not equals:
+                    if not words:
+                        raise ValueError("{} needs a {}".format(option, FAN_OUT_OPTIONS[option]))
+                    value = words.pop(0)
+                options[option] = value
+            elif VALUE.fullmatch(word):
+                values[option] = value
+            else:
+                rest.append(word)
+        # Values are read from the standard input unless a file is given
+        if options['--from'] is not None and options['--each'] is None:
+            options['--each'] = ''
+        return values, options['--each'], options['--from'], rest
+
+    def fan_out_name(self, each: str, values: dict):
+        """
+        Finds the placeholder filled by each value of a run over many values.
+        Args:
+            each: name given with --each, empty if none was given.
+            values: values given for the other placeholders.
+
+        Returns: name of the placeholder. Raises ValueError if it is not clear which one.
+
+        """
+        if each:
+            if each not in self.names:
+                raise ValueError("The command has no placeholder {}".format('{' + each + '}'))
+            return each
+        # Without a name, the only placeholder without a value is filled
+        unfilled = [name for name in self.names if name not in values]
+        if len(unfilled) != 1:
+            raise ValueError("Choose the placeholder filled by each value with --each")
+        return unfilled[0]
@@ -0,0 +1,275 @@
+import atexit
+import logging
+import sqlite3
+from os import path, makedirs
+from contextlib import contextmanager
+from command_saver.constants import (
+    database_path,
+    cached_statements,
+    concurrency_mode,
+    journal_modes,
+    busy_timeout,
+    checkpoint_every,
+    performance_profiles,
+    performance_profile
+)
+
+
+class ConnectionManager:
+    """
+    Keeps one shared SQLite connection per database file for the whole session.
+    Table classes borrow their connection from here instead of opening their own,
+    so the connection, its page cache and its prepared statements stay warm.
+    """
+    # Open connections, keyed by the database path
+    connections = {}
+    # Depth of the unit of work open on each database (0 = none open)
+    transaction_depth = {}
+    # Commits made on each database since its last checkpoint
+    commits_since_checkpoint = {}
+    # Databases attached to each connection, keyed by the database path: {alias: attached database path}
+    attached = {}
+    # Connections of a parent process, kept but never used again after a fork
+    forgotten = []
+
+    @classmethod
+    def connect(cls, database_path: str = database_path):
+        """
+        Returns the shared connection of the database, opening it on first use.
+        Args:
+            database_path: database to connect to.
+
+        Returns: sqlite3 connection shared by all table classes.
+
+        """
+        # Look for an already open connection
+        con = cls.connections.get(database_path)
+        # If there is none yet,
+        if con is None:
+            # Check if the database file still has to be created
+            is_new_database = not path.isfile(database_path) or path.getsize(database_path) == 0
+            # and make its folder, which nothing creates before the first database is
+            if is_new_database and path.dirname(database_path):
+                makedirs(path.dirname(database_path), exist_ok=True)
+            # open it, waiting for other terminals' locks and keeping the compiled statements cached for reuse
+            con = sqlite3.connect(database_path, timeout=busy_timeout, cached_statements=cached_statements)
+            # New databases keep track of their free pages, so maintenance can return them in small chunks.
+            # This has to be set before anything is written to the file.
+            if is_new_database:
+                con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # Switch the journal to the chosen concurrency mode (WAL is remembered by the database file)
+            try:
+                con.execute("PRAGMA journal_mode={}".format(journal_modes.get(concurrency_mode, 'WAL')))
+            # If another terminal holds the database right now, keep the current mode this session
+            except sqlite3.OperationalError as e:
+                logging.warning("Could not change the journal mode of {}: {}".format(database_path, e))
+            # Apply the settings of the active performance profile
+            for setting, value in performance_profiles[performance_profile].items():
+                con.execute("PRAGMA {}={}".format(setting, value))
+            # and remember it for the rest of the session
+            cls.connections[database_path] = con
+            cls.transaction_depth[database_path] = 0
+            cls.commits_since_checkpoint[database_path] = 0
+            cls.attached[database_path] = {}
+        # return the shared connection
+        return con
+
+    @classmethod
+    @contextmanager
+    def transaction(cls, database_path: str = database_path):
+        """
+        Unit of work. Yields a cursor and commits everything done with it once the block ends,
+        or rolls it all back if an error is raised. Nested units of work join the outer one.
+        Args:
+            database_path: database to work with.
+
+        Returns: sqlite3 cursor of the shared connection.
+
+        """
+        # Borrow the shared connection
+        con = cls.connect(database_path)
+        cur = con.cursor()
+        # Only the outermost unit of work opens the transaction
+        if cls.transaction_depth[database_path] == 0 and not con.in_transaction:
+            cur.execute("BEGIN")
+        cls.transaction_depth[database_path] += 1
+        try:
+            # Let the caller do the work
+            yield cur
+        # If anything went wrong, undo the whole unit of work
+        except BaseException:
+            cls.transaction_depth[database_path] -= 1
+            if cls.transaction_depth[database_path] == 0:
+                con.rollback()
+            raise
+        # Otherwise the outermost unit of work saves the changes
+        else:
+            cls.transaction_depth[database_path] -= 1
+            if cls.transaction_depth[database_path] == 0:
+                con.commit()
+                cls.__count_commit(database_path)
+        finally:
+            cur.close()
+
+    @classmethod
+    def attach(cls, database_path: str, alias: str, attached_path: str):
+        """
+        Attaches another database to the shared connection, so one query can read both.
+        Its tables are then named alias.table. SQLite does not allow attaching inside a transaction:
+        changes pending outside a unit of work are committed first, but attaching inside a unit of work is skipped,
+        so attach before the unit of work starts.
+        Args:
+            database_path: database whose connection the other database is attached to.
+            alias: schema name of the attached database.
+            attached_path: database to attach.
+
+        Returns: True if the database is attached, otherwise False.
+
+        """
+        con = cls.connect(database_path)
+        # Nothing to do if it is attached already
+        if cls.attached[database_path].get(alias) == attached_path:
+            return True
+        # Attaching is not allowed inside a transaction. A unit of work is never cut in two,
+        # but changes pending outside of one are saved first.
+        if con.in_transaction:
+            if cls.transaction_depth[database_path] > 0:
+                return False
+            cls.commit(database_path)
+        # Replace a database attached earlier under the same alias
+        if alias in cls.attached[database_path]:
+            cls.detach(database_path, alias)
+        con.execute("ATTACH DATABASE ? AS \"{}\"".format(alias), (attached_path,))
+        cls.attached[database_path][alias] = attached_path
+        return True
+
+    @classmethod
+    def detach(cls, database_path: str, alias: str):
+        """
+        Detaches a database attached to the shared connection.
+        Args:
+            database_path: database whose connection the other database is attached to.
+            alias: schema name of the attached database.
+
+        """
+        # Nothing to do if it is not attached
+        if alias not in cls.attached.get(database_path, {}):
+            return
+        # Detaching is not allowed inside a transaction either, so save anything pending first
+        cls.commit(database_path)
+        cls.connections[database_path].execute("DETACH DATABASE \"{}\"".format(alias))
+        del cls.attached[database_path][alias]
+
+    @classmethod
+    def commit(cls, database_path: str = database_path):
+        """
+        Commits the changes of the shared connection, unless a unit of work is open,
+        in which case the unit of work commits them when it ends.
+        Args:
+            database_path: database to commit.
+
+        """
+        # Nothing to commit if the connection has never been opened
+        con = cls.connections.get(database_path)
+        if con is None:
+            return
+        # Leave the commit to the open unit of work
+        if cls.transaction_depth.get(database_path, 0) > 0:
+            return
+        con.commit()
+        cls.__count_commit(database_path)
+
+    @classmethod
+    def rollback_pending(cls):
+        """
+        Rolls back the implicit transactions left open on the shared connections, so a statement
+        that failed because another terminal held the lock can be retried from a clean state.
+        Returns: False if a unit of work is open (it must not be undone halfway), otherwise True.
+
+        """
+        # A unit of work is rolled back as a whole by its own context manager
+        if any(depth > 0 for depth in cls.transaction_depth.values()):
+            return False
+        # Roll back what the table classes left uncommitted
+        for con in cls.connections.values():
+            if con.in_transaction:
+                con.rollback()
+        return True
+
+    @classmethod
+    def checkpoint(cls, database_path: str = database_path):
+        """
+        Copies the committed WAL content back into the database file without waiting for
+        readers or writers in other terminals (passive checkpoint), so the WAL file stays small.
+        Args:
+            database_path: database to checkpoint.
+
+        """
+        # Nothing to checkpoint if the connection has never been opened
+        con = cls.connections.get(database_path)
+        if con is None:
+            return
+        # Passive checkpoint never blocks the other terminals
+        con.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        # Start counting again
+        cls.commits_since_checkpoint[database_path] = 0
+
+    @classmethod
+    def __count_commit(cls, database_path: str):
+        """
+        Counts a commit and checkpoints the WAL file every checkpoint_every commits.
+        Args:
+            database_path: database that has been committed.
+
+        """
+        # Count the commit
+        cls.commits_since_checkpoint[database_path] = cls.commits_since_checkpoint.get(database_path, 0) + 1
+        # and checkpoint once enough have been made
+        if cls.commits_since_checkpoint[database_path] >= checkpoint_every:
+            cls.checkpoint(database_path)
+
+    @classmethod
+    def close(cls, database_path: str = database_path):
+        """
+        Commits and closes the shared connection of the database, e.g. before the file is deleted.
+        Args:
+            database_path: database to close.
+
+        """
+        # Forget the connection
+        con = cls.connections.pop(database_path, None)
+        cls.transaction_depth.pop(database_path, None)
+        cls.commits_since_checkpoint.pop(database_path, None)
+        cls.attached.pop(database_path, None)
+        # and close it if it was open
+        if con is not None:
+            con.commit()
+            con.close()
+
+    @classmethod
+    def forget_all(cls):
+        """
+        Forgets every shared connection without closing it, in a process forked from the one that opened them.
+        SQLite connections must not be used, or closed, by a forked process: it opens its own ones instead.
+
+        """
+        # Keep them referenced, so they are never closed by the garbage collector either
+        cls.forgotten.extend(cls.connections.values())
+        cls.connections.clear()
+        cls.transaction_depth.clear()
+        cls.commits_since_checkpoint.clear()
+        cls.attached.clear()
+
+    @classmethod
+    def close_all(cls):
+        """
+        Commits and closes every shared connection. Called when the program exits.
+
+        """
+        # Copy the keys, because closing removes them from the dictionary
+        for path in list(cls.connections):
+            cls.close(path)
+
+
+# Make sure the data is saved and the files are released when the program exits
+atexit.register(ConnectionManager.close_all)
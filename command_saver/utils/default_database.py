@@ -5,9 +5,13 @@ from pathlib import Path
 from os import remove
 from command_saver.input_window.input_window import InputWindow
 from command_saver.visual_design.formatter import StringFormatter
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.fuzzy_finder import FuzzyFinder
+from command_saver.utils.query_cache import QueryCache
 from command_saver.constants import (
-    menu_options_data,
+    menu_options_rows,
     database_path,
+    schema_version,
     valid_no,
     valid_yes
 )
@@ -63,7 +67,7 @@ class DefaultDatabase:
              self.author, int(self.timestamp_now * 1000)),
         ]
         # Menu options - these cannot be changed by the user, but if admin chooses to, they can do it here.
-        self.menu_options_data = menu_options_data
+        self.menu_options_data = menu_options_rows(self.timestamp_now)
         # User information
         self.user_data = [
             ('admin', 'administration'),
@@ -73,6 +77,11 @@ class DefaultDatabase:
         """
         Deletes the database.
         """
+        # Release the shared connection first, so it does not keep the deleted file open
+        ConnectionManager.close(self.database_path)
+        # and forget its fuzzy finder index and cached query results
+        FuzzyFinder.forget(self.database_path)
+        QueryCache.clear(self.database_path)
         remove(self.database_path)
 
     def keep_backup(self):
@@ -116,10 +125,10 @@ class DefaultDatabase:
         Args:
             cur: sqlite cursor.
         """
-        # Create table in sqlite3
+        # Create table in sqlite3. AUTOINCREMENT makes sure IDs of deleted commands are never reused.
         cur.execute(
             "CREATE table saved_commands ("
-            "num_row INTEGER NOT NULL PRIMARY KEY, "
+            "num_row INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, "
             "command_description TEXT, "
             "saved_command TEXT NOT NULL, "
             "date_created TEXT, "
@@ -132,6 +141,120 @@ class DefaultDatabase:
         cur.executemany("INSERT INTO saved_commands (command_description, saved_command, "
                         "date_created, timestamp_when_created, times_called, author_name, last_edited)"
                         "VALUES(?, ?, ?, ?, ?, ?, ?)", self.saved_commands_data)
+        # Create the indexes used by the Main Menu summary and the search
+        self.create_saved_commands_indexes(cur)
+        self.create_search_index(cur)
+
+    @staticmethod
+    def create_saved_commands_indexes(cur):
+        """
+        Creates the indexes that keep saved commands ordered by recency and by popularity,
+        so the Main Menu summary reads only the few rows it shows.
+        Args:
+            cur: sqlite cursor.
+        """
+        # Index for the most recent commands
+        cur.execute("CREATE INDEX IF NOT EXISTS saved_commands_by_created "
+                    "ON saved_commands (timestamp_when_created DESC, num_row)")
+        # Index for the most popular commands
+        cur.execute("CREATE INDEX IF NOT EXISTS saved_commands_by_times_called "
+                    "ON saved_commands (times_called DESC, num_row)")
+
+    @staticmethod
+    def create_search_index(cur):
+        """
+        Creates the full-text search index of saved command descriptions and commands.
+        Triggers keep the index in sync when commands are added, edited or deleted.
+        Args:
+            cur: sqlite cursor.
+        """
+        # Check whether the index exists already
+        cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'saved_commands_search'")
+        index_exists = cur.fetchone()[0] > 0
+        # Create the index. It keeps no copy of the text, it reads it from saved_commands.
+        cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS saved_commands_search USING fts5("
+                    "command_description, saved_command, "
+                    "content='saved_commands', content_rowid='num_row')")
+        # Index new commands
+        cur.execute("CREATE TRIGGER IF NOT EXISTS saved_commands_search_insert "
+                    "AFTER INSERT ON saved_commands BEGIN "
+                    "INSERT INTO saved_commands_search (rowid, command_description, saved_command) "
+                    "VALUES (new.num_row, new.command_description, new.saved_command); "
+                    "END")
+        # Remove deleted commands
+        cur.execute("CREATE TRIGGER IF NOT EXISTS saved_commands_search_delete "
+                    "AFTER DELETE ON saved_commands BEGIN "
+                    "INSERT INTO saved_commands_search (saved_commands_search, rowid, command_description, saved_command) "
+                    "VALUES ('delete', old.num_row, old.command_description, old.saved_command); "
+                    "END")
+        # Re-index edited commands. Other updates, like popularity, leave the index alone.
+        cur.execute("CREATE TRIGGER IF NOT EXISTS saved_commands_search_update "
+                    "AFTER UPDATE OF command_description, saved_command ON saved_commands BEGIN "
+                    "INSERT INTO saved_commands_search (saved_commands_search, rowid, command_description, saved_command) "
+                    "VALUES ('delete', old.num_row, old.command_description, old.saved_command); "
+                    "INSERT INTO saved_commands_search (rowid, command_description, saved_command) "
+                    "VALUES (new.num_row, new.command_description, new.saved_command); "
+                    "END")
+        # If the index is new, fill it with the commands saved so far
+        if not index_exists:
+            cur.execute("INSERT INTO saved_commands_search (saved_commands_search) VALUES ('rebuild')")
+
+    @staticmethod
+    def create_executions_table(cur):
+        """
+        Creates the append-only log of executed commands. Commands written directly
+        for the terminal have no saved command ID (num_row is NULL).
+        Args:
+            cur: sqlite cursor.
+        """
+        # Create the table. Rows are only ever added, never changed.
+        cur.execute("CREATE TABLE IF NOT EXISTS executions ("
+                    "execution_id INTEGER NOT NULL PRIMARY KEY, "
+                    "num_row INTEGER, "
+                    "command_text TEXT, "
+                    "timestamp_when_called INTEGER NOT NULL, "
+                    "duration_ms INTEGER, "
+                    "exit_code INTEGER, "
+                    "user_time_ms INTEGER, "
+                    "system_time_ms INTEGER, "
+                    "max_rss_kb INTEGER, "
+                    "cwd TEXT, "
+                    "username TEXT)")
+        # Index to find the executions of a command
+        cur.execute("CREATE INDEX IF NOT EXISTS executions_by_command ON executions (num_row, execution_id)")
+
+    @staticmethod
+    def create_libraries_table(cur):
+        """
+        Creates the list of shared libraries: other CommandSaver databases whose commands are shown
+        together with the user's own.
+        Args:
+            cur: sqlite cursor.
+        """
+        # Create the table. The alias is the schema name the library is attached under.
+        cur.execute("CREATE TABLE IF NOT EXISTS libraries ("
+                    "alias TEXT NOT NULL PRIMARY KEY, "
+                    "library_path TEXT NOT NULL, "
+                    "timestamp_when_added INTEGER)")
+
+    @staticmethod
+    def create_workflows_table(cur):
+        """
+        Creates the workflows: saved commands run in steps, each step waiting for the steps it depends on.
+        Args:
+            cur: sqlite cursor.
+        """
+        # Create the tables. Steps are Command IDs, also of libraries (e.g. team:42),
+        # and the steps they wait for are a JSON array of Command IDs of the same workflow.
+        cur.execute("CREATE TABLE IF NOT EXISTS workflows ("
+                    "workflow_name TEXT NOT NULL PRIMARY KEY, "
+                    "timestamp_when_created INTEGER)")
+        cur.execute("CREATE TABLE IF NOT EXISTS workflow_steps ("
+                    "workflow_name TEXT NOT NULL, "
+                    "position INTEGER NOT NULL, "
+                    "command_id TEXT NOT NULL, "
+                    "depends_on TEXT NOT NULL DEFAULT '[]', "
+                    "PRIMARY KEY (workflow_name, position))")
 
     def __create_menu_options_table(self, cur):
         """
@@ -175,18 +298,17 @@ class DefaultDatabase:
 
         # If it doesn't exist or has been deleted
         else:
-            # Open connection with SQL
-            con = sqlite3.connect(self.database_path)
-            # Allows to navigate in SQL
-            cur = con.cursor()
-            # Create tables
-            self.__create_saved_commands_table(cur)
-            self.__create_menu_options_table(cur)
-            self.__create_user_data_table(cur)
-            # Commit the data
-            con.commit()
-            # Close the connection
-            con.close()
+            # Create all tables as one unit of work on the shared connection
+            with ConnectionManager.transaction(self.database_path) as cur:
+                # Create tables
+                self.__create_saved_commands_table(cur)
+                self.__create_menu_options_table(cur)
+                self.__create_user_data_table(cur)
+                self.create_executions_table(cur)
+                self.create_libraries_table(cur)
+                self.create_workflows_table(cur)
+                # Note that the new database has the latest schema, so no migration runs on it
+                cur.execute("PRAGMA user_version = {}".format(int(schema_version)))
             # Print the success message to the user
             StringFormatter(
                 text_to_format='Success! Database created.').print_green_bold()
@@ -0,0 +1,122 @@
+import os
+import time
+# Resource usage of child processes is only available on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class ExecutionStats:
+    """
+    Measures one run of a command in the terminal: when it started, how long it took, its exit code,
+    and the CPU time and memory used by the processes it started.
+    """
+
+    def __init__(self, command_text: str, command_id: int = None):
+        """
+        Prepares the measurement.
+        Args:
+            command_text: text sent to the terminal.
+            command_id: ID of the saved command, None for text written directly for the terminal.
+        """
+        self.command_text = str(command_text)
+        self.command_id = None if command_id is None else int(command_id)
+        # Placeholders, filled by start and stop
+        self.started = None
+        self.started_counter = None
+        self.usage_before = None
+        self.duration_ms = None
+        self.exit_code = None
+        self.user_time_ms = None
+        self.system_time_ms = None
+        self.max_rss_kb = None
+        self.cwd = None
+
+    @staticmethod
+    def __children_usage():
+        """
+        Reads the resource usage of all finished child processes so far.
+        Returns: resource usage, or None where it is not available.
+
+        """
+        if resource is None:
+            return None
+        return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    def start(self):
+        """
+        Notes the start of the command. Only reads clocks, nothing is written.
+        Returns: self, so it can be chained.
+
+        """
+        self.cwd = os.getcwd()
+        self.usage_before = self.__children_usage()
+        self.started = int(time.time() * 1000)
+        self.started_counter = time.perf_counter()
+        return self
+
+    @staticmethod
+    def exit_code_of(status: int):
+        """
+        Turns a wait status into the command's exit code.
+        Args:
+            status: wait status, as returned by os.system or os.wait4.
+
+        Returns: exit code, or minus the signal number if a signal stopped the command.
+
+        """
+        # On Unix os.system returns the wait status, which also tells about signals
+        if status is not None and os.name == 'posix':
+            try:
+                return os.waitstatus_to_exitcode(status)
+            except ValueError:
+                return status
+        return status
+
+    def stop(self, status: int, usage=None):
+        """
+        Notes the end of the command.
+        Args:
+            status: wait status of the command, as returned by os.system or os.wait4.
+            usage: resource usage of the command's process alone, from os.wait4. If not given,
+                the usage of all child processes since start is used.
+
+        Returns: self, so it can be chained.
+
+        """
+        # Wall time
+        self.duration_ms = int((time.perf_counter() - self.started_counter) * 1000)
+        # Exit code of the command, negative if a signal stopped it
+        self.exit_code = self.exit_code_of(status)
+        # The usage of the command's own process needs no difference
+        if usage is not None:
+            self.user_time_ms = int(usage.ru_utime * 1000)
+            self.system_time_ms = int(usage.ru_stime * 1000)
+            self.max_rss_kb = usage.ru_maxrss
+            return self
+        # CPU time is the difference to the usage before the command started
+        usage_after = self.__children_usage()
+        if usage_after is not None and self.usage_before is not None:
+            self.user_time_ms = int((usage_after.ru_utime - self.usage_before.ru_utime) * 1000)
+            self.system_time_ms = int((usage_after.ru_stime - self.usage_before.ru_stime) * 1000)
+            # The peak memory is the largest of all children so far (kilobytes on Linux)
+            self.max_rss_kb = usage_after.ru_maxrss
+        return self
+
+    def as_row(self):
+        """
+        Returns: the measurement as named values for the executions table.
+
+        """
+        return {
+            'num_row': self.command_id,
+            'command_text': self.command_text,
+            'timestamp_when_called': self.started,
+            'duration_ms': self.duration_ms,
+            'exit_code': self.exit_code,
+            'user_time_ms': self.user_time_ms,
+            'system_time_ms': self.system_time_ms,
+            'max_rss_kb': self.max_rss_kb,
+            'cwd': self.cwd,
+        }
@@ -0,0 +1,426 @@
+import re
+from command_saver.constants import (
+    search_results_limit,
+    fuzzy_scored_limit,
+    search_highlight_start,
+    search_highlight_end
+)
+
+# Characters after which a new word starts; matches at the start of a word score higher
+WORD_SEPARATORS = ' -_/.:=|;,\'"()[]{}<>@~$'
+# Scoring, similar to fzf: every matched character scores, matches at the start of a word
+# and right after the previous match get a bonus, characters skipped in between cost points
+SCORE_MATCH = 16
+BONUS_WORD_START = 8
+BONUS_FIRST_CHARACTER = 8
+BONUS_CONSECUTIVE = 6
+PENALTY_GAP_START = 3
+PENALTY_GAP_EXTENSION = 1
+# Characters that start a word: the first one, and every one after a separator
+WORD_START = re.compile('(?:^|(?<=[{}]))(.)'.format(re.escape(WORD_SEPARATORS)), re.DOTALL)
+
+
+class FuzzyFinder:
+    """
+    In-memory fuzzy finder of saved commands, like fzf: the letters of the query have to appear
+    in the description or the command in the same order, but not next to each other,
+    so "gtlg" finds "Git log".
+    One index is kept per database for the whole session and updated when commands change.
+    Every command has a slot number, and the commands that contain a character are kept as one
+    integer with the bits of their slots set, so narrowing down 100k commands is a few AND operations
+    that run in C. Building the index is paid once, on the first query of a session or by the daemon.
+    """
+    # Built indexes, keyed by the database path
+    indexes = {}
+
+    def __init__(self, commands_list: list):
+        """
+        Builds the index from saved commands.
+        Args:
+            commands_list: list or iterator of (command ID, description, terminal command), e.g. from iter_commands.
+        """
+        # Searchable text of every command, keyed by the command ID
+        self.entries = {}
+        # Slot of every command, keyed by the command ID, the command ID in every slot (None if free),
+        # and the slots of removed commands, given again to new commands
+        self.slots = {}
+        self.slot_ids = []
+        self.free_slots = []
+        # Bits of the slots of the commands that contain a character, keyed by the character
+        self.character_index = {}
+        # Bits of the slots of the commands that have a word starting with a character, keyed by the character
+        self.word_start_index = {}
+        # The last query and the bits of its matches, so typing one more letter only re-checks those matches
+        self.last_query = None
+        self.last_candidates = None
+        # Index every command, collecting the slots of every character first,
+        # because setting one bit copies the whole integer
+        with_character = {}
+        with_word_start = {}
+        for command_id, description, command in commands_list:
+            if command_id in self.entries:
+                continue
+            slot, text = self.__store(command_id, description, command)
+            for character in set(text):
+                with_character.setdefault(character, []).append(slot)
+            for character in self.__word_starts(text):
+                with_word_start.setdefault(character, []).append(slot)
+        # then turning them into bits
+        self.character_index = {character: self.__bits(slots) for character, slots in with_character.items()}
+        self.word_start_index = {character: self.__bits(slots) for character, slots in with_word_start.items()}
+
+    @classmethod
+    def for_database(cls, database_path: str, load_commands):
+        """
+        Returns the index of the database, building it on first use.
+        Args:
+            database_path: database the commands come from.
+            load_commands: function that returns all saved commands, as a list or an iterator.
+
+        Returns: FuzzyFinder of the database.
+
+        """
+        # Build the index if it does not exist yet
+        if database_path not in cls.indexes:
+            cls.indexes[database_path] = FuzzyFinder(load_commands() or [])
+        # and return it
+        return cls.indexes[database_path]
+
+    @classmethod
+    def command_added(cls, database_path: str, command_id: int, description: str, command: str):
+        """
+        Adds a new command to the index of the database, if the index has been built.
+        Args:
+            database_path: database the command was added to.
+            command_id: ID of the new command.
+            description: description of the new command.
+            command: terminal command.
+
+        """
+        if database_path in cls.indexes:
+            cls.indexes[database_path].add(command_id, description, command)
+
+    @classmethod
+    def command_changed(cls, database_path: str, command_id: int, command: str):
+        """
+        Re-indexes an edited command, if the index of the database has been built.
+        Args:
+            database_path: database the command was edited in.
+            command_id: ID of the edited command.
+            command: new terminal command.
+
+        """
+        if database_path in cls.indexes:
+            index = cls.indexes[database_path]
+            # Keep the description that was indexed
+            entry = index.entries.get(command_id)
+            description = entry[0] if entry is not None else ''
+            index.remove(command_id)
+            index.add(command_id, description, command)
+
+    @classmethod
+    def command_deleted(cls, database_path: str, command_id: int):
+        """
+        Removes a deleted command from the index of the database, if the index has been built.
+        Args:
+            database_path: database the command was deleted from.
+            command_id: ID of the deleted command.
+
+        """
+        if database_path in cls.indexes:
+            cls.indexes[database_path].remove(command_id)
+
+    @classmethod
+    def forget(cls, database_path: str):
+        """
+        Drops the index of the database, so it is built again from the database on next use.
+        Args:
+            database_path: database whose index is dropped.
+
+        """
+        cls.indexes.pop(database_path, None)
+
+    def add(self, command_id: int, description: str, command: str):
+        """
+        Adds one command to the index.
+        Args:
+            command_id: ID of the command.
+            description: description of the command.
+            command: terminal command.
+
+        """
+        # Replace the command if it is indexed already
+        if command_id in self.entries:
+            self.remove(command_id)
+        slot, text = self.__store(command_id, description, command)
+        bit = 1 << slot
+        # Note every character the command contains
+        for character in set(text):
+            self.character_index[character] = self.character_index.get(character, 0) | bit
+        # and the characters its words start with
+        for character in self.__word_starts(text):
+            self.word_start_index[character] = self.word_start_index.get(character, 0) | bit
+        # Earlier query results may now be incomplete
+        self.last_query = None
+
+    def __store(self, command_id: int, description: str, command: str):
+        """
+        Keeps the searchable text of a command and gives it a slot.
+        Args:
+            command_id: ID of the command.
+            description: description of the command.
+            command: terminal command.
+
+        Returns: slot of the command and its searchable text.
+
+        """
+        # Search description and command together, ignoring case
+        description = '' if description is None else str(description)
+        command = '' if command is None else str(command)
+        text = (description + ' ' + command).lower()
+        self.entries[command_id] = (description, command, text)
+        # Reuse the slot of a removed command, so the bits do not keep growing
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_ids[slot] = command_id
+        else:
+            slot = len(self.slot_ids)
+            self.slot_ids.append(command_id)
+        self.slots[command_id] = slot
+        return slot, text
+
+    def remove(self, command_id: int):
+        """
+        Removes one command from the index.
+        Args:
+            command_id: ID of the command.
+
+        """
+        # Forget the command
+        entry = self.entries.pop(command_id, None)
+        if entry is None:
+            return
+        # and free its slot
+        slot = self.slots.pop(command_id)
+        self.slot_ids[slot] = None
+        self.free_slots.append(slot)
+        mask = ~(1 << slot)
+        # Remove it from the character index
+        for character in set(entry[2]):
+            self.character_index[character] &= mask
+        # and the word start index
+        for character in self.__word_starts(entry[2]):
+            self.word_start_index[character] &= mask
+        # Earlier query results may now be out of date
+        self.last_query = None
+
+    @staticmethod
+    def __word_starts(text: str):
+        """
+        Finds the characters the words of a text start with.
+        Args:
+            text: lower case text.
+
+        Returns: set of characters.
+
+        """
+        return set(WORD_START.findall(text))
+
+    @staticmethod
+    def __bits(slots):
+        """
+        Sets the bits of slots in one integer.
+        Args:
+            slots: iterable of slots.
+
+        Returns: integer with the bits of the slots set.
+
+        """
+        # Set the bits in a byte array, then convert it once
+        slots = list(slots)
+        bits = bytearray((max(slots) >> 3) + 1 if slots else 0)
+        for slot in slots:
+            bits[slot >> 3] |= 1 << (slot & 7)
+        return int.from_bytes(bits, 'little')
+
+    @staticmethod
+    def __set_slots(bits: int, limit: int):
+        """
+        Lists the slots whose bits are set, lowest first.
+        Args:
+            bits: integer with the bits of the slots set.
+            limit: maximum number of slots.
+
+        Returns: list of slots.
+
+        """
+        # The binary digits, lowest bit first, searched with str.find (runs in C)
+        digits = bin(bits)[:1:-1]
+        slots = []
+        slot = digits.find('1')
+        while slot != -1 and len(slots) < limit:
+            slots.append(slot)
+            slot = digits.find('1', slot + 1)
+        return slots
+
+    def __candidates(self, query: str):
+        """
+        Finds the commands that contain every character of the query, in any order.
+        Reuses the matches of the previous query if this query continues it.
+        Args:
+            query: lower case query.
+
+        Returns: integer with the bits of the slots of the commands set.
+
+        """
+        # If the user typed more letters, the new matches are among the previous ones
+        if self.last_query is not None and query.startswith(self.last_query):
+            candidates = self.last_candidates
+            new_characters = set(query[len(self.last_query):])
+        # Otherwise start from every command
+        else:
+            candidates = -1
+            new_characters = set(query)
+        # Keep the commands that have each of the characters (AND of the bits runs in C)
+        for character in new_characters:
+            candidates &= self.character_index.get(character, 0)
+            if candidates == 0:
+                break
+        return candidates
+
+    def __to_score(self, query: str, candidates: int):
+        """
+        Chooses the candidates to score. Short queries can match most commands, and scoring is done
+        in Python, so at most fuzzy_scored_limit candidates are scored per keystroke.
+        The ones where every letter of the query starts a word go first, because those get the highest scores.
+        Args:
+            query: lower case query.
+            candidates: bits of the slots of the commands that have every character of the query.
+
+        Returns: list of slots.
+
+        """
+        # Find the candidates where each letter of the query starts a word (AND of the bits runs in C)
+        word_aligned = candidates
+        for character in set(query):
+            word_aligned &= self.word_start_index.get(character, 0)
+        slots = self.__set_slots(word_aligned, fuzzy_scored_limit)
+        # and fill up the rest of the limit with other candidates
+        if len(slots) < fuzzy_scored_limit:
+            slots += self.__set_slots(candidates & ~word_aligned, fuzzy_scored_limit - len(slots))
+        return slots
+
+    @staticmethod
+    def score(query: str, text: str):
+        """
+        Scores how well the query matches the text, like fzf.
+        Args:
+            query: lower case query.
+            text: lower case text to search.
+
+        Returns: score and the positions of the matched characters, or (None, None) if it does not match.
+
+        """
+        # Find the characters of the query in order, as early as possible (str.find runs in C)
+        positions = []
+        position = -1
+        for character in query:
+            position = text.find(character, position + 1)
+            if position == -1:
+                return None, None
+            positions.append(position)
+        # Then walk back from the last match to find the shortest stretch of text that matches
+        end = positions[-1]
+        for i in range(len(query) - 2, -1, -1):
+            end = text.rfind(query[i], 0, end)
+            positions[i] = end
+        # Score the matched characters
+        score = 0
+        previous = None
+        for position in positions:
+            score += SCORE_MATCH
+            # Matches at the start of a word score more
+            if position == 0:
+                score += BONUS_WORD_START + BONUS_FIRST_CHARACTER
+            elif text[position - 1] in WORD_SEPARATORS:
+                score += BONUS_WORD_START
+            # Matches right after the previous match score more, skipped characters cost points
+            if previous is not None:
+                gap = position - previous - 1
+                if gap == 0:
+                    score += BONUS_CONSECUTIVE
+                else:
+                    score -= PENALTY_GAP_START + PENALTY_GAP_EXTENSION * (gap - 1)
+            previous = position
+        return score, positions
+
+    def search(self, query: str, limit: int = search_results_limit):
+        """
+        Finds the commands that match the query, best matches first.
+        Args:
+            query: letters to look for, in order. Spaces are ignored.
+            limit: maximum number of results.
+
+        Returns: a list of (command ID, description, command), with matched characters
+        wrapped in search_highlight_start and search_highlight_end.
+
+        """
+        # Ignore case and spaces
+        query = ''.join(str(query).lower().split())
+        # An empty query matches nothing
+        if len(query) == 0:
+            return []
+        # Narrow the commands down to the ones that have all the characters
+        candidates = self.__candidates(query)
+        # Score them, keeping the ones that have the characters in the right order
+        scored = []
+        not_matched = []
+        for slot in self.__to_score(query, candidates):
+            command_id = self.slot_ids[slot]
+            text = self.entries[command_id][2]
+            score, positions = self.score(query, text)
+            if score is None:
+                not_matched.append(slot)
+            else:
+                scored.append((-score, len(text), command_id, positions))
+        # Remember the possible matches for the next keystroke
+        self.last_query = query
+        self.last_candidates = candidates & ~self.__bits(not_matched) if not_matched else candidates
+        # Keep the best ones: highest score, then shortest text, then oldest command
+        scored.sort(key=lambda item: item[:3])
+        # and mark the matched characters
+        return [self.__highlight(command_id, positions) for _, _, command_id, positions in scored[:limit]]
+
+    def __highlight(self, command_id: int, positions: list):
+        """
+        Wraps the matched characters of a command in the highlight markers.
+        Args:
+            command_id: ID of the command.
+            positions: positions of the matched characters in the searched text.
+
+        Returns: (command ID, description, command) with marked matches.
+
+        """
+        description, command, _ = self.entries[command_id]
+        positions = set(positions)
+        # The command starts after the description and the space between them
+        offset = len(description) + 1
+        marked_description = self.__mark(description, positions, 0)
+        marked_command = self.__mark(command, positions, offset)
+        return command_id, marked_description, marked_command
+
+    @staticmethod
+    def __mark(text: str, positions: set, offset: int):
+        """
+        Wraps the characters at the given positions in the highlight markers.
+        Args:
+            text: text to mark.
+            positions: positions of the characters to mark.
+            offset: position of the text's first character in the searched text.
+
+        Returns: marked text.
+
+        """
+        return ''.join(search_highlight_start + character + search_highlight_end
+                       if i + offset in positions else character
+                       for i, character in enumerate(text))
@@ -0,0 +1,109 @@
+import logging
+import sqlite3
+import time
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.constants import (
+    database_path,
+    freelist_threshold,
+    vacuum_chunk_pages,
+    maintenance_time_budget
+)
+
+# SQLite auto_vacuum modes
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class Maintenance:
+    """
+    Background maintenance of the database. Gives pages freed by deleted commands back to the
+    file system in small chunks, so no user action has to wait for a full VACUUM.
+    """
+
+    def __init__(self,
+                 database_path: str = database_path,
+                 ):
+        """
+        Prepares the maintenance of the database.
+        Args:
+            database_path: database to maintain.
+        """
+        self.database = database_path
+
+    def free_pages(self):
+        """
+        Counts the unused pages in the database file.
+        Returns: number of free pages.
+
+        """
+        # Ask SQLite for the length of the free page list
+        con = ConnectionManager.connect(self.database)
+        return con.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def reclaim_free_pages(self,
+                           chunk_pages: int = vacuum_chunk_pages,
+                           time_budget: float = maintenance_time_budget):
+        """
+        Returns free pages to the file system, one chunk per short transaction,
+        until none are left or the time budget is used up.
+        Args:
+            chunk_pages: number of pages reclaimed by one transaction.
+            time_budget: seconds the maintenance may take.
+
+        Returns: number of pages reclaimed.
+
+        """
+        con = ConnectionManager.connect(self.database)
+        # Make sure nothing is left uncommitted
+        ConnectionManager.commit(self.database)
+        # Note where we start
+        started = time.monotonic()
+        free_at_start = self.free_pages()
+        free_now = free_at_start
+        # While there are free pages and time left
+        while free_now > 0 and time.monotonic() - started < time_budget:
+            # reclaim one chunk. The script runs the pragma to completion,
+            # a plain execute would only free a single page.
+            con.executescript("PRAGMA incremental_vacuum({});".format(int(chunk_pages)))
+            # and check how many are left
+            free_now = self.free_pages()
+        # return the number of pages given back
+        return free_at_start - free_now
+
+    def enable_incremental_vacuum(self):
+        """
+        Converts a database created without incremental auto vacuum. This rewrites the whole file once,
+        so it is only done by the end-of-session maintenance.
+
+        """
+        con = ConnectionManager.connect(self.database)
+        # Make sure nothing is left uncommitted
+        ConnectionManager.commit(self.database)
+        # The new mode only takes effect after the database is rebuilt
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        con.execute("VACUUM")
+
+    def run_if_needed(self):
+        """
+        Runs the maintenance if the free page list has passed the threshold. Meant to run
+        opportunistically, e.g. when the session ends. Errors are logged, never shown to the user.
+        Returns: number of pages reclaimed.
+
+        """
+        try:
+            # Do nothing while there is little to reclaim
+            if self.free_pages() < freelist_threshold:
+                return 0
+            # Databases from older versions need converting first
+            con = ConnectionManager.connect(self.database)
+            if con.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                logging.info("Converting the database to incremental auto vacuum.")
+                free_pages = self.free_pages()
+                self.enable_incremental_vacuum()
+                return free_pages
+            # Reclaim the free pages in chunks
+            logging.info("Reclaiming free pages of the database.")
+            return self.reclaim_free_pages()
+        # If another terminal is using the database, try again next time
+        except sqlite3.Error as e:
+            logging.warning("Database maintenance skipped: {}".format(e))
+            return 0
@@ -0,0 +1,258 @@
+import logging
+import time
+from os import path
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.constants import (
+    database_path,
+    previous_database_path,
+    menu_options_rows
+)
+from command_saver.string_templates.logging_str import *
+
+# Tables holding the user's own data, copied over when an older database is imported.
+# Menu options are not copied, they come from the program.
+USER_TABLES = ['saved_commands', 'user_data']
+
+
+class Migrations:
+    """
+    Brings a database created by an older version up to the schema this version expects.
+    The schema version is kept in the database header (PRAGMA user_version) and every migration
+    newer than it is applied in order, each in its own transaction together with the new version number,
+    so an interrupted upgrade continues where it stopped. Every migration is safe to repeat.
+    To change the schema, append a migration to the list and raise schema_version in constants.py.
+    """
+
+    def __init__(self,
+                 database_path: str = database_path,
+                 ):
+        """
+        Prepares the migrations of the database.
+        Args:
+            database_path: database to migrate.
+        """
+        self.database = database_path
+        # Ordered list of (schema version, description, migration). Never reorder or remove one.
+        self.migrations = [
+            (1, 'keep command IDs stable when commands are deleted', self.__stable_command_ids),
+            (2, 'index recent and popular commands', self.__recent_and_popular_indexes),
+            (3, 'full-text search of saved commands', self.__search_index),
+            (4, 'add new menu options', self.__new_menu_options),
+            (5, 'log of executed commands', self.__executions_log),
+            (6, 'duration, exit code and resource usage of executions', self.__execution_history),
+            (7, 'shared libraries', self.__shared_libraries),
+            (8, 'add the page menu options', self.__new_menu_options),
+            (9, 'workflows of saved commands', self.__workflows),
+        ]
+
+    def current_version(self):
+        """
+        Reads the schema version of the database.
+        Returns: schema version, 0 for databases created before versioning.
+
+        """
+        con = ConnectionManager.connect(self.database)
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
+    def pending_migrations(self):
+        """
+        Finds the migrations the database is missing.
+        Returns: list of (schema version, description, migration), oldest first.
+
+        """
+        current_version = self.current_version()
+        return [migration for migration in self.migrations if migration[0] > current_version]
+
+    def migrate(self):
+        """
+        Applies the pending migrations in order. Each one is committed together with its version number,
+        so if one fails, the database stays at the last version that was applied.
+        Returns: number of migrations applied.
+
+        """
+        pending = self.pending_migrations()
+        # Apply every missing migration
+        for version, description, migration in pending:
+            logging.info(MIGRATION_TEMPLATE.format(version, description, self.database))
+            # as one unit of work
+            with ConnectionManager.transaction(self.database) as cur:
+                migration(cur)
+                # Note the new version. The header is written in the same transaction.
+                cur.execute("PRAGMA user_version = {}".format(int(version)))
+        # return how many were applied
+        return len(pending)
+
+    def import_database(self, old_database_path: str = previous_database_path):
+        """
+        Imports the commands and the user data of a database created by an older version,
+        replacing the default data of this database. Columns are matched by name,
+        so columns the old database does not have keep their defaults. Command IDs are kept.
+        Args:
+            old_database_path: database to import.
+
+        Returns: number of commands imported, or None if there is no database to import.
+
+        """
+        # Nothing to do if there is no older database
+        if not path.isfile(old_database_path):
+            return None
+        logging.info(IMPORT_DATABASE_TEMPLATE.format(old_database_path, self.database))
+        # Attaching is not allowed inside a transaction, so save anything pending first
+        con = ConnectionManager.connect(self.database)
+        ConnectionManager.commit(self.database)
+        con.execute("ATTACH DATABASE ? AS old_database", (old_database_path,))
+        try:
+            # Copy the tables as one unit of work, SQLite copies the rows without Python touching them
+            with ConnectionManager.transaction(self.database) as cur:
+                for table in USER_TABLES:
+                    self.__import_table(cur, table)
+                # Count the imported commands
+                cur.execute("SELECT COUNT(*) FROM saved_commands")
+                imported = cur.fetchone()[0]
+        finally:
+            con.execute("DETACH DATABASE old_database")
+        # Make sure the imported data has everything this version needs
+        self.migrate()
+        return imported
+
+    @staticmethod
+    def __import_table(cur, table: str):
+        """
+        Replaces the rows of a table with the rows of the same table in the attached old database.
+        Args:
+            cur: sqlite cursor.
+            table: name of the table.
+
+        """
+        # Find the columns both databases have (the old one may not have the table at all)
+        cur.execute("SELECT name FROM pragma_table_info(?, 'old_database')", (table,))
+        old_columns = {row[0] for row in cur.fetchall()}
+        cur.execute("SELECT name FROM pragma_table_info(?, 'main')", (table,))
+        columns = [row[0] for row in cur.fetchall() if row[0] in old_columns]
+        if len(columns) == 0:
+            return
+        # Replace the default rows with the old ones
+        column_list = ', '.join('"{}"'.format(column) for column in columns)
+        cur.execute('DELETE FROM main."{}"'.format(table))
+        cur.execute('INSERT INTO main."{0}" ({1}) SELECT {1} FROM old_database."{0}"'.format(table, column_list))
+
+    @staticmethod
+    def __stable_command_ids(cur):
+        """
+        Migration 1. Rebuilds the saved commands table with AUTOINCREMENT,
+        so IDs of deleted commands are never given to new commands.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        # Check how the table has been created
+        cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'saved_commands'")
+        table_sql = cur.fetchone()[0]
+        # Nothing to do if it already uses AUTOINCREMENT
+        if 'AUTOINCREMENT' in table_sql.upper():
+            return
+        # Create the new table, copy the commands with their IDs, and swap the tables.
+        # Dropping the old table also drops its indexes and triggers, the next migrations create them again.
+        cur.execute(
+            "CREATE TABLE saved_commands_new ("
+            "num_row INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, "
+            "command_description TEXT, "
+            "saved_command TEXT NOT NULL, "
+            "date_created TEXT, "
+            "timestamp_when_created INTEGER, "
+            "times_called INTEGER, "
+            "author_name TEXT NOT NULL,"
+            "last_edited INTEGER)"
+        )
+        cur.execute("INSERT INTO saved_commands_new SELECT num_row, command_description, saved_command, "
+                    "date_created, timestamp_when_created, times_called, author_name, last_edited "
+                    "FROM saved_commands")
+        cur.execute("DROP TABLE saved_commands")
+        cur.execute("ALTER TABLE saved_commands_new RENAME TO saved_commands")
+
+    @staticmethod
+    def __recent_and_popular_indexes(cur):
+        """
+        Migration 2. Adds the indexes used by the Main Menu summary.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        DefaultDatabase.create_saved_commands_indexes(cur)
+
+    @staticmethod
+    def __search_index(cur):
+        """
+        Migration 3. Adds the full-text search index and fills it with the saved commands.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        DefaultDatabase.create_search_index(cur)
+        # Refill it, in case the saved commands table has been rebuilt since the index was created
+        cur.execute("INSERT INTO saved_commands_search (saved_commands_search) VALUES ('rebuild')")
+
+    @staticmethod
+    def __new_menu_options(cur):
+        """
+        Migrations 4 and 8. Adds the menu options introduced since the database was created.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        cur.executemany("INSERT OR IGNORE INTO menu_options (option_tag, option_description, timestamp_when_created)"
+                        "VALUES(?, ?, ?)", menu_options_rows(time.time()))
+
+    @staticmethod
+    def __executions_log(cur):
+        """
+        Migration 5. Adds the append-only log of executed commands.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        DefaultDatabase.create_executions_table(cur)
+
+    @staticmethod
+    def __execution_history(cur):
+        """
+        Migration 6. Rebuilds the executions log with the columns of the execution history,
+        allowing executions without a saved command.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        # Nothing to do if the log has the history columns already
+        cur.execute("SELECT name FROM pragma_table_info('executions')")
+        if 'duration_ms' in [row[0] for row in cur.fetchall()]:
+            return
+        # Move the old log aside (its index name is needed by the new one), create the new one and copy the rows
+        cur.execute("DROP INDEX IF EXISTS executions_by_command")
+        cur.execute("ALTER TABLE executions RENAME TO executions_old")
+        DefaultDatabase.create_executions_table(cur)
+        cur.execute("INSERT INTO executions (execution_id, num_row, timestamp_when_called) "
+                    "SELECT execution_id, num_row, timestamp_when_called FROM executions_old")
+        cur.execute("DROP TABLE executions_old")
+
+    @staticmethod
+    def __shared_libraries(cur):
+        """
+        Migration 7. Adds the list of shared libraries and the menu option to manage it.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        DefaultDatabase.create_libraries_table(cur)
+        Migrations.__new_menu_options(cur)
+
+    @staticmethod
+    def __workflows(cur):
+        """
+        Migration 9. Adds the workflows and the menu options to manage and run them.
+        Args:
+            cur: sqlite cursor.
+
+        """
+        DefaultDatabase.create_workflows_table(cur)
+        Migrations.__new_menu_options(cur)
@@ -0,0 +1,156 @@
+import sys
+import threading
+from collections import deque
+from itertools import groupby
+from command_saver.constants import (
+    parallel_render_interval,
+    parallel_lines_per_turn,
+    parallel_buffered_lines,
+    read_chunk_size
+)
+
+
+class OutputMultiplexer:
+    """
+    Shows the output of commands running at the same time in one terminal: every line is prefixed with
+    the name of its command, e.g. [3]. The terminal is refreshed a few times per second, and the lines of
+    the commands are shown in turns, so a command that prints a lot cannot hold back the others.
+    A command whose output piles up is paused until its lines have been shown.
+    """
+
+    def __init__(self, labels: list = (), stdout=None, stderr=None, width: int = 0):
+        """
+        Prepares the output of the commands.
+        Args:
+            labels: name of every command known in advance, in order, e.g. its command ID. More can be added.
+            stdout: binary stream for standard output, the terminal's if None.
+            stderr: binary stream for standard error, the terminal's if None.
+            width: length the names are padded to, so the output lines up.
+        """
+        self.width = max([width] + [len(str(label)) for label in labels])
+        self.streams = {'stdout': stdout or sys.stdout.buffer, 'stderr': stderr or sys.stderr.buffer}
+        # Prefix of the lines of every command, keyed by its position
+        self.prefixes = {}
+        # Complete lines waiting to be shown, per command: (stream name, line).
+        # Commands are forgotten once they have ended and all their lines are shown.
+        self.lines = {}
+        self.finished = set()
+        # Number of commands added so far
+        self.added = 0
+        # The last line of every stream, until its end arrives
+        self.partial = {}
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.__render, daemon=True)
+        for label in labels:
+            self.add(label)
+
+    def add(self, label):
+        """
+        Adds a command.
+        Args:
+            label: name of the command, e.g. its command ID.
+
+        Returns: position of the command, to give with its output.
+
+        """
+        with self.condition:
+            job = self.added
+            self.added += 1
+            self.width = max(self.width, len(str(label)))
+            self.prefixes[job] = '[{}] '.format(label).ljust(self.width + 3).encode()
+            self.lines[job] = deque()
+            return job
+
+    def start(self):
+        """
+        Starts showing the output.
+        Returns: self, so it can be chained.
+
+        """
+        self.thread.start()
+        return self
+
+    def write(self, job: int, stream: str, chunk: bytes):
+        """
+        Takes output of a command. Called from the thread running the command, which waits here
+        while too many of its lines are waiting to be shown.
+        Args:
+            job: position of the command in the labels.
+            stream: 'stdout' or 'stderr'.
+            chunk: output, not necessarily whole lines.
+
+        """
+        with self.condition:
+            *complete, rest = (self.partial.pop((job, stream), b'') + chunk).split(b'\n')
+            self.lines[job].extend((stream, line + b'\n') for line in complete)
+            # A line without end (e.g. a progress bar) is shown once it gets long
+            if len(rest) >= read_chunk_size:
+                self.lines[job].append((stream, rest + b'\n'))
+            elif rest:
+                self.partial[(job, stream)] = rest
+            while len(self.lines[job]) > parallel_buffered_lines and not self.closed:
+                self.condition.wait()
+
+    def finish(self, job: int):
+        """
+        Notes that a command has ended: its last lines are shown even without their end.
+        Args:
+            job: position of the command in the labels.
+
+        """
+        with self.condition:
+            for stream in self.streams:
+                rest = self.partial.pop((job, stream), None)
+                if rest:
+                    self.lines[job].append((stream, rest + b'\n'))
+            self.finished.add(job)
+
+    def close(self):
+        """
+        Shows everything still waiting and stops.
+
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def __take(self):
+        """
+        Takes the lines waiting to be shown, in turns: up to parallel_lines_per_turn lines of every command,
+        then the next lines of every command, and so on.
+        Returns: list of (stream name, prefixed line).
+
+        """
+        batch = []
+        while any(self.lines.values()):
+            for job, lines in self.lines.items():
+                for _ in range(min(len(lines), parallel_lines_per_turn)):
+                    stream, line = lines.popleft()
+                    batch.append((stream, self.prefixes[job] + line))
+        # Forget the commands that have ended, now that all their lines are taken
+        for job in self.finished:
+            del self.lines[job], self.prefixes[job]
+        self.finished.clear()
+        return batch
+
+    def __render(self):
+        """
+        Shows the waiting lines in one go at most every parallel_render_interval seconds, until closed.
+
+        """
+        while True:
+            with self.condition:
+                if not self.closed:
+                    self.condition.wait(timeout=parallel_render_interval)
+                closed = self.closed
+                batch = self.__take()
+                # Commands paused for their output can go on
+                self.condition.notify_all()
+            # Write the lines in order, the lines that go to the same stream in one go
+            for name, lines in groupby(batch, key=lambda item: item[0]):
+                self.streams[name].write(b''.join(line for line_stream, line in lines))
+                self.streams[name].flush()
+            if closed:
+                return
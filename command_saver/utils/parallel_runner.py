@@ -0,0 +1,281 @@
+import logging
+import signal
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from command_saver.utils.command_runner import CommandRunner
+from command_saver.utils.output_multiplexer import OutputMultiplexer
+from command_saver.constants import parallel_jobs, command_failed_status, fan_out_queued_per_job
+
+# Signals that stop the run: no more commands start, and the running ones get the signal too.
+# The commands run in process groups of their own, so signals typed in the terminal only reach them this way.
+FORWARDED_SIGNALS = ('SIGINT', 'SIGQUIT', 'SIGTERM', 'SIGHUP')
+
+
+class ParallelRunner:
+    """
+    Runs many commands at the same time on a pool of workers. Their output is captured and shown
+    line by line, each line prefixed with the command's name (see OutputMultiplexer).
+    In fail-fast mode the first failure stops the others, otherwise every command runs (keep-going).
+    """
+
+    def __init__(self, jobs: int = parallel_jobs, fail_fast: bool = False):
+        """
+        Prepares the runner.
+        Args:
+            jobs: number of commands run at the same time.
+            fail_fast: stop everything at the first command that fails.
+        """
+        self.jobs = max(int(jobs), 1)
+        self.fail_fast = fail_fast
+        # Set once no more commands may start, with the signal the running ones got, if any
+        self.stopped = threading.Event()
+        self.stop_signal = None
+        # Process IDs of the running commands, keyed by their position
+        self.running = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def parse_options(words: list, jobs: int = parallel_jobs):
+        """
+        Reads the command IDs and options of a run of many commands, e.g. 3 7 12 --jobs 4 --fail-fast.
+        Args:
+            words: words after the option.
+            jobs: number of jobs if --jobs is not given.
+
+        Returns: (list of command IDs, number of jobs, fail-fast). Raises ValueError if the words are not valid.
+
+        """
+        command_ids, fail_fast = [], False
+        words = list(words)
+        while words:
+            word = words.pop(0)
+            if word in ['--jobs', '-j']:
+                if not words:
+                    raise ValueError("{} needs a number".format(word))
+                jobs = int(words.pop(0))
+            elif word.startswith('--jobs='):
+                jobs = int(word[len('--jobs='):])
+            elif word == '--fail-fast':
+                fail_fast = True
+            elif word == '--keep-going':
+                fail_fast = False
+            elif word.startswith('-'):
+                raise ValueError("Unknown option {}".format(word))
+            else:
+                command_ids.append(word)
+        if jobs < 1:
+            raise ValueError("--jobs needs a number of at least 1")
+        if not command_ids:
+            raise ValueError("No command IDs given")
+        return command_ids, jobs, fail_fast
+
+    @staticmethod
+    def exit_status(results: list):
+        """
+        Sums up a run in one exit status.
+        Args:
+            results: CommandResult of every command, None for the commands that did not run.
+
+        Returns: 0 if every command succeeded, otherwise the status of the first command that failed,
+        or command_failed_status if commands were stopped before they started.
+
+        """
+        for result in results:
+            if result is not None and not result.succeeded:
+                return result.exit_status
+        return command_failed_status if None in results else 0
+
+    @staticmethod
+    def outcome(result):
+        """
+        Tells how a command of the run ended.
+        Args:
+            result: CommandResult, None if the command did not run.
+
+        Returns: 'ok', 'failed', 'stopped' (by a signal) or 'skipped' (stopped before it started, e.g. by fail-fast).
+
+        """
+        if result is None:
+            return 'skipped'
+        return 'ok' if result.succeeded else 'stopped' if result.exit_code < 0 else 'failed'
+
+    def stop(self, signum: int = None):
+        """
+        Lets no more commands start and, if a signal is given, passes it on to the running ones
+        and everything they started.
+        Args:
+            signum: signal to send to the running commands.
+
+        """
+        self.stopped.set()
+        if signum is not None:
+            with self.lock:
+                self.stop_signal = signum
+                pids = list(self.running.values())
+            for pid in pids:
+                CommandRunner.forward(pid, signum, process_group=True)
+
+    def __handle_signals(self):
+        """
+        Stops the run on the terminal's and other signals while the commands run, and passes them on.
+        Returns: the previous handlers, to put back afterwards.
+
+        """
+        previous = {}
+        for name in FORWARDED_SIGNALS:
+            if not hasattr(signal, name):
+                continue
+            try:
+                previous[getattr(signal, name)] = signal.signal(getattr(signal, name),
+                                                                lambda received, frame: self.stop(received))
+            # Signal handlers can only be set by the main thread
+            except ValueError:
+                pass
+        return previous
+
+    def __started(self, job: int, pid: int):
+        """
+        Notes a command that has started, so signals can be passed on to it.
+        A command that started while the run was being stopped gets the signal straight away.
+        Args:
+            job: position of the command.
+            pid: process ID of the command.
+
+        """
+        with self.lock:
+            self.running[job] = pid
+            signum = self.stop_signal
+        if signum is not None:
+            CommandRunner.forward(pid, signum, process_group=True)
+
+    def __run_one(self, job: int, command_text: str, command_id, output: OutputMultiplexer):
+        """
+        Runs one command in a worker, unless the run has been stopped.
+        Args:
+            job: position of the command.
+            command_text: text for the terminal.
+            command_id: ID of the saved command, None for library commands.
+            output: where its output goes.
+
+        Returns: CommandResult, or None if the command did not run.
+
+        """
+        if self.stopped.is_set():
+            return None
+        runner = CommandRunner(capture_output=True, keep_output=False, stdin=subprocess.DEVNULL, own_process_group=True,
+                               on_start=lambda pid: self.__started(job, pid),
+                               on_output=lambda stream, chunk: output.write(job, stream, chunk))
+        try:
+            result = runner.run(command_text, command_id=command_id)
+        except OSError as e:
+            logging.error("Could not start the command {}: {}".format(command_text, e))
+            return None
+        finally:
+            with self.lock:
+                self.running.pop(job, None)
+            output.finish(job)
+        # The first failure stops the others in fail-fast mode
+        if self.fail_fast and not result.succeeded and not self.stopped.is_set():
+            self.stop(signal.SIGTERM)
+        return result
+
+    def run_each(self, commands, width: int = 0):
+        """
+        Runs the commands, reading them only as workers become free, and hands over each result as soon as
+        its command ends. Nothing is kept of the commands that have ended, so any number of commands can run.
+        Args:
+            commands: iterable of (name shown in front of the output, text for the terminal,
+                saved command ID or None). No more are read once the run is stopped.
+            width: length the names are padded to, so the output lines up.
+
+        Returns: generator of (position of the command, its name, CommandResult or None if the command did not run),
+        in the order the commands end.
+
+        """
+        output = OutputMultiplexer(width=width).start()
+        previous = self.__handle_signals()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                # Position and name of the commands started and not handed over yet, keyed by their future
+                running = {}
+                for name, command_text, command_id in commands:
+                    # Wait while enough commands are queued for the workers
+                    while len(running) >= self.jobs * fan_out_queued_per_job:
+                        done, pending = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield running.pop(future) + (future.result(),)
+                    if self.stopped.is_set():
+                        break
+                    job = output.add(name)
+                    running[pool.submit(self.__run_one, job, command_text, command_id, output)] = (job, name)
+                # The last commands
+                while running:
+                    done, pending = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield running.pop(future) + (future.result(),)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            output.close()
+
+    def run(self, commands: list):
+        """
+        Runs the commands and waits for all of them.
+        Args:
+            commands: list of (name shown in front of the output, text for the terminal, saved command ID or None).
+
+        Returns: list of CommandResult in the order of the commands, None for the commands that did not run.
+
+        """
+        results = [None] * len(commands)
+        width = max((len(str(name)) for name, command_text, command_id in commands), default=0)
+        for job, name, result in self.run_each(commands, width=width):
+            results[job] = result
+        return results
+
+    def run_graph(self, commands: list, dependencies: list):
+        """
+        Runs commands that wait for others, e.g. build, then test and lint at the same time, then deploy.
+        A command starts as soon as all the commands it waits for have succeeded. If one of them fails,
+        the command is skipped, and so is everything that waits for it. The other branches go on.
+        Args:
+            commands: list of (name shown in front of the output, text for the terminal, saved command ID or None).
+            dependencies: for every command, the positions of the commands it waits for. There must be no cycle.
+
+        Returns: list of CommandResult in the order of the commands, None for the commands that did not run.
+
+        """
+        results = [None] * len(commands)
+        # Number of commands every command still waits for, and the commands that wait for every command
+        waiting_for = [len(set(positions)) for positions in dependencies]
+        dependents = [[] for _ in commands]
+        for job, positions in enumerate(dependencies):
+            for position in set(positions):
+                dependents[position].append(job)
+        output = OutputMultiplexer([name for name, command_text, command_id in commands]).start()
+        previous = self.__handle_signals()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                def start(job):
+                    name, command_text, command_id = commands[job]
+                    return pool.submit(self.__run_one, job, command_text, command_id, output)
+                # Start with the commands that wait for nothing
+                running = {start(job): job for job, count in enumerate(waiting_for) if count == 0}
+                while running:
+                    done, pending = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        results[job] = future.result()
+                        # What waits for a command that did not succeed never starts
+                        if results[job] is None or not results[job].succeeded:
+                            continue
+                        for dependent in dependents[job]:
+                            waiting_for[dependent] -= 1
+                            if waiting_for[dependent] == 0:
+                                running[start(dependent)] = dependent
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            output.close()
+        return results
@@ -0,0 +1,93 @@
+import os
+from collections import OrderedDict
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.constants import query_cache_size
+
+
+class QueryCache:
+    """
+    Read-through cache of query results shared by the whole session, e.g. the saved commands list
+    and the menu options, so redrawing a menu whose data has not changed runs no queries.
+    Every result is stamped with the state of its database when it was read, and reused while the
+    state is the same. The state is made of the rows changed by this session's connection
+    (total_changes) and the size and modification time of the database file and its WAL file,
+    which change whenever another terminal commits, and of the files of every attached library.
+    Checking it needs no SQL at all.
+    Only the query_cache_size most recently used results are kept.
+    Cached results are shared, so callers must not change them.
+    """
+    # Cached results, keyed by (database path, query name): (database state, result), least recently used first
+    entries = OrderedDict()
+    # Counters, to see how well the cache works
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def database_state(database_path: str):
+        """
+        Reads the state of the database without querying it.
+        Args:
+            database_path: database to check.
+
+        Returns: a tuple that changes whenever the database content may have changed.
+
+        """
+        # Rows changed by this session (also counts changes that were rolled back, which only costs a reload)
+        con = ConnectionManager.connections.get(database_path)
+        changes = None if con is None else con.total_changes
+        # Commits of other terminals go to the WAL file (or to the database file in rollback mode),
+        # and so do the commits made to the attached libraries
+        files = []
+        file_paths = [database_path] + sorted(ConnectionManager.attached.get(database_path, {}).values())
+        for file_path in [file for database_file in file_paths for file in (database_file, database_file + '-wal')]:
+            try:
+                file_stat = os.stat(file_path)
+                files.append((file_stat.st_mtime_ns, file_stat.st_size))
+            except FileNotFoundError:
+                files.append(None)
+        return (changes, *files)
+
+    @classmethod
+    def get(cls, database_path: str, query_name: str, load):
+        """
+        Returns the cached result of a query, or runs it if the database has changed since.
+        Args:
+            database_path: database the query reads.
+            query_name: name of the query, unique per database.
+            load: function that runs the query and returns its result.
+
+        Returns: result of the query.
+
+        """
+        key = (database_path, query_name)
+        # Note the state before running the query, so a write made meanwhile is never missed
+        state = cls.database_state(database_path)
+        entry = cls.entries.get(key)
+        # If the database has not changed, reuse the result
+        if entry is not None and entry[0] == state:
+            cls.entries.move_to_end(key)
+            cls.hits += 1
+            return entry[1]
+        # Otherwise run the query
+        cls.misses += 1
+        result = load()
+        # and keep the result, unless the query failed
+        if result is not None:
+            cls.entries[key] = (state, result)
+            cls.entries.move_to_end(key)
+            # Forget the least recently used results
+            while len(cls.entries) > query_cache_size:
+                cls.entries.popitem(last=False)
+        return result
+
+    @classmethod
+    def clear(cls, database_path: str = None):
+        """
+        Forgets the cached results of a database, or of all databases.
+        Args:
+            database_path: database to forget, None for all.
+
+        """
+        for key in list(cls.entries):
+            if database_path is None or key[0] == database_path:
+                del cls.entries[key]
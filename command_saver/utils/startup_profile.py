@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+from command_saver.constants import startup_profile_top
+
+
+class StartupProfile:
+    """
+    Measures how long starting the program takes, module by module. The program is imported in a new
+    Python process with Python's own import timer (-X importtime), so nothing is imported already.
+    Run it with: cs --startup-profile
+    """
+
+    def __init__(self, module: str = 'command_saver.cs', top: int = startup_profile_top):
+        """
+        Prepares the profile.
+        Args:
+            module: module to import, the program's entry point by default.
+            top: number of slowest modules to report.
+        """
+        self.module = module
+        self.top = top
+
+    def measure(self):
+        """
+        Imports the module in a new process and reads the import times.
+        Returns: (wall time of the whole process in ms, list of (module, self ms, cumulative ms) in import order).
+
+        """
+        # Only needed here, so the program itself does not import it
+        import subprocess
+        # The new process finds the program the same way this one does
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(self.module)],
+                                env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - started) * 1000
+        # Lines look like "import time:  self [us] | cumulative | imported package", nested names are indented
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            fields = line[len('import time:'):].split('|')
+            try:
+                self_us, cumulative_us = int(fields[0]), int(fields[1])
+            # The header line has no numbers
+            except ValueError:
+                continue
+            modules.append((fields[2].strip(), self_us / 1000, cumulative_us / 1000))
+        return wall_ms, modules
+
+    def print_report(self):
+        """
+        Prints the time of the whole start, of every top-level package and of the slowest modules.
+
+        """
+        wall_ms, modules = self.measure()
+        # Add up the time spent in every top-level package
+        packages = {}
+        for name, self_ms, cumulative_ms in modules:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_ms
+        print("Starting {} took {:.1f} ms, {:.1f} ms of it importing {} modules.".format(
+            self.module, wall_ms, sum(module[1] for module in modules), len(modules)))
+        print("\n{:<40} {:>10}".format('Package', 'Self (ms)'))
+        for package, self_ms in sorted(packages.items(), key=lambda item: -item[1])[:self.top]:
+            print("{:<40} {:>10.1f}".format(package, self_ms))
+        print("\n{:<40} {:>10} {:>16}".format('Module', 'Self (ms)', 'Cumulative (ms)'))
+        for name, self_ms, cumulative_ms in sorted(modules, key=lambda module: -module[1])[:self.top]:
+            print("{:<40} {:>10.1f} {:>16.1f}".format(name, self_ms, cumulative_ms))
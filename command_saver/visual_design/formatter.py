@@ -1,9 +1,11 @@
-from rich import print as rprint
-from rich.table import Table
-from rich.console import Console
-from rich.panel import Panel
+import time
 from typing import List
-from command_saver.constants import items_before_break
+from command_saver.constants import (
+    items_before_break,
+    search_highlight_start,
+    search_highlight_end,
+    library_id_separator
+)
 
 
 class StringFormatter:
@@ -25,6 +27,8 @@ class StringFormatter:
         Prints the text given to the class in bold green.
 
         """
+        # rich is imported on first use, so commands that print nothing do not pay for loading it
+        from rich import print as rprint
         rprint("[bold green]{}[/bold green]".format(self.text_to_format))
 
     def print_red_bold(self):
@@ -32,8 +36,41 @@ class StringFormatter:
         Prints the text given to the class in bold green.
 
         """
+        from rich import print as rprint
         rprint("[bold red]{}[/bold red]".format(self.text_to_format))
 
+    def print_error(self):
+        """
+        Prints the text in bold red on one line of the standard error, for runs straight from the command line,
+        so it is not mixed with the output of the command.
+
+        """
+        from rich.console import Console
+        Console(stderr=True, soft_wrap=True).print("[bold red]{}[/bold red]".format(self.text_to_format))
+
+    def print_plain(self):
+        """
+        Prints the text as it is, through the shared console, so it keeps its place among the tables.
+
+        """
+        from rich import get_console
+        get_console().print(self.text_to_format, markup=False, highlight=False)
+
+    def highlighted_markup(self):
+        """
+        Turns the matches marked by the search into bold yellow text.
+        Anything else that looks like formatting is printed as it is.
+        Returns: text formatted for the tables.
+
+        """
+        from rich.markup import escape
+        # Make sure brackets in the text are not read as formatting
+        text = escape(str(self.text_to_format))
+        # Colour the marked matches
+        text = text.replace(search_highlight_start, '[bold yellow]')
+        text = text.replace(search_highlight_end, '[/bold yellow]')
+        return text
+
 
 class TableFormatter:
     """Class that takes text and formats it according to design."""
@@ -57,10 +94,13 @@ class TableFormatter:
         Prints saved commands table with the given table title and list of items.
 
         """
+        from rich.table import Table
+        from rich import get_console
         # Set table header
         table = Table(title=self.table_title)
-        # Create table headers for columns to print
-        headers = ['Command ID', 'Description', 'Terminal Command']
+        # Create table headers for columns to print.
+        # '#' is the position in the list, Command ID is the permanent ID used in the options.
+        headers = ['#', 'Command ID', 'Description', 'Terminal Command']
         # for each header in the list
         for header in headers:
             # add a column to the table
@@ -74,12 +114,12 @@ class TableFormatter:
                 # Sort data by most used. Tuple[5] is the "times called" item in the list.
                 self.list_to_format.sort(key=lambda tup: tup[5], reverse=True)
             # Create rows and fill them with data of first three items in each tuple.
-            # For an item in the given list
-            for item in self.list_to_format:
-                # add a row with each command's ID, description and terminal command
-                table.add_row(str(item[0]), str(item[1]), str(item[2]))
-        # Console needed for rich module to print panels
-        console = Console()
+            # For an item in the given list, numbered in the order it is displayed
+            for position, item in enumerate(self.list_to_format, start=1):
+                # add a row with the display position, each command's ID, description and terminal command
+                table.add_row(str(position), str(item[0]), str(item[1]), str(item[2]))
+        # The shared console, which the screen cache can record
+        console = get_console()
         # Print the table
         console.print(table)
 
@@ -88,6 +128,8 @@ class TableFormatter:
         Prints Menu Options table with a given heading and given list of options.
 
         """
+        from rich.table import Table
+        from rich import get_console
         # Set table header
         table = Table(title=self.table_title)
         # Create table headers for columns to print
@@ -115,8 +157,8 @@ class TableFormatter:
         for item in items_after_break:
             # add a row in the table
             table.add_row(str(item[1]), str(item[2]))
-        # Console needed for rich module to print panels
-        console = Console()
+        # The shared console, which the screen cache can record
+        console = get_console()
         # Print the table
         console.print(table)
 
@@ -125,6 +167,8 @@ class TableFormatter:
         Prints saved commands table with one given command.
 
         """
+        from rich.table import Table
+        from rich import get_console
         # Set table header
         table = Table()
         # Create table headers for columns to print
@@ -142,8 +186,130 @@ class TableFormatter:
             table.add_row(str(command_id), str(item[0]), str(item[1]), str(item[2]),
                           str(item[3]), str(item[4]), str(item[5]),
                           str(item[6]), str(item[7]))
-        # Console needed for rich module to print panels
-        console = Console()
+        # The shared console, which the screen cache can record
+        console = get_console()
+        # Print the table
+        console.print(table)
+
+    def print_table_libraries(self):
+        """
+        Prints the shared libraries: their names, the IDs of their commands and their databases.
+
+        """
+        from rich.table import Table
+        from rich import get_console
+        # Set table header
+        table = Table(title=self.table_title)
+        # Create table headers for columns to print
+        headers = ['Library', 'Command IDs', 'Database']
+        # for each header in the list
+        for header in headers:
+            # add a column to the table
+            table.add_column(header, justify="left")
+        # For each library
+        for alias, library_path in self.list_to_format:
+            # add a row with its name, an example of its IDs and its database
+            table.add_row(str(alias), '{}{}ID'.format(alias, library_id_separator), str(library_path))
+        # The shared console, which the screen cache can record
+        console = get_console()
+        # Print the table
+        console.print(table)
+
+    def print_table_workflows(self):
+        """
+        Prints the workflows: their names and their steps, stage after stage.
+
+        """
+        from rich.table import Table
+        from rich import get_console
+        # Set table header
+        table = Table(title=self.table_title)
+        # Create table headers for columns to print
+        headers = ['Workflow', 'Steps']
+        # for each header in the list
+        for header in headers:
+            # add a column to the table
+            table.add_column(header, justify="left")
+        # For each workflow
+        for name, stages in self.list_to_format:
+            # add a row with its stages, the steps of a stage run at the same time
+            table.add_row(str(name), ' → '.join(' ‖ '.join(str(step) for step in stage) for stage in stages))
+        # The shared console, which the screen cache can record
+        console = get_console()
+        # Print the table
+        console.print(table)
+
+    def print_table_executions(self):
+        """
+        Prints the execution history of a command: one row per execution, newest first.
+
+        """
+        from rich.table import Table
+        from rich import get_console
+        # Set table header
+        table = Table(title=self.table_title)
+        # Create table headers for columns to print
+        headers = ['Started', 'Duration (ms)', 'Exit Code', 'User CPU (ms)', 'System CPU (ms)',
+                   'Max RSS (KB)', 'Directory', 'User']
+        # for each header in the list
+        for header in headers:
+            # add a column to the table
+            table.add_column(header, justify="left")
+        # For each execution
+        for item in self.list_to_format:
+            # show the start in local time, and the rest as it is
+            started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(item[0] / 1000))
+            table.add_row(started, *('' if value is None else str(value) for value in item[1:]))
+        # The shared console, which the screen cache can record
+        console = get_console()
+        # Print the table
+        console.print(table)
+
+    def print_table_parallel_summary(self):
+        """
+        Prints how each command of a parallel run ended: one row per command, in the order they were given.
+
+        """
+        from rich.table import Table
+        from rich import get_console
+        # Set table header
+        table = Table(title=self.table_title)
+        # Create table headers for columns to print
+        headers = ['Command ID', 'Description', 'Result', 'Exit Code', 'Duration (ms)']
+        # for each header in the list
+        for header in headers:
+            # add a column to the table
+            table.add_column(header, justify="left")
+        # For each command
+        for item in self.list_to_format:
+            # add a row, leaving out what is not known of commands that did not run
+            table.add_row(*('' if value is None else str(value) for value in item))
+        # The shared console, which the screen cache can record
+        console = get_console()
+        # Print the table
+        console.print(table)
+
+    def print_table_fan_out_summary(self):
+        """
+        Prints how the runs of a command over many values ended: one row per result, with a few of its values.
+
+        """
+        from rich.table import Table
+        from rich import get_console
+        # Set table header
+        table = Table(title=self.table_title)
+        # Create table headers for columns to print
+        headers = ['Result', 'Runs', 'Values']
+        # for each header in the list
+        for header in headers:
+            # add a column to the table
+            table.add_column(header, justify="left")
+        # For each result
+        for item in self.list_to_format:
+            # add a row
+            table.add_row(*(str(value) for value in item))
+        # The shared console, which the screen cache can record
+        console = get_console()
         # Print the table
         console.print(table)
 
@@ -167,6 +333,8 @@ class PanelFormatter:
         Each item in the list is printed in a new line.
 
         """
+        from rich import print as rprint
+        from rich.panel import Panel
         # if there is only one string, panel has no title
         if len(self.panel_to_format) == 1:
             # Print a panel with a single line of text within
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from command_saver.utils.query_cache import QueryCache
+from command_saver.constants import database_path, screen_cache_size
+
+
+class ScreenCache:
+    """
+    Cache of rendered screens, e.g. the main menu and the help page, so showing a screen again
+    writes the same text to the terminal instead of building and laying out its tables again.
+    Screens are recorded for one terminal width and colour system and one state of the database
+    (see QueryCache.database_state): all of them are dropped when the terminal is resized or the database is written.
+    Only the screen_cache_size most recently shown screens are kept.
+    """
+    # Rendered screens, keyed by screen name: (text written to the terminal, value returned by the drawing)
+    screens = OrderedDict()
+    # Terminal width, colour system and database state the screens were rendered for
+    version = None
+    # Counters, to see how well the cache works
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def show(cls, screen, draw, database_path: str = database_path):
+        """
+        Shows a screen, drawing it only if it has not been rendered for this terminal and data yet.
+        Args:
+            screen: name of the screen, with anything else that changes it, e.g. ('sc', page).
+            draw: function that prints the screen through the shared rich console.
+            database_path: database the screen shows.
+
+        Returns: what draw returned when the screen was rendered.
+
+        """
+        from rich import get_console
+        console = get_console()
+        # Note the version before drawing, so a write made meanwhile is never missed
+        version = (console.width, console.color_system, QueryCache.database_state(database_path))
+        if version != cls.version:
+            cls.clear()
+            cls.version = version
+        entry = cls.screens.get(screen)
+        # Replay the screen as it was written
+        if entry is not None:
+            cls.screens.move_to_end(screen)
+            cls.hits += 1
+        # or draw it, recording what is written
+        else:
+            cls.misses += 1
+            with console.capture() as capture:
+                result = draw()
+            entry = (capture.get(), result)
+            cls.screens[screen] = entry
+            # Forget the least recently shown screens
+            while len(cls.screens) > screen_cache_size:
+                cls.screens.popitem(last=False)
+        console.file.write(entry[0])
+        console.file.flush()
+        return entry[1]
+
+    @classmethod
+    def clear(cls):
+        """
+        Forgets every rendered screen.
+
+        """
+        cls.screens.clear()
+        cls.version = None
@@ -1,13 +1,21 @@
 from typing import List
 from command_saver.visual_design.formatter import StringFormatter, PanelFormatter, TableFormatter
+from command_saver.visual_design.screen_cache import ScreenCache
 from command_saver.table.saved_commands import SavedCommands
 from command_saver.table.menu_options import MenuOptions
+from command_saver.table.executions import Executions
+from command_saver.table.libraries import Libraries
+from command_saver.table.workflows import Workflows
+from command_saver.utils.parallel_runner import ParallelRunner
 from command_saver.constants import (
     help_menu_info,
     main_menu_info,
     saved_commands_info,
     options_within_main_menu,
-    options_within_input_menu
+    options_within_input_menu,
+    saved_commands_page_size,
+    mo_next,
+    mo_prev
 )
 
 
@@ -25,9 +33,9 @@ class ViewContents:
         self.main_menu_info = main_menu_info
         self.saved_commands_info = saved_commands_info
 
-        # Fetch table data that is to be displayed in the layouts
+        # Fetch table data that is to be displayed in the layouts.
+        # The Saved Commands Menu reads its page only when it is printed.
         self.recent_commands_list = SavedCommands().recent_commands_list()
-        self.all_saved_commands_list = SavedCommands().view_all_saved_commands()
         self.menu_options_list = MenuOptions().view_options()
 
     @staticmethod
@@ -106,9 +114,16 @@ class ViewContents:
 
     def print_main_menu(self):
         """
-        Prints a formatted Main Menu of the application.
+        Prints a formatted Main Menu of the application, as rendered last time while nothing has changed.
         Returns: prints the menu in the terminal.
 
+        """
+        ScreenCache.show('mm', self.__draw_main_menu)
+
+    def __draw_main_menu(self):
+        """
+        Draws the Main Menu.
+
         """
         # Print the header part of the main menu
         PanelFormatter(panel_to_format=self.main_menu_info).print_panel()
@@ -122,21 +137,72 @@ class ViewContents:
         TableFormatter(list_to_format=self.recent_commands_list,
                        table_title='SAVED COMMANDS SUMMARY').print_table_saved_commands()
 
-    def print_saved_commands_menu(self):
+    @staticmethod
+    def print_saved_commands_menu(after_id=None, before_id=None):
         """
-        Prints a formatted Saved Commands menu of the application.
-        Returns: prints the commands in the terminal.
+        Prints one page of the Saved Commands menu of the application. Only that page is read from the database.
+        Args:
+            after_id: show the commands after this command ID (next page), None for the first page.
+            before_id: show the commands before this command ID instead (previous page).
+
+        Returns: IDs of the first and the last command shown, or None if there was nothing to show.
 
         """
-        # Print the Saved Commands table with all saved commands options
-        TableFormatter(list_to_format=self.all_saved_commands_list,
+        # Pages are rendered again only when the terminal or the database has changed
+        return ScreenCache.show(('sc', after_id, before_id),
+                                lambda: ViewContents.__draw_saved_commands_page(after_id, before_id))
+
+    @staticmethod
+    def __draw_saved_commands_page(after_id, before_id):
+        """
+        Draws one page of the Saved Commands menu.
+        Args:
+            after_id: show the commands after this command ID (next page), None for the first page.
+            before_id: show the commands before this command ID instead (previous page).
+
+        Returns: IDs of the first and the last command shown, or None if there was nothing to show.
+
+        """
+        # Read one command more than fits on the page, to know whether the list goes on
+        page = list(SavedCommands().iter_commands(after_id=after_id, before_id=before_id,
+                                                  limit=saved_commands_page_size + 1))
+        has_more = len(page) > saved_commands_page_size
+        page = page[:saved_commands_page_size]
+        # If there is nothing to show, the page stays where it was
+        if len(page) == 0:
+            StringFormatter(text_to_format='There are no more saved commands to show.'
+                            if after_id is not None or before_id is not None
+                            else 'There are no saved commands yet.').print_plain()
+            return None
+        # Going backwards, the nearest commands come first
+        if before_id is not None:
+            page.reverse()
+        # Print the Saved Commands table with the commands of this page
+        TableFormatter(list_to_format=page,
                        table_title='SAVED COMMANDS').print_table_saved_commands()
+        # Tell the user how to turn the page
+        pages = []
+        if (has_more if before_id is not None else after_id is not None):
+            pages.append('{}: {}'.format(mo_prev.key, mo_prev.name))
+        if (has_more if before_id is None else True):
+            pages.append('{}: {}'.format(mo_next.key, mo_next.name))
+        if pages:
+            StringFormatter(text_to_format=', '.join(pages)).print_plain()
+        # return where the page starts and ends
+        return page[0][0], page[-1][0]
 
     def print_help_page(self):
         """
-        Prints the help page.
+        Prints the help page, as rendered last time while nothing has changed.
         Returns: help page printed in the terminal.
 
+        """
+        ScreenCache.show('h', self.__draw_help_page)
+
+    def __draw_help_page(self):
+        """
+        Draws the help page.
+
         """
         # Print the header part of the help menu panel
         PanelFormatter(panel_to_format=self.help_menu_info).print_panel()
@@ -144,6 +210,86 @@ class ViewContents:
         TableFormatter(list_to_format=self.menu_options_list,
                        table_title='ALL MENU OPTIONS AVAILABLE AT DIFFERENT STAGES').print_table_menu_options()
 
+    @staticmethod
+    def print_search_results(query):
+        """
+        Prints the saved commands that match the search, best matches first.
+        Args:
+            query: text to look for.
+
+        Returns: prints the matching commands in the terminal.
+
+        """
+        # Look up the matching commands
+        found_commands = SavedCommands().search_commands(query=query)
+        # Print them
+        ViewContents.__print_found_commands(found_commands=found_commands, table_title='SEARCH RESULTS')
+
+    @staticmethod
+    def print_fuzzy_results(query):
+        """
+        Prints the saved commands that contain the letters of the query in order, best matches first.
+        Args:
+            query: letters to look for.
+
+        Returns: prints the matching commands in the terminal.
+
+        """
+        # Look up the matching commands in the in-memory index
+        found_commands = SavedCommands().fuzzy_find_commands(query=query)
+        # Print them
+        ViewContents.__print_found_commands(found_commands=found_commands, table_title='FUZZY FIND RESULTS')
+
+    @staticmethod
+    def __print_found_commands(found_commands, table_title):
+        """
+        Prints found commands, colouring the matched parts.
+        Args:
+            found_commands: list of (command ID, highlighted description, highlighted command).
+            table_title: title of the table.
+
+        """
+        # If the search failed, an error has been printed already
+        if found_commands is None:
+            return
+        # Colour the matched parts
+        found_commands = [(command_id,
+                           StringFormatter(description).highlighted_markup(),
+                           StringFormatter(command).highlighted_markup())
+                          for command_id, description, command in found_commands]
+        # Print them in the saved commands table
+        TableFormatter(list_to_format=found_commands,
+                       table_title=table_title).print_table_saved_commands()
+
+    @staticmethod
+    def print_parallel_summary(runs: list, table_title: str = 'PARALLEL RUN SUMMARY'):
+        """
+        Prints the summary of many commands run at the same time.
+        Args:
+            runs: list of (command ID, description, CommandResult or None if it did not run).
+            table_title: title of the summary.
+
+        """
+        rows = []
+        for command_id, description, result in runs:
+            # Leave out what is not known of commands that were stopped before they started, e.g. by fail-fast
+            rows.append((command_id, description, ParallelRunner.outcome(result),
+                         None if result is None else result.exit_status,
+                         None if result is None else result.stats.duration_ms))
+        TableFormatter(list_to_format=rows, table_title=table_title).print_table_parallel_summary()
+
+    @staticmethod
+    def print_fan_out_summary(outcomes: dict):
+        """
+        Prints the summary of a command run once for every value.
+        Args:
+            outcomes: number of runs and first values of every result, keyed by the result.
+
+        """
+        rows = [(outcome, count, ', '.join(values) + (', ...' if count > len(values) else ''))
+                for outcome, (count, values) in outcomes.items() if count]
+        TableFormatter(list_to_format=rows, table_title='FAN-OUT SUMMARY').print_table_fan_out_summary()
+
     @staticmethod
     def print_one_full_command(command_id):
         """
@@ -156,3 +302,32 @@ class ViewContents:
         # Print a table that shows command data
         TableFormatter(list_to_format=one_full_command).print_table_one_command(
             command_id=command_id)
+        # and its latest executions, if it is one of the user's own commands and has been executed
+        alias, num_row = Libraries.split_id(command_id)
+        history = Executions.history(command_id=num_row) if alias is None else None
+        if history:
+            TableFormatter(list_to_format=history,
+                           table_title='LATEST EXECUTIONS').print_table_executions()
+
+    @staticmethod
+    def print_workflows():
+        """
+        Prints the workflows.
+
+        """
+        # Fetch the workflows
+        workflows = Workflows().saved()
+        # Print them, stage after stage
+        TableFormatter(list_to_format=[(name, Workflows.stages(steps)) for name, steps in workflows or []],
+                       table_title='WORKFLOWS').print_table_workflows()
+
+    @staticmethod
+    def print_libraries():
+        """
+        Prints the shared libraries.
+
+        """
+        # Fetch the libraries
+        libraries = Libraries().registered()
+        # Print them
+        TableFormatter(list_to_format=libraries or [], table_title='SHARED LIBRARIES').print_table_libraries()
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from command_saver.daemon.client import DaemonClient
+
+
+@unittest.skipUnless(DaemonClient.is_supported() and hasattr(os, 'fork'), "the daemon needs Unix and Python 3.9+")
+class TestDaemon(unittest.TestCase):
+    """
+    Tests the daemon and its client, with the daemon running in its own process and home folder.
+    """
+
+    def setUp(self):
+        """
+        Starts a daemon that exits after 2 idle seconds.
+
+        """
+        self.home = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.home.name, 'command_saver', 'cs.sock')
+        env = dict(os.environ, HOME=self.home.name,
+                   PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        self.daemon = subprocess.Popen(
+            [sys.executable, '-c', 'from command_saver.daemon.server import Daemon; Daemon(idle_timeout=2).serve()'],
+            env=env, stdout=subprocess.DEVNULL)
+        # Wait until it listens
+        for _ in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self):
+        self.daemon.kill()
+        self.daemon.wait()
+        self.home.cleanup()
+
+    def test_run(self):
+        """
+        Are the exit statuses of the commands returned, also for many clients at the same time,
+        and are the options that need the menus left to the client?
+
+        """
+        # Arrange: the client has the daemon's settings
+        client = DaemonClient(socket_path=self.socket_path)
+        # Act and assert
+        with patch.dict(os.environ, HOME=self.home.name):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                statuses = list(pool.map(lambda status: client.run(['t', 'exit {}'.format(status)]), range(16)))
+            self.assertEqual(list(range(16)), statuses)
+            self.assertEqual(127, client.run(['e', '1000']))
+            self.assertIsNone(client.run(['a']))
+
+    def test_other_settings_run_in_the_client(self):
+        """
+        Are clients whose environment gives other settings than the daemon's left to run in their own process?
+
+        """
+        # Arrange
+        client = DaemonClient(socket_path=self.socket_path)
+        # Act and assert
+        with patch.dict(os.environ, HOME=self.home.name, CS_PERFORMANCE_PROFILE='fast'):
+            self.assertIsNone(client.run(['t', 'true']))
+        with patch.dict(os.environ, HOME=os.path.join(self.home.name, 'other')):
+            self.assertIsNone(client.run(['t', 'true']))
+
+    def test_no_daemon_and_idle_exit(self):
+        """
+        Does the client fall back when no daemon listens, and does the daemon exit and remove its socket when idle?
+
+        """
+        # Act
+        self.daemon.wait(timeout=30)
+        # Assert
+        self.assertEqual(0, self.daemon.returncode)
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertIsNone(DaemonClient(socket_path=self.socket_path).run(['t', 'true']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sqlite3
+import unittest
+from unittest.mock import patch, MagicMock
+from command_saver.errors.sql_err import SQL_err
+
+
+class TestSQLErr(unittest.TestCase):
+    """
+    Tests SQL_err methods.
+    """
+
+    @patch('command_saver.errors.sql_err.time.sleep')
+    def test_retry_when_locked(self, mock_sleep):
+        """
+        Test whether a method is retried with a growing pause while the database is locked.
+        Args:
+            mock_sleep: mock the pause between retries.
+
+        """
+        # Arrange: the database is locked twice, then the method works
+        method = MagicMock(side_effect=[sqlite3.OperationalError('database is locked'),
+                                        sqlite3.OperationalError('database is locked'),
+                                        'done'])
+        # Act
+        result = SQL_err.sql_confirmation(method_description='test the retry', method=method)
+        # Assert
+        self.assertEqual('done', result)
+        self.assertEqual(3, method.call_count)
+        self.assertLess(mock_sleep.call_args_list[0][0][0], mock_sleep.call_args_list[1][0][0])
+
+    @patch('command_saver.errors.sql_err.Err')
+    @patch('command_saver.errors.sql_err.time.sleep')
+    def test_no_retry_for_other_errors(self, mock_sleep, mock_err):
+        """
+        Test whether other SQL errors are reported straight away.
+        Args:
+            mock_sleep: mock the pause between retries.
+            mock_err: mock the error printer.
+
+        """
+        # Arrange
+        method = MagicMock(side_effect=sqlite3.OperationalError('no such table: saved_commands'))
+        # Act
+        result = SQL_err.sql_confirmation(method_description='test the error', method=method)
+        # Assert
+        self.assertEqual(None, result)
+        self.assertEqual(1, method.call_count)
+        mock_sleep.assert_not_called()
+        mock_err().error.assert_called_once()
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
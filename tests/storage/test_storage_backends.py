@@ -0,0 +1,151 @@
+import os
+import unittest
+from unittest.mock import patch
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.storage.sqlite_backend import SQLiteBackend
+from command_saver.storage.jsonl_backend import JSONLinesBackend
+from command_saver.storage.backends import Backends
+from command_saver.table.saved_commands import SavedCommands
+
+
+class TestStorageBackends(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    mock_log_path = 'tests/data/command_saver.jsonl'
+    """
+    Tests the storage backends.
+    """
+
+    def setUp(self):
+        """
+        Create a test database and an empty test log before every unit test.
+
+        """
+        # create a mock database, without the default commands, numbering from 1
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        ConnectionManager.connect(self.mock_database_path).execute("DELETE FROM saved_commands")
+        ConnectionManager.connect(self.mock_database_path).execute("DELETE FROM sqlite_sequence")
+        ConnectionManager.commit(self.mock_database_path)
+        # and a mock log
+        self.backends = [SQLiteBackend(self.mock_database_path),
+                         JSONLinesBackend(self.mock_log_path, compaction_min_lines=10, sync=False)]
+
+    def tearDown(self):
+        """
+        Delete the test database and log after every test.
+
+        """
+        for backend in self.backends:
+            backend.close()
+        self.mock_database.delete_database()
+        for file_path in (self.mock_log_path, self.mock_log_path + '.compacting'):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_backends_give_the_same_results(self):
+        """
+        Test whether both backends answer the same way to the same changes.
+
+        """
+        results = []
+        for backend in self.backends:
+            for i in range(5):
+                backend.add_command('Command {}'.format(i), 'echo {}'.format(i), 'admin')
+            backend.update_command(2, 'echo changed')
+            backend.delete_command(3)
+            backend.add_calls({4: 2, 5: 1})
+            results.append((backend.all_commands(),
+                            backend.find_commands([1, 3, 4]),
+                            backend.full_command(2)[2],
+                            backend.full_command(4)[5],
+                            [row[0] for row in backend.recent_and_popular(0, 2)],
+                            [row[0] for row in backend.iter_commands(after_id=1, limit=2)],
+                            [row[0] for row in backend.iter_commands(before_id=5)],
+                            sorted(row[0] for row in backend.search_commands('comm ech'))))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][4], [4, 5])
+
+    def test_ids_are_not_reused(self):
+        """
+        Test whether a deleted ID is not given again, also after compaction and reopening the log.
+
+        """
+        for backend in self.backends:
+            backend.add_command('First', 'ls', 'admin')
+            backend.add_command('Second', 'pwd', 'admin')
+            backend.delete_command(2)
+            self.assertEqual(backend.add_command('Third', 'whoami', 'admin'), 3)
+        log = self.backends[1]
+        log.delete_command(3)
+        log.compact()
+        log.close()
+        reopened = JSONLinesBackend(self.mock_log_path, sync=False)
+        self.assertEqual(reopened.add_command('Fourth', 'date', 'admin'), 4)
+        reopened.close()
+
+    def test_compaction_keeps_commands(self):
+        """
+        Test whether the log is compacted once it has enough outdated lines, keeping every command as it is.
+
+        """
+        log = self.backends[1]
+        for i in range(3):
+            log.add_command('Command {}'.format(i), 'echo {}'.format(i), 'admin')
+        before = [log.full_command(command_id) for command_id in (1, 2, 3)]
+        # Every call line becomes outdated, compaction starts after 10 of them
+        for _ in range(10):
+            log.add_calls({1: 1})
+        with open(self.mock_log_path) as f:
+            self.assertEqual(len(f.readlines()), 4)
+        reopened = JSONLinesBackend(self.mock_log_path, sync=False)
+        self.assertEqual(reopened.full_command(1)[5], 10)
+        self.assertEqual(reopened.full_command(2), before[1])
+        reopened.close()
+
+    def test_changes_of_other_processes_are_read(self):
+        """
+        Test whether a store picks up commands another store appended to the same log.
+
+        """
+        log = self.backends[1]
+        other = JSONLinesBackend(self.mock_log_path, sync=False)
+        other.add_command('Other', 'uptime', 'admin')
+        other.close()
+        self.assertEqual(log.all_commands(), [(1, 'Other', 'uptime')])
+
+    def test_saved_commands_use_the_chosen_backend(self):
+        """
+        Test whether the saved commands are added, found and summarised in the chosen backend only.
+
+        """
+        log = self.backends[1]
+        with patch.object(Backends, 'open', lambda database_path: log):
+            SavedCommands(database_path=self.mock_database_path).add_new_command('Greet', 'echo hi')
+            found = SavedCommands(database_path=self.mock_database_path, command_id=1).find_command()
+            summary = SavedCommands(database_path=self.mock_database_path).recent_commands_list()
+        self.assertEqual(found, 'echo hi')
+        self.assertEqual(summary, [(1, 'Greet', 'echo hi')])
+        self.assertEqual(self.backends[0].all_commands(), [])
+
+    def test_switching_backends_keeps_the_commands(self):
+        """
+        Test whether the log is started with the commands saved in the database, keeping their IDs,
+        and whether deleted IDs are not given again.
+
+        """
+        database = self.backends[0]
+        for i in range(3):
+            database.add_command('Command {}'.format(i), 'echo {}'.format(i), 'admin')
+        database.add_calls({2: 4})
+        database.delete_command(3)
+        log = Backends.open_log(self.mock_database_path)
+        self.assertEqual(log.all_commands(), database.all_commands())
+        self.assertEqual(log.full_command(2), tuple(database.full_command(2)))
+        self.assertEqual(log.add_command('New', 'date', 'admin'), 4)
+        # The commands are copied only once
+        database.add_command('Later', 'uptime', 'admin')
+        log.close()
+        reopened = Backends.open_log(self.mock_database_path)
+        self.assertEqual([1, 2, 4], [row[0] for row in reopened.all_commands()])
+        reopened.close()
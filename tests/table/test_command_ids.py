@@ -0,0 +1,47 @@
+import unittest
+from command_saver.table.command_ids import CommandIds
+from command_saver.utils.default_database import DefaultDatabase
+
+
+class TestCommandIds(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests CommandIds methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # delete mock database
+        self.mock_database.delete_database()
+
+    def test_ids_are_checked_one_by_one(self):
+        """
+        Test whether IDs of saved commands are found, and anything else is not.
+
+        """
+        # Arrange
+        valid_ids = CommandIds(database_path=self.mock_database_path)
+        # Act and assert
+        self.assertIn(1, valid_ids)
+        self.assertIn('4', valid_ids)
+        for command_id in [5, 0, 'x', None, 'team:1']:
+            self.assertNotIn(command_id, valid_ids)
+        self.assertEqual([1, 2, 3, 4], list(valid_ids))
+        self.assertEqual('a Command ID from 1 to 4, see sc.', str(valid_ids))
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+import os
+from command_saver.table.executions import Executions
+from command_saver.utils.execution_stats import ExecutionStats
+from command_saver.utils.command_runner import CommandResult
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+
+
+class TestExecutions(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests Executions methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        self.con = ConnectionManager.connect(self.mock_database_path)
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # forget anything left pending and delete mock database
+        Executions.pending.pop(self.mock_database_path, None)
+        self.mock_database.delete_database()
+
+    def __logged_and_times_called(self, command_id):
+        """
+        Reads how many executions of a command are logged and its popularity.
+        Args:
+            command_id: ID of the command.
+
+        Returns: (number of logged executions, times called)
+
+        """
+        logged = self.con.execute("SELECT COUNT(*) FROM executions WHERE num_row = ?", (command_id,)).fetchone()[0]
+        times_called = self.con.execute("SELECT times_called FROM saved_commands WHERE num_row = ?",
+                                        (command_id,)).fetchone()[0]
+        return logged, times_called
+
+    def test_record_and_flush(self):
+        """
+        Test whether executions are only kept in memory until flushed, then logged and counted in one go.
+
+        """
+        # Act
+        for command_id in [1, 1, 3]:
+            stats = ExecutionStats(command_text='true', command_id=command_id).start().stop(0)
+            Executions.record(stats=stats, database_path=self.mock_database_path)
+        before_flush = self.__logged_and_times_called(1)
+        written = Executions.flush(database_path=self.mock_database_path)
+        written_again = Executions.flush(database_path=self.mock_database_path)
+        # Assert
+        self.assertEqual((0, 2), before_flush)
+        self.assertEqual(3, written)
+        self.assertEqual(0, written_again)
+        self.assertEqual((2, 4), self.__logged_and_times_called(1))
+        self.assertEqual((1, 5), self.__logged_and_times_called(3))
+
+    @patch('command_saver.table.saved_commands.CommandRunner.run')
+    def test_nothing_written_before_launch(self, mock_run):
+        """
+        Test whether executing a command writes nothing before the command starts,
+        and saves the execution once it has returned.
+        Args:
+            mock_run: mock run of the command that checks the database when the command starts.
+
+        """
+        # Arrange: look at the database at the moment the command starts
+        at_launch = []
+        mock_run.side_effect = lambda command, command_id=None: at_launch.append(
+            (self.__logged_and_times_called(1), self.con.in_transaction)) or CommandResult(
+            stats=ExecutionStats(command_text=command, command_id=command_id).start().stop(0))
+        # Act
+        result = SavedCommands(database_path=self.mock_database_path, command_id=1).execute_command()
+        # Assert
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual([((0, 2), False)], at_launch)
+        self.assertEqual((1, 3), self.__logged_and_times_called(1))
+
+    def test_execution_history(self):
+        """
+        Test whether saved commands and text for the terminal are recorded with their exit code,
+        timing, directory and user.
+
+        """
+        # Act
+        SavedCommands(database_path=self.mock_database_path, command_id=4).execute_command()
+        SavedCommands(database_path=self.mock_database_path).execute_command(
+            text_to_terminal=True, text_for_terminal='exit 3')
+        history = Executions.history(command_id=4, database_path=self.mock_database_path)
+        terminal = self.con.execute("SELECT command_text, exit_code FROM executions WHERE num_row IS NULL").fetchall()
+        # Assert
+        self.assertEqual(1, len(history))
+        started, duration_ms, exit_code, user_time_ms, system_time_ms, max_rss_kb, cwd, username = history[0]
+        self.assertEqual(0, exit_code)
+        self.assertGreaterEqual(duration_ms, 0)
+        self.assertGreaterEqual(user_time_ms, 0)
+        self.assertGreater(max_rss_kb, 0)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual('admin', username)
+        self.assertEqual([('exit 3', 3)], terminal)
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
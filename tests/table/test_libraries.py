@@ -0,0 +1,118 @@
+import unittest
+from command_saver.table.libraries import Libraries
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+
+
+class TestLibraries(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    mock_library_path = 'tests/data/command_saver_team.db'
+    """
+    Tests Libraries methods and the saved commands read from shared libraries.
+    """
+
+    def setUp(self):
+        """
+        Create a test database and a test team library with one more command before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        # and a mock library
+        self.mock_library = DefaultDatabase(self.mock_library_path)
+        self.mock_library.create_default_database()
+        with ConnectionManager.transaction(self.mock_library_path) as cur:
+            cur.execute("INSERT INTO saved_commands (command_description, saved_command, timestamp_when_created, "
+                        "times_called, author_name) VALUES ('Deploy the team app', 'make deploy', 1, 100, 'team')")
+        Libraries(database_path=self.mock_database_path).add_library('team', self.mock_library_path)
+
+    def tearDown(self):
+        """
+        Delete the test database and library after every test.
+
+        """
+        # delete mock databases
+        self.mock_database.delete_database()
+        self.mock_library.delete_database()
+
+    def test_split_id(self):
+        """
+        Test whether command IDs are split into their library and their ID in that library.
+
+        """
+        self.assertEqual((None, 42), Libraries.split_id('42'))
+        self.assertEqual(('team', 42), Libraries.split_id('team:42'))
+        self.assertEqual('team:42', Libraries.library_id('team', 42))
+        for command_id in ['main:1', 'Team:1', 'team:x', 'x']:
+            with self.assertRaises(ValueError):
+                Libraries.split_id(command_id)
+
+    def test_commands_of_all_libraries_are_read_in_one_query(self):
+        """
+        Test whether the saved commands list has the user's own commands first, then the library's,
+        read with one statement.
+
+        """
+        # Arrange
+        saved_commands = SavedCommands(database_path=self.mock_database_path)
+        Libraries(database_path=self.mock_database_path).attach()
+        statements = []
+        saved_commands.con.set_trace_callback(statements.append)
+        # Act
+        all_commands = saved_commands.view_all_saved_commands()
+        saved_commands.con.set_trace_callback(None)
+        # Assert
+        self.assertEqual([1, 2, 3, 4, 'team:1', 'team:2', 'team:3', 'team:4', 'team:5'],
+                         [row[0] for row in all_commands])
+        self.assertEqual(1, len([statement for statement in statements if 'UNION ALL' in statement]))
+
+    def test_ranking_and_search_are_merged(self):
+        """
+        Test whether the most popular and the best matching commands are ranked across the libraries.
+
+        """
+        # Act
+        summary = SavedCommands(database_path=self.mock_database_path).recent_commands_list()
+        found = SavedCommands(database_path=self.mock_database_path).search_commands('deploy')
+        # Assert: the library's most called command is the most popular one
+        popular = [row[0] for row in summary][3:]
+        self.assertEqual('team:5', popular[0])
+        self.assertEqual(['team:5'], [row[0] for row in found])
+
+    def test_find_library_command(self):
+        """
+        Test whether library commands are found by their IDs, and are gone once the library is removed.
+
+        """
+        # Act
+        command = SavedCommands(database_path=self.mock_database_path).find_command('team:5')
+        found = SavedCommands(database_path=self.mock_database_path).find_commands([1, 'team:5', 'other:1'])
+        Libraries(database_path=self.mock_database_path).remove_library('team')
+        all_commands = SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Assert
+        self.assertEqual('make deploy', command)
+        self.assertEqual([1, 'team:5'], list(found))
+        self.assertEqual([1, 2, 3, 4], [row[0] for row in all_commands])
+        self.assertEqual([], Libraries(database_path=self.mock_database_path).registered())
+
+    def test_attach_with_a_transaction_open(self):
+        """
+        Test whether pending changes are saved before a library is attached, and whether a library
+        that cannot be attached inside a unit of work is reported as skipped.
+
+        """
+        # Arrange: a change left pending outside a unit of work
+        con = ConnectionManager.connect(self.mock_database_path)
+        con.execute("UPDATE saved_commands SET times_called = 1 WHERE num_row = 1")
+        # Act
+        attached = Libraries(database_path=self.mock_database_path).attach()
+        ConnectionManager.detach(self.mock_database_path, 'team')
+        with ConnectionManager.transaction(self.mock_database_path):
+            with self.assertLogs(level='WARNING') as logs:
+                skipped = Libraries(database_path=self.mock_database_path).attach()
+        # Assert
+        self.assertEqual(['team'], [alias for alias, searchable in attached])
+        self.assertEqual([], skipped)
+        self.assertIn('Skipping the shared library team', logs.output[0])
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
 from command_saver.table.menu_options import MenuOptions
 
 
@@ -28,7 +29,7 @@ class TestMenuOptions(unittest.TestCase):
         # delete mock database
         self.mock_database.delete_database()
 
-    @patch('command_saver.table.user_data.sqlite3.connect')
+    @patch('command_saver.utils.connection_manager.sqlite3.connect')
     def test_parameters_exist(self, mock_connect_to_db):
         """
         Test whether parameters have been defined successfully.
@@ -39,7 +40,10 @@ class TestMenuOptions(unittest.TestCase):
         mock_object = MenuOptions(database_path=dummy_path)
         # Assert
         self.assertEqual(dummy_path, mock_object.database)
-        mock_connect_to_db.assert_called_once_with(dummy_path)
+        mock_connect_to_db.assert_called_once()
+        self.assertEqual(dummy_path, mock_connect_to_db.call_args[0][0])
+        # release the mocked shared connection
+        ConnectionManager.close(dummy_path)
 
     @staticmethod
     def numbered_table_of_three(data_table):
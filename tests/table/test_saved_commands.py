@@ -2,8 +2,11 @@ import os
 import sqlite3
 import unittest
 from command_saver.table.saved_commands import SavedCommands
+from command_saver.utils.command_runner import CommandResult
+from command_saver.utils.execution_stats import ExecutionStats
 from unittest.mock import patch
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
 import command_saver
 from os import path
 
@@ -34,7 +37,7 @@ class TestSavedCommands(unittest.TestCase):
         # delete mock database
         self.mock_database.delete_database()
 
-    @patch('command_saver.table.saved_commands.sqlite3.connect')
+    @patch('command_saver.utils.connection_manager.sqlite3.connect')
     def test_parameters_exist(self, mock_connect_to_db):
         """
         Test whether parameters have been defined successfully.
@@ -52,12 +55,15 @@ class TestSavedCommands(unittest.TestCase):
         # Assert
         self.assertEqual(dummy_id, mock_object.command_id)
         self.assertEqual(dummy_path, mock_object.database)
-        mock_connect_to_db.assert_called_once_with(dummy_path)
+        mock_connect_to_db.assert_called_once()
+        self.assertEqual(dummy_path, mock_connect_to_db.call_args[0][0])
+        # release the mocked shared connection
+        ConnectionManager.close(dummy_path)
 
     @patch('command_saver.table.saved_commands.InputWindow')
     def test_delete_command(self, mock_input_window):
         """
-        test whether delete command deletes an entity.
+        test whether delete command deletes an entity and the other commands keep their IDs.
         Other use cases are tested in the test_run_me.py
         Args:
             mock_input_window: mock user input.
@@ -86,13 +92,32 @@ class TestSavedCommands(unittest.TestCase):
         mock_user_command_test.cur.execute(
             "SELECT num_row, command_description, saved_command, date_created,"
             "timestamp_when_created, times_called, "
-            "author_name, last_edited FROM saved_commands ORDER BY command_id")
+            "author_name, last_edited FROM saved_commands ORDER BY num_row")
         result = list(mock_user_command_test.cur.fetchall())
         # close the database
         mock_user_command_test.commit_and_close_database()
         # Assert
         self.assertEqual(expected_result, result)
 
+    @patch('command_saver.table.saved_commands.InputWindow')
+    def test_deleted_id_not_reused(self, mock_input_window):
+        """
+        Test whether a new command gets a new ID, even if the command with the highest ID was deleted.
+        Args:
+            mock_input_window: mock user input.
+
+        """
+        # Arrange
+        mock_input_window().ask_input.return_value = 'Y'
+        last_id = len(self.original_saved_commands_table)
+        # Act
+        SavedCommands(command_id=last_id, database_path=self.mock_database_path).delete_command()
+        SavedCommands(database_path=self.mock_database_path).add_new_command(
+            command_description=self.data_sample[0], new_command=self.data_sample[1])
+        result = SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Assert
+        self.assertEqual([1, 2, 3, last_id + 1], [row[0] for row in result])
+
     def test_add_new_command(self):
         """
         To test whether a command is added to the database successfully.
@@ -216,15 +241,17 @@ class TestSavedCommands(unittest.TestCase):
         # Assert
         self.assertEqual(expected_result, result)
 
-    @patch('command_saver.table.saved_commands.os.system')
-    def test_execute_command(self, mock_os_system_call):
+    @patch('command_saver.table.saved_commands.CommandRunner.run')
+    def test_execute_command(self, mock_run):
         """
         Tests execute_command and find_command methods of SavedCommands class.
         Args:
-            mock_os_system_call: mock os call to execute the command. Just make sure it gets called.
+            mock_run: mock run of the command in the shell. Just make sure it gets called.
 
         """
         # Arrange
+        mock_run.side_effect = lambda command, command_id=None: CommandResult(
+            stats=ExecutionStats(command_text=command, command_id=command_id).start().stop(0))
         command_id = 1
         command_id_bad = 100
         # Create a mock commands to work with
@@ -250,7 +277,7 @@ class TestSavedCommands(unittest.TestCase):
         # Fetch the record and format it
         result_increment = ''.join(map(str, mock_command_two.cur.fetchone()))
         # Assert
-        mock_os_system_call.assert_called_once_with(expected_result)
+        mock_run.assert_called_once_with(expected_result, command_id=command_id)
         self.assertEqual(str(3), result_increment)
         self.assertEqual(expected_result_bad, result_bad)
 
@@ -371,6 +398,87 @@ class TestSavedCommands(unittest.TestCase):
         # Assert
         self.assertEqual(expected_result, result)
 
+    def test_recent_commands_list_no_duplicates(self):
+        """
+        To test if the summary lists the three newest commands first, then the most popular ones
+        that are not already listed, and uses the indexes instead of sorting the whole table.
+
+        """
+        # Arrange: ten commands, newer ones are less popular
+        mock_user_command = SavedCommands(database_path=self.mock_database_path)
+        mock_user_command.cur.execute("DELETE FROM saved_commands")
+        mock_user_command.cur.executemany(
+            "INSERT INTO saved_commands (num_row, command_description, saved_command, "
+            "timestamp_when_created, times_called, author_name) VALUES (?, ?, ?, ?, ?, 'admin')",
+            [(i, 'description', 'command', i, 100 - i) for i in range(1, 11)])
+        mock_user_command.commit_and_close_database()
+        # Act
+        mock_user_command = SavedCommands(database_path=self.mock_database_path)
+        result = [row[0] for row in mock_user_command.recent_commands_list()]
+        plan = mock_user_command.con.execute(
+            "EXPLAIN QUERY PLAN SELECT num_row FROM saved_commands "
+            "ORDER BY times_called DESC, num_row LIMIT 8").fetchall()
+        # Assert
+        self.assertEqual([10, 9, 8, 1, 2, 3, 4, 5, 6, 7], result)
+        self.assertIn('saved_commands_by_times_called', str(plan))
+
+    @patch('command_saver.table.saved_commands.InputWindow')
+    def test_search_commands(self, mock_input_window):
+        """
+        To test if search finds commands by their words, ranks them, marks the matches,
+        and stays in sync when commands are added, edited and deleted.
+        Args:
+            mock_input_window: mock user input.
+
+        """
+        # Arrange
+        mock_input_window().ask_input.side_effect = ['y', 'git status --short', 'y']
+        # Act
+        result_git = SavedCommands(database_path=self.mock_database_path).search_commands('git')
+        result_prefix = SavedCommands(database_path=self.mock_database_path).search_commands('hel wor')
+        result_nothing = SavedCommands(database_path=self.mock_database_path).search_commands('"(-')
+        SavedCommands(database_path=self.mock_database_path).add_new_command(
+            command_description=self.data_sample[0], new_command=self.data_sample[1])
+        result_added = SavedCommands(database_path=self.mock_database_path).search_commands('dearest')
+        SavedCommands(command_id=1, database_path=self.mock_database_path).edit_command()
+        result_edited = SavedCommands(database_path=self.mock_database_path).search_commands('short')
+        SavedCommands(command_id=3, database_path=self.mock_database_path).delete_command()
+        result_deleted = SavedCommands(database_path=self.mock_database_path).search_commands('log')
+        # Assert
+        self.assertEqual([1, 2, 3], sorted(row[0] for row in result_git))
+        self.assertEqual([(4, '\x02Hello\x03 \x02world\x03!', 'echo "\x02Hello\x03 \x02world\x03!"')],
+                         result_prefix)
+        self.assertEqual([], result_nothing)
+        self.assertEqual([5], [row[0] for row in result_added])
+        self.assertEqual([1], [row[0] for row in result_edited])
+        self.assertEqual([], result_deleted)
+
+    @patch('command_saver.table.saved_commands.InputWindow')
+    def test_fuzzy_find_commands(self, mock_input_window):
+        """
+        To test if fuzzy find matches letters in order and its in-memory index
+        stays in sync when commands are added, edited and deleted.
+        Args:
+            mock_input_window: mock user input.
+
+        """
+        # Arrange
+        mock_input_window().ask_input.side_effect = ['y', 'git status --short', 'y']
+        # Act
+        result_gtlg = SavedCommands(database_path=self.mock_database_path).fuzzy_find_commands('gtlg')
+        SavedCommands(database_path=self.mock_database_path).add_new_command(
+            command_description=self.data_sample[0], new_command=self.data_sample[1])
+        result_added = SavedCommands(database_path=self.mock_database_path).fuzzy_find_commands('dearst')
+        SavedCommands(command_id=1, database_path=self.mock_database_path).edit_command()
+        result_edited = SavedCommands(database_path=self.mock_database_path).fuzzy_find_commands('shrt')
+        SavedCommands(command_id=3, database_path=self.mock_database_path).delete_command()
+        result_deleted = SavedCommands(database_path=self.mock_database_path).fuzzy_find_commands('gtlg')
+        # Assert
+        self.assertEqual((3, '\x02G\x03i\x02t\x03 \x02l\x03o\x02g\x03', 'git log --oneline'), result_gtlg[0])
+        self.assertEqual([5], [row[0] for row in result_added])
+        self.assertEqual(1, result_edited[0][0])
+        self.assertNotIn(3, [row[0] for row in result_deleted])
+
     def test_find_command(self):
         """
         To test if find_command method finds entities it is supposed to,
@@ -402,6 +510,64 @@ class TestSavedCommands(unittest.TestCase):
         self.assertEqual(expected_result_2, result_2)
         self.assertEqual(expected_result_3, result_3)
 
+    def test_find_commands(self):
+        """
+        To test if many commands are found by their IDs in one query, by rowid,
+        leaving out IDs that do not exist.
+
+        """
+        # Arrange
+        mock_user_command = SavedCommands(database_path=self.mock_database_path)
+        statements = []
+        mock_user_command.con.set_trace_callback(statements.append)
+        # Act
+        result = mock_user_command.find_commands([4, '2', 100, 'x', 2])
+        mock_user_command.con.set_trace_callback(None)
+        plan = mock_user_command.con.execute(
+            "EXPLAIN QUERY PLAN SELECT saved_command FROM saved_commands WHERE num_row = ?", (2,)).fetchall()
+        # Assert
+        self.assertEqual([2, 4], sorted(result))
+        self.assertEqual((4, 'Hello world!', 'echo "Hello world!"'), result[4])
+        self.assertEqual(1, len(statements))
+        self.assertIn('INTEGER PRIMARY KEY', str(plan))
+
+    @patch('command_saver.storage.sqlite_backend.fetch_batch_size', 2)
+    def test_iter_commands(self):
+        """
+        To test if commands are streamed in ID order, a page at a time, forwards and backwards,
+        skipping deleted IDs.
+
+        """
+        # Arrange
+        mock_user_command = SavedCommands(database_path=self.mock_database_path)
+        mock_user_command.con.execute("DELETE FROM saved_commands WHERE num_row = 2")
+        # Act
+        all_ids = [row[0] for row in mock_user_command.iter_commands()]
+        next_page = [row[0] for row in mock_user_command.iter_commands(after_id=1, limit=2)]
+        previous_page = [row[0] for row in mock_user_command.iter_commands(before_id=4, limit=5)]
+        last_page = list(mock_user_command.iter_commands(after_id=4))
+        # Assert
+        self.assertEqual([1, 3, 4], all_ids)
+        self.assertEqual([3, 4], next_page)
+        self.assertEqual([3, 1], previous_page)
+        self.assertEqual([], last_page)
+
+    def test_execute_fan_out(self):
+        """
+        To test if a command runs once for every value, and the summary lists the values in input order,
+        not in the order the runs finished.
+
+        """
+        # Arrange: the first value finishes last
+        SavedCommands(database_path=self.mock_database_path).add_new_command('Wait', 'sleep {seconds}')
+        mock_user_command = SavedCommands(database_path=self.mock_database_path, command_id=5)
+        # Act
+        outcomes, status = mock_user_command.execute_fan_out(['0.4\n', '0.2\n', '\n', '0\n', 'x\n'], jobs=4)
+        # Assert
+        self.assertEqual([3, ['0.4', '0.2', '0']], outcomes['ok'])
+        self.assertEqual([1, ['x']], outcomes['failed'])
+        self.assertEqual(1, status)
+
 
 # this runs the test automatically
 if __name__ == '__main__':
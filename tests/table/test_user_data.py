@@ -2,6 +2,7 @@ import unittest
 from command_saver.table.user_data import UserData
 from unittest.mock import patch
 from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
 
 
 class TestUserData(unittest.TestCase):
@@ -29,7 +30,7 @@ class TestUserData(unittest.TestCase):
         # delete mock database
         self.mock_database.delete_database()
 
-    @patch('command_saver.table.user_data.sqlite3.connect')
+    @patch('command_saver.utils.connection_manager.sqlite3.connect')
     def test_parameters_exist(self, mock_connect_to_db):
         """
         Test whether parameters have been defined successfully.
@@ -43,7 +44,10 @@ class TestUserData(unittest.TestCase):
         mock_object = UserData(database_path=dummy_path)
         # Assert
         self.assertEqual(dummy_path, mock_object.database)
-        mock_connect_to_db.assert_called_once_with(dummy_path)
+        mock_connect_to_db.assert_called_once()
+        self.assertEqual(dummy_path, mock_connect_to_db.call_args[0][0])
+        # release the mocked shared connection
+        ConnectionManager.close(dummy_path)
 
     def test_find_author(self):
         """
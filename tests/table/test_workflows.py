@@ -0,0 +1,88 @@
+import unittest
+from command_saver.table.workflows import Workflows
+from command_saver.table.executions import Executions
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.connection_manager import ConnectionManager
+
+
+class TestWorkflows(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests Workflows methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database with a build, test, lint and deploy command before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        with ConnectionManager.transaction(self.mock_database_path) as cur:
+            cur.executemany("INSERT INTO saved_commands (num_row, command_description, saved_command, "
+                            "timestamp_when_created, times_called, author_name) VALUES (?, ?, ?, 1, 0, 'me')",
+                            [(11, 'build', 'true'), (12, 'test', 'sleep 0.3'), (13, 'lint', 'exit 2'),
+                             (14, 'deploy', 'echo {env}')])
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # forget anything left pending and delete mock database
+        Executions.pending.pop(self.mock_database_path, None)
+        self.mock_database.delete_database()
+
+    def test_parse_stages(self):
+        """
+        Does every step of a stage wait for all the steps of the stage before, and are wrong steps refused?
+
+        """
+        # Act
+        steps = Workflows.parse_stages(['11', 'then', '12', 'team:3', 'then', '14'])
+        # Assert
+        self.assertEqual([('11', []), ('12', ['11']), ('team:3', ['11']), ('14', ['12', 'team:3'])], steps)
+        self.assertEqual([['11'], ['12', 'team:3'], ['14']], Workflows.stages(steps))
+        for words in (['11', 'then'], ['11', 'then', 'then', '12'], ['11', '11'], ['build']):
+            with self.assertRaises(ValueError):
+                Workflows.parse_stages(words)
+
+    def test_save_and_remove(self):
+        """
+        Are workflows saved, replaced and removed, and are missing commands refused?
+
+        """
+        # Arrange
+        workflows = Workflows(database_path=self.mock_database_path)
+        # Act
+        workflows.save_workflow('release', ['11', 'then', '12'])
+        workflows.save_workflow('release', ['11', 'then', '12', '13', 'then', '14'])
+        workflows.save_workflow('missing', ['11', 'then', '99'])
+        saved = workflows.saved()
+        workflows.remove_workflow('release')
+        # Assert
+        self.assertEqual([('release', [('11', []), ('12', ['11']), ('13', ['11']), ('14', ['12', '13'])])], saved)
+        self.assertEqual([], workflows.saved())
+
+    def test_execute_workflow(self):
+        """
+        Do independent steps run, and are the steps after a failed one skipped?
+
+        """
+        # Arrange
+        workflows = Workflows(database_path=self.mock_database_path)
+        workflows.save_workflow('release', ['11', 'then', '12', '13', 'then', '14'])
+        # Act
+        runs = workflows.execute_workflow('release', values={'env': 'prod'})
+        missing_value = workflows.execute_workflow('release')
+        # Assert
+        self.assertEqual([11, 12, 13, 14], [command_id for command_id, description, result in runs])
+        self.assertEqual([0, 0, 2], [result.exit_code for command_id, description, result in runs[:3]])
+        self.assertIsNone(runs[3][2])
+        self.assertIsNone(missing_value)
+        self.assertIs(ValueError, workflows.execute_workflow('nope'))
+
+
+if __name__ == '__main__':
+    unittest.main()
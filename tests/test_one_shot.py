@@ -0,0 +1,60 @@
+import io
+import unittest
+from unittest.mock import patch
+from command_saver.one_shot import OneShot
+from command_saver.utils.command_runner import CommandRunner
+from command_saver.constants import command_not_found_status
+
+
+class TestOneShot(unittest.TestCase):
+    """
+    Tests OneShot class methods.
+    """
+
+    def test_from_args(self):
+        """
+        Are only the options that can run without the menus picked up?
+
+        """
+        # Act
+        execute = OneShot.from_args(['e', 'team:42'])
+        terminal = OneShot.from_args(['t', 'ls', '-la'])
+        # Assert
+        self.assertEqual(('e', 'team:42'), (execute.option, execute.argument))
+        self.assertEqual(('t', 'ls -la'), (terminal.option, terminal.argument))
+        self.assertIsNone(OneShot.from_args([]))
+        self.assertIsNone(OneShot.from_args(['e']))
+        self.assertIsNone(OneShot.from_args(['a', '3']))
+        self.assertIsNone(OneShot.from_args(['ss', '3', '4']))
+        self.assertEqual(['3', '4', '--jobs', '2'], OneShot.from_args(['e', '3', '4', '--jobs', '2']).argument)
+
+    @patch('command_saver.one_shot.RunMe.prepare_database')
+    @patch('command_saver.one_shot.CommandIds')
+    @patch('command_saver.one_shot.SavedCommands')
+    def test_run(self, mock_saved_commands, mock_command_ids, mock_prepare):
+        """
+        Does executing a command return its status, and a missing or invalid Command ID 127,
+        with one line on the standard error?
+
+        """
+        # Arrange
+        mock_saved_commands.return_value.execute_command.return_value = CommandRunner().run('exit 5')
+        mock_command_ids.return_value.__contains__.side_effect = lambda command_id: command_id != '1000'
+        # Act and assert
+        self.assertEqual(5, OneShot('e', '3').run())
+        mock_saved_commands.assert_called_once_with(command_id='3')
+        # A missing Command ID is never executed
+        mock_saved_commands.reset_mock()
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            self.assertEqual(command_not_found_status, OneShot('e', '1000').run())
+        self.assertEqual('Error! Command ID 1000 not found.\n', stderr.getvalue())
+        mock_saved_commands.assert_not_called()
+        # An invalid Command ID is never looked up
+        mock_command_ids.reset_mock()
+        with patch('sys.stderr', new_callable=io.StringIO):
+            self.assertEqual(command_not_found_status, OneShot('e', 'Team:x').run())
+        mock_command_ids.assert_not_called()
+        mock_saved_commands.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
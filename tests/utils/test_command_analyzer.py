@@ -0,0 +1,38 @@
+import unittest
+from command_saver.utils.command_analyzer import CommandAnalyzer
+
+
+class TestCommandAnalyzer(unittest.TestCase):
+    """
+    Tests CommandAnalyzer methods.
+    """
+
+    def test_split(self):
+        """
+        Are plain commands split into words as the shell would, and anything with shell syntax left to the shell?
+
+        """
+        # Act and assert
+        self.assertEqual(['git', 'log', '--oneline'], CommandAnalyzer.split('git log --oneline'))
+        self.assertEqual(['git', 'commit', '-m', 'fix bug', '--author=me'],
+                         CommandAnalyzer.split('git commit -m "fix bug" --author=me'))
+        for command_text in ['ls | wc -l', 'make && make install', 'ls *.py', 'echo $HOME', 'cat < file',
+                             'ls ~', 'LANG=C sort', 'cd /tmp', 'exit 3', 'pwd', 'echo "a', '', 'a # comment']:
+            self.assertIsNone(CommandAnalyzer.split(command_text), command_text)
+
+    def test_argv_and_program(self):
+        """
+        Are the words kept for the session, and is the program found in the PATH?
+
+        """
+        # Act
+        words = CommandAnalyzer.argv('sh -c "exit 7"')
+        # Assert
+        self.assertIs(words, CommandAnalyzer.argv('sh -c "exit 7"'))
+        self.assertTrue(CommandAnalyzer.program('sh -c "exit 7"').endswith('/sh'))
+        self.assertIsNone(CommandAnalyzer.program('no-such-program-anywhere --help'))
+        self.assertIsNone(CommandAnalyzer.program('ls | wc -l'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import unittest
+from command_saver.utils.command_runner import CommandRunner
+
+
+class TestCommandRunner(unittest.TestCase):
+    """
+    Tests CommandRunner methods.
+    """
+
+    def test_exit_codes(self):
+        """
+        Are real exit codes returned, with signals told apart as a shell does?
+
+        """
+        # Act
+        succeeded = CommandRunner().run('true')
+        failed = CommandRunner().run('exit 3')
+        killed = CommandRunner().run('kill -9 $$')
+        # Assert
+        self.assertTrue(succeeded.succeeded)
+        self.assertEqual((3, 3), (failed.exit_code, failed.exit_status))
+        self.assertEqual((-9, 128 + 9), (killed.exit_code, killed.exit_status))
+        self.assertGreater(succeeded.stats.max_rss_kb, 0)
+        self.assertEqual(os.getcwd(), succeeded.stats.cwd)
+
+    def test_without_shell(self):
+        """
+        Are plain commands run without the shell, and does a missing program still fail as in the shell?
+
+        """
+        # Act
+        direct = CommandRunner(capture_output=True).run('ls -d "/"')
+        missing = CommandRunner(capture_output=True).run('no-such-program-anywhere --help')
+        # Assert
+        self.assertEqual((0, b'/\n'), (direct.exit_code, direct.stdout))
+        self.assertEqual(127, missing.exit_code)
+
+    def test_capture_output(self):
+        """
+        Are stdout and stderr captured apart, also when they are larger than a pipe, and streamed as they come?
+
+        """
+        # Arrange
+        streamed = []
+        runner = CommandRunner(capture_output=True, on_output=lambda name, chunk: streamed.append((name, chunk)))
+        # Act
+        result = runner.run('head -c 300000 /dev/zero; echo oops >&2; echo done')
+        # Assert
+        self.assertEqual(b'\0' * 300000 + b'done\n', result.stdout)
+        self.assertEqual(b'oops\n', result.stderr)
+        self.assertEqual(result.stdout, b''.join(chunk for name, chunk in streamed if name == 'stdout'))
+        self.assertIsNone(CommandRunner().run('true').stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from command_saver.utils.command_template import CommandTemplate
+
+
+class TestCommandTemplate(unittest.TestCase):
+    """
+    Tests CommandTemplate methods.
+    """
+
+    def test_fill(self):
+        """
+        Are placeholders filled with quoted values, and is shell text in quotes and braces left alone?
+
+        """
+        # Arrange
+        command_text = 'kubectl -n {ns} logs "{pod}-x" | awk \'{print $1}\' ${HOME} \\{ns}'
+        template = CommandTemplate.compile(command_text)
+        # Act
+        filled = template.fill({'ns': 'prod; rm -rf /', 'pod': 'a"$b'})
+        # Assert
+        self.assertEqual(['ns', 'pod'], template.names)
+        self.assertEqual('kubectl -n \'prod; rm -rf /\' logs "a\\"\\$b-x" | awk \'{print $1}\' ${HOME} \\{ns}', filled)
+        self.assertIs(template, CommandTemplate.compile(command_text))
+        with self.assertRaises(ValueError):
+            template.fill({'ns': 'prod'})
+        self.assertEqual('git log {a,b}', CommandTemplate.compile('git log {a,b}').fill({}))
+
+    def test_parse_arguments(self):
+        """
+        Are values and the options of a run over many values taken out, and the other words kept?
+
+        """
+        # Act
+        once = CommandTemplate.parse_arguments(['12', 'ns=prod', 'x=a=b', '--jobs', '2'])
+        each = CommandTemplate.parse_arguments(['12', '--each', 'ns', '--from=values.txt', '--jobs=8'])
+        from_file = CommandTemplate.parse_arguments(['12', '--from', '-'])
+        # Assert
+        self.assertEqual(({'ns': 'prod', 'x': 'a=b'}, None, None, ['12', '--jobs', '2']), once)
+        self.assertEqual(({}, 'ns', 'values.txt', ['12', '--jobs=8']), each)
+        self.assertEqual(({}, '', '-', ['12']), from_file)
+        with self.assertRaises(ValueError):
+            CommandTemplate.parse_arguments(['12', '--each'])
+
+    def test_fan_out_name(self):
+        """
+        Is the placeholder filled by each value the one named, or the only one without a value?
+
+        """
+        # Arrange
+        template = CommandTemplate.compile('ssh {host} uptime -{flag}')
+        # Act and assert
+        self.assertEqual('host', template.fan_out_name('host', {}))
+        self.assertEqual('host', template.fan_out_name('', {'flag': 'p'}))
+        for each, values in [('', {}), ('user', {})]:
+            with self.assertRaises(ValueError):
+                template.fan_out_name(each, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
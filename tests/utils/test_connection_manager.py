@@ -0,0 +1,134 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.table.menu_options import MenuOptions
+
+
+class TestConnectionManager(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests ConnectionManager methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # delete mock database
+        self.mock_database.delete_database()
+
+    def test_connection_is_shared(self):
+        """
+        Test whether all table classes borrow the same connection and it survives their commits.
+
+        """
+        # Act
+        saved_commands = SavedCommands(database_path=self.mock_database_path)
+        menu_options = MenuOptions(database_path=self.mock_database_path)
+        saved_commands.view_all_saved_commands()
+        # Assert
+        self.assertIs(saved_commands.con, menu_options.con)
+        self.assertIs(saved_commands.con, ConnectionManager.connect(self.mock_database_path))
+        # the connection is still usable after the table class committed
+        self.assertEqual(4, len(menu_options.con.execute("SELECT * FROM saved_commands").fetchall()))
+
+    def test_transaction_commits(self):
+        """
+        Test whether a unit of work is committed when the block ends.
+
+        """
+        # Act
+        with ConnectionManager.transaction(self.mock_database_path) as cur:
+            cur.execute("UPDATE user_data SET username='someone'")
+        # Assert, using an independent connection
+        con = sqlite3.connect(self.mock_database_path)
+        result = con.execute("SELECT username FROM user_data").fetchone()[0]
+        con.close()
+        self.assertEqual('someone', result)
+
+    def test_transaction_rolls_back(self):
+        """
+        Test whether a unit of work, including a nested one, is rolled back when an error is raised.
+
+        """
+        # Act
+        with self.assertRaises(ValueError):
+            with ConnectionManager.transaction(self.mock_database_path) as cur:
+                cur.execute("UPDATE user_data SET username='someone'")
+                with ConnectionManager.transaction(self.mock_database_path) as inner_cur:
+                    inner_cur.execute("DELETE FROM saved_commands")
+                raise ValueError
+        # Assert
+        con = ConnectionManager.connect(self.mock_database_path)
+        self.assertEqual('admin', con.execute("SELECT username FROM user_data").fetchone()[0])
+        self.assertEqual(4, con.execute("SELECT COUNT(*) FROM saved_commands").fetchone()[0])
+
+    def test_close(self):
+        """
+        Test whether closing forgets the connection, so the next call opens a new one.
+
+        """
+        # Arrange
+        first = ConnectionManager.connect(self.mock_database_path)
+        # Act
+        ConnectionManager.close(self.mock_database_path)
+        second = ConnectionManager.connect(self.mock_database_path)
+        # Assert
+        self.assertIsNot(first, second)
+        self.assertRaises(sqlite3.ProgrammingError, first.execute, "SELECT 1")
+
+    def test_reader_not_blocked_by_writer(self):
+        """
+        Test whether the database is in WAL mode, so reading works while another terminal is writing.
+
+        """
+        # Arrange: another terminal opens a write transaction and keeps it open
+        other_terminal = sqlite3.connect(self.mock_database_path)
+        other_terminal.execute("BEGIN IMMEDIATE")
+        other_terminal.execute("DELETE FROM saved_commands")
+        # Act
+        journal_mode = ConnectionManager.connect(self.mock_database_path).execute(
+            "PRAGMA journal_mode").fetchone()[0]
+        result = SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        other_terminal.rollback()
+        other_terminal.close()
+        # Assert
+        self.assertEqual('wal', journal_mode)
+        self.assertEqual(4, len(result))
+
+    @patch('command_saver.utils.connection_manager.performance_profile', 'fast')
+    def test_performance_profile(self):
+        """
+        Test whether the settings of the active performance profile are applied to the shared connection.
+
+        """
+        # Arrange: the connection opened by setUp used the default profile
+        ConnectionManager.close(self.mock_database_path)
+        # Act
+        con = ConnectionManager.connect(self.mock_database_path)
+        settings = {setting: con.execute("PRAGMA {}".format(setting)).fetchone()[0]
+                    for setting in ['synchronous', 'temp_store', 'cache_size', 'journal_size_limit', 'mmap_size']}
+        # Assert (synchronous OFF is 0, temp_store MEMORY is 2)
+        self.assertEqual(0, settings['synchronous'])
+        self.assertEqual(2, settings['temp_store'])
+        self.assertEqual(-32000, settings['cache_size'])
+        self.assertEqual(16777216, settings['journal_size_limit'])
+        self.assertGreater(settings['mmap_size'], 0)
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+from command_saver.utils.fuzzy_finder import FuzzyFinder
+
+
+class TestFuzzyFinder(unittest.TestCase):
+    commands_list = [
+        (1, 'Check git status', 'git status'),
+        (2, 'Add all git command', 'git add --all'),
+        (3, 'Git log', 'git log --oneline'),
+        (4, 'Hello world!', 'echo "Hello world!"'),
+    ]
+    """
+    Tests FuzzyFinder methods.
+    """
+
+    def setUp(self):
+        """
+        Build an index before every unit test.
+
+        """
+        self.index = FuzzyFinder(self.commands_list)
+
+    def test_letters_in_order(self):
+        """
+        Test whether the letters of the query match in order, ignoring case and spaces, best match first.
+
+        """
+        # Act
+        result_gtlg = [row[0] for row in self.index.search('gtlg')]
+        result_spaces = [row[0] for row in self.index.search('G T L G')]
+        result_no_match = self.index.search('gtlgz')
+        result_empty = self.index.search('   ')
+        # Assert
+        self.assertEqual(3, result_gtlg[0])
+        self.assertEqual(result_gtlg, result_spaces)
+        self.assertNotIn(4, result_gtlg)
+        self.assertEqual([], result_no_match)
+        self.assertEqual([], result_empty)
+
+    def test_word_starts_score_higher(self):
+        """
+        Test whether matches at the start of words and next to each other score higher.
+
+        """
+        # Act
+        word_starts, _ = FuzzyFinder.score('gl', 'git log')
+        middle, _ = FuzzyFinder.score('gl', 'bag all')
+        consecutive, _ = FuzzyFinder.score('lo', 'git log')
+        apart, _ = FuzzyFinder.score('lo', 'git lxo')
+        # Assert
+        self.assertGreater(word_starts, middle)
+        self.assertGreater(consecutive, apart)
+
+    def test_narrowing_and_updates(self):
+        """
+        Test whether typing more letters reuses earlier matches without missing commands added in between.
+
+        """
+        # Act
+        self.index.search('gi')
+        result_narrowed = [row[0] for row in self.index.search('gis')]
+        self.index.add(5, 'Git stash', 'git stash')
+        result_added = [row[0] for row in self.index.search('gist')]
+        self.index.remove(1)
+        result_removed = [row[0] for row in self.index.search('gist')]
+        self.index.add(6, 'Say hello', 'echo hello')
+        result_reused = [row[0] for row in self.index.search('gist')]
+        result_hello = [row[0] for row in self.index.search('shl')]
+        # Assert
+        self.assertEqual([1], result_narrowed)
+        self.assertEqual([5, 1], result_added)
+        self.assertEqual([5], result_removed)
+        self.assertEqual([5], result_reused)
+        self.assertEqual([6], result_hello)
+
+    @patch('command_saver.utils.fuzzy_finder.fuzzy_scored_limit', 1)
+    def test_scored_limit(self):
+        """
+        Test whether only a limited number of commands is scored, preferring commands where the letters start words.
+
+        """
+        # Act
+        result = [row[0] for row in self.index.search('h')]
+        # Assert
+        self.assertEqual([4], result)
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.maintenance import Maintenance, AUTO_VACUUM_INCREMENTAL
+
+
+class TestMaintenance(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests Maintenance methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database with free pages before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        # add and delete long commands to leave free pages behind
+        with ConnectionManager.transaction(self.mock_database_path) as cur:
+            cur.executemany("INSERT INTO saved_commands (command_description, saved_command, author_name) "
+                            "VALUES (?, ?, ?)", [('big', 'x' * 4000, 'admin')] * 200)
+        with ConnectionManager.transaction(self.mock_database_path) as cur:
+            cur.execute("DELETE FROM saved_commands WHERE command_description = 'big'")
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # delete mock database
+        self.mock_database.delete_database()
+
+    def test_new_database_is_incremental(self):
+        """
+        Test whether new databases are created with incremental auto vacuum.
+
+        """
+        # Act
+        con = ConnectionManager.connect(self.mock_database_path)
+        # Assert
+        self.assertEqual(AUTO_VACUUM_INCREMENTAL, con.execute("PRAGMA auto_vacuum").fetchone()[0])
+
+    def test_reclaim_free_pages(self):
+        """
+        Test whether free pages are reclaimed in chunks until none are left.
+
+        """
+        # Arrange
+        maintenance = Maintenance(database_path=self.mock_database_path)
+        free_before = maintenance.free_pages()
+        # Act
+        reclaimed = maintenance.reclaim_free_pages(chunk_pages=10, time_budget=10)
+        # Assert
+        self.assertGreater(free_before, 10)
+        self.assertEqual(free_before, reclaimed)
+        self.assertEqual(0, maintenance.free_pages())
+
+    @patch('command_saver.utils.maintenance.freelist_threshold', 100000)
+    def test_run_if_needed_below_threshold(self):
+        """
+        Test whether nothing is done while the free page list is below the threshold.
+
+        """
+        # Arrange
+        maintenance = Maintenance(database_path=self.mock_database_path)
+        free_before = maintenance.free_pages()
+        # Act
+        reclaimed = maintenance.run_if_needed()
+        # Assert
+        self.assertEqual(0, reclaimed)
+        self.assertEqual(free_before, maintenance.free_pages())
+
+    @patch('command_saver.utils.maintenance.freelist_threshold', 1)
+    def test_run_if_needed_converts_old_database(self):
+        """
+        Test whether databases created without incremental auto vacuum are converted.
+
+        """
+        # Arrange: rebuild the test database without auto vacuum, like older versions did
+        ConnectionManager.close(self.mock_database_path)
+        con = sqlite3.connect(self.mock_database_path)
+        con.execute("PRAGMA auto_vacuum=NONE")
+        con.execute("VACUUM")
+        con.execute("INSERT INTO saved_commands (saved_command, author_name) VALUES (?, 'admin')", ('x' * 40000,))
+        con.commit()
+        con.execute("DELETE FROM saved_commands WHERE saved_command LIKE 'xxx%'")
+        con.commit()
+        con.close()
+        maintenance = Maintenance(database_path=self.mock_database_path)
+        # Act
+        maintenance.run_if_needed()
+        # Assert
+        con = ConnectionManager.connect(self.mock_database_path)
+        self.assertEqual(AUTO_VACUUM_INCREMENTAL, con.execute("PRAGMA auto_vacuum").fetchone()[0])
+        self.assertEqual(0, maintenance.free_pages())
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
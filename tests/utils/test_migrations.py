@@ -0,0 +1,126 @@
+import sqlite3
+import unittest
+from os import path, remove
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.migrations import Migrations
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.constants import schema_version
+
+
+class TestMigrations(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    mock_old_database_path = 'tests/data/command_saver_v1.db'
+    """
+    Tests Migrations methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database before every unit test.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+
+    def tearDown(self):
+        """
+        Delete the test databases after every test.
+
+        """
+        # delete mock databases
+        self.mock_database.delete_database()
+        if path.isfile(self.mock_old_database_path):
+            remove(self.mock_old_database_path)
+
+    def __create_unversioned_database(self, database_path):
+        """
+        Creates a database the way versions before schema versioning did:
+        no AUTOINCREMENT, no indexes, no search index, and fewer menu options.
+        Args:
+            database_path: where to create the database.
+
+        """
+        con = sqlite3.connect(database_path)
+        con.execute("CREATE table saved_commands (num_row INTEGER NOT NULL PRIMARY KEY, "
+                    "command_description TEXT, saved_command TEXT NOT NULL, date_created TEXT, "
+                    "timestamp_when_created INTEGER, times_called INTEGER, author_name TEXT NOT NULL,"
+                    "last_edited INTEGER)")
+        con.executemany("INSERT INTO saved_commands VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(1, 'Old one', 'echo old', 'date', 1, 7, 'someone', 1),
+                         (2, 'Old log', 'git log -5', 'date', 2, 0, 'someone', 2)])
+        con.execute("CREATE table menu_options (menu_option_id INTEGER NOT NULL PRIMARY KEY, "
+                    "option_tag TEXT NOT NULL UNIQUE, option_description TEXT NOT NULL, "
+                    "timestamp_when_created INTEGER)")
+        con.execute("INSERT INTO menu_options (option_tag, option_description) VALUES ('e', 'Execute')")
+        con.execute("CREATE table user_data (user_data_id INTEGER NOT NULL PRIMARY KEY, "
+                    "username TEXT NOT NULL, department TEXT NOT NULL)")
+        con.execute("INSERT INTO user_data (username, department) VALUES ('someone', 'ops')")
+        con.commit()
+        con.close()
+
+    def test_new_database_is_current(self):
+        """
+        Test whether a new database is created with the latest schema version, so nothing is migrated.
+
+        """
+        # Act
+        migrations = Migrations(database_path=self.mock_database_path)
+        # Assert
+        self.assertEqual(schema_version, migrations.migrations[-1][0])
+        self.assertEqual(schema_version, migrations.current_version())
+        self.assertEqual(0, migrations.migrate())
+
+    def test_migrate_unversioned_database(self):
+        """
+        Test whether an old database gets every migration, keeps its data, and is not migrated twice.
+
+        """
+        # Arrange
+        self.mock_database.delete_database()
+        self.__create_unversioned_database(self.mock_database_path)
+        migrations = Migrations(database_path=self.mock_database_path)
+        # Act
+        applied = migrations.migrate()
+        applied_again = migrations.migrate()
+        con = ConnectionManager.connect(self.mock_database_path)
+        table_sql = con.execute("SELECT sql FROM sqlite_master WHERE name = 'saved_commands'").fetchone()[0]
+        indexes = [row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        menu_options = [row[0] for row in con.execute("SELECT option_tag FROM menu_options")]
+        found = SavedCommands(database_path=self.mock_database_path).search_commands('log')
+        # Assert
+        self.assertEqual(schema_version, applied)
+        self.assertEqual(0, applied_again)
+        self.assertEqual(schema_version, migrations.current_version())
+        self.assertIn('AUTOINCREMENT', table_sql)
+        self.assertIn('saved_commands_by_times_called', indexes)
+        self.assertIn('f', menu_options)
+        self.assertEqual([2], [row[0] for row in found])
+
+    def test_import_database(self):
+        """
+        Test whether the commands and user of an older database replace the default data, keeping their IDs.
+
+        """
+        # Arrange
+        self.__create_unversioned_database(self.mock_old_database_path)
+        migrations = Migrations(database_path=self.mock_database_path)
+        # Act
+        imported = migrations.import_database(self.mock_old_database_path)
+        nothing_to_import = migrations.import_database('tests/data/missing.db')
+        con = ConnectionManager.connect(self.mock_database_path)
+        commands = con.execute("SELECT num_row, saved_command, times_called FROM saved_commands").fetchall()
+        user = con.execute("SELECT username, department FROM user_data").fetchall()
+        found = SavedCommands(database_path=self.mock_database_path).search_commands('old')
+        # Assert
+        self.assertEqual(2, imported)
+        self.assertIsNone(nothing_to_import)
+        self.assertEqual([(1, 'echo old', 7), (2, 'git log -5', 0)], commands)
+        self.assertEqual([('someone', 'ops')], user)
+        self.assertEqual([1, 2], sorted(row[0] for row in found))
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import time
+import unittest
+from command_saver.utils.parallel_runner import ParallelRunner
+from command_saver.utils.output_multiplexer import OutputMultiplexer
+
+
+class TestParallelRunner(unittest.TestCase):
+    """
+    Tests ParallelRunner and OutputMultiplexer methods.
+    """
+
+    def test_parse_options(self):
+        """
+        Are the Command IDs and options of a run read, and wrong options refused?
+
+        """
+        # Act
+        parsed = ParallelRunner.parse_options(['3', 'team:7', '--jobs', '4', '--fail-fast'])
+        short = ParallelRunner.parse_options(['3', '-j', '2', '12', '--fail-fast', '--keep-going'])
+        # Assert
+        self.assertEqual((['3', 'team:7'], 4, True), parsed)
+        self.assertEqual((['3', '12'], 2, False), short)
+        for words in (['3', '--jobs'], ['3', '--jobs=0'], ['3', '--jobs', 'x'], ['3', '--quick'], ['--jobs=2']):
+            with self.assertRaises(ValueError):
+                ParallelRunner.parse_options(words)
+
+    def test_keep_going(self):
+        """
+        Do all commands run side by side, and does the run end with the status of the first failure?
+
+        """
+        # Arrange
+        commands = [('1', 'sleep 0.5', None), ('2', 'exit 3', None), ('3', 'sleep 0.5', None)]
+        # Act
+        started = time.monotonic()
+        results = ParallelRunner(jobs=3).run(commands)
+        # Assert
+        self.assertLess(time.monotonic() - started, 1.4)
+        self.assertEqual([0, 3, 0], [result.exit_code for result in results])
+        self.assertEqual(3, ParallelRunner.exit_status(results))
+
+    def test_fail_fast(self):
+        """
+        Does the first failure stop the running commands, with what they started, and skip the waiting ones?
+
+        """
+        # Arrange
+        commands = [('1', 'sleep 0.1; exit 3', None), ('2', 'sleep 5; echo late', None), ('3', 'true', None)]
+        # Act
+        started = time.monotonic()
+        results = ParallelRunner(jobs=2, fail_fast=True).run(commands)
+        # Assert
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(3, results[0].exit_code)
+        self.assertEqual(-15, results[1].exit_code)
+        self.assertIsNone(results[2])
+        self.assertEqual(3, ParallelRunner.exit_status(results))
+
+    def test_run_graph(self):
+        """
+        Does a command start once the commands it waits for have succeeded, and is it skipped if one failed?
+
+        """
+        # Arrange: 0, then 1 and 2 side by side, then 3 after 1, and 4 after 2, which fails
+        commands = [('0', 'true', None), ('1', 'sleep 0.3', None), ('2', 'sleep 0.3; exit 4', None),
+                    ('3', 'true', None), ('4', 'true', None)]
+        # Act
+        started = time.monotonic()
+        results = ParallelRunner(jobs=4).run_graph(commands, [[], [0], [0], [1], [2, 1]])
+        # Assert
+        self.assertLess(time.monotonic() - started, 0.55)
+        self.assertEqual([0, 0, 4, 0], [result.exit_code for result in results[:4]])
+        self.assertIsNone(results[4])
+
+    def test_run_each(self):
+        """
+        Are the commands read only as workers become free, and the results handed over as they come?
+
+        """
+        # Arrange
+        read = []
+
+        def commands():
+            for value in range(20):
+                read.append(value)
+                yield str(value), 'exit {}'.format(value % 2), None
+        # Act
+        runs = ParallelRunner(jobs=2).run_each(commands())
+        first = next(runs)
+        read_at_first = len(read)
+        rest = list(runs)
+        # Assert
+        self.assertLess(read_at_first, 20)
+        self.assertEqual(20, len(read))
+        self.assertEqual(list(range(20)), sorted(job for job, name, result in [first] + rest))
+        self.assertTrue(all(result.exit_code == int(name) % 2 for job, name, result in [first] + rest))
+        self.assertTrue(all(result.stdout == b'' for job, name, result in [first] + rest))
+
+    def test_multiplexed_output(self):
+        """
+        Is every line prefixed with its command, kept whole, and sent to its own stream?
+
+        """
+        # Arrange
+        stdout, stderr = io.BytesIO(), io.BytesIO()
+        output = OutputMultiplexer(['3', '12'], stdout=stdout, stderr=stderr).start()
+        # Act
+        output.write(0, 'stdout', b'one\ntw')
+        output.write(1, 'stderr', b'oops\n')
+        output.write(0, 'stdout', b'o\nno end')
+        output.finish(0)
+        output.close()
+        # Assert
+        self.assertEqual(b'[3]  one\n[3]  two\n[3]  no end\n', stdout.getvalue())
+        self.assertEqual(b'[12] oops\n', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+from command_saver.utils.connection_manager import ConnectionManager
+from command_saver.utils.default_database import DefaultDatabase
+from command_saver.utils.query_cache import QueryCache
+from command_saver.table.saved_commands import SavedCommands
+from command_saver.table.menu_options import MenuOptions
+
+
+class TestQueryCache(unittest.TestCase):
+    mock_database_path = 'tests/data/command_saver.db'
+    """
+    Tests QueryCache methods.
+    """
+
+    def setUp(self):
+        """
+        Create a test database before every unit test, and count the statements it runs.
+
+        """
+        # create a mock database
+        self.mock_database = DefaultDatabase(self.mock_database_path)
+        self.mock_database.create_default_database()
+        # count every statement the shared connection runs
+        self.statements = []
+        ConnectionManager.connect(self.mock_database_path).set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        """
+        Delete the test database after every test.
+
+        """
+        # delete mock database
+        ConnectionManager.connect(self.mock_database_path).set_trace_callback(None)
+        self.mock_database.delete_database()
+
+    def test_unchanged_database_runs_no_queries(self):
+        """
+        Test whether reading the lists again, with nothing changed, runs no SQL at all.
+
+        """
+        # Arrange
+        first = (SavedCommands(database_path=self.mock_database_path).view_all_saved_commands(),
+                 SavedCommands(database_path=self.mock_database_path).recent_commands_list(),
+                 MenuOptions(database_path=self.mock_database_path).view_options())
+        self.statements.clear()
+        # Act
+        second = (SavedCommands(database_path=self.mock_database_path).view_all_saved_commands(),
+                  SavedCommands(database_path=self.mock_database_path).recent_commands_list(),
+                  MenuOptions(database_path=self.mock_database_path).view_options())
+        # Assert
+        self.assertEqual([], self.statements)
+        self.assertEqual(first, second)
+
+    def test_own_write_invalidates(self):
+        """
+        Test whether a change made by this session is seen by the next read.
+
+        """
+        # Arrange
+        SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Act
+        with ConnectionManager.transaction(self.mock_database_path) as cur:
+            cur.execute("DELETE FROM saved_commands WHERE num_row = 1")
+        result = SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Assert
+        self.assertEqual([2, 3, 4], [row[0] for row in result])
+
+    def test_other_terminal_write_invalidates(self):
+        """
+        Test whether a commit made by another terminal is seen by the next read.
+
+        """
+        # Arrange
+        SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Act
+        other_terminal = sqlite3.connect(self.mock_database_path)
+        other_terminal.execute("DELETE FROM saved_commands WHERE num_row = 4")
+        other_terminal.commit()
+        other_terminal.close()
+        result = SavedCommands(database_path=self.mock_database_path).view_all_saved_commands()
+        # Assert
+        self.assertEqual([1, 2, 3], [row[0] for row in result])
+
+    @patch('command_saver.utils.query_cache.query_cache_size', 2)
+    def test_least_recently_used_dropped(self):
+        """
+        Test whether only the most recently used results are kept.
+
+        """
+        # Act
+        QueryCache.get(self.mock_database_path, 'first', lambda: 1)
+        QueryCache.get(self.mock_database_path, 'second', lambda: 2)
+        QueryCache.get(self.mock_database_path, 'first', lambda: 1)
+        QueryCache.get(self.mock_database_path, 'third', lambda: 3)
+        # Assert
+        self.assertEqual([(self.mock_database_path, 'first'), (self.mock_database_path, 'third')],
+                         list(QueryCache.entries))
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import unittest
+from command_saver.utils.startup_profile import StartupProfile
+
+
+class TestStartupProfile(unittest.TestCase):
+    """
+    Tests StartupProfile methods and what starting the program imports.
+    """
+
+    def test_measure(self):
+        """
+        Test whether the import time of every module imported by the program is read.
+
+        """
+        # Act
+        wall_ms, modules = StartupProfile(module='command_saver.constants').measure()
+        # Assert
+        names = [module[0] for module in modules]
+        self.assertIn('command_saver.constants', names)
+        self.assertTrue(all(self_ms >= 0 and cumulative_ms >= self_ms for name, self_ms, cumulative_ms in modules))
+        self.assertGreater(wall_ms, 0)
+
+    def test_program_start_does_not_load_rich(self):
+        """
+        Test whether importing the program leaves rich to be loaded when something is printed.
+
+        """
+        # Act
+        result = subprocess.run([sys.executable, '-c', 'import sys, command_saver.cs; print("rich" in sys.modules)'],
+                                env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+                                capture_output=True, text=True)
+        # Assert
+        self.assertEqual('False', result.stdout.strip())
+
+
+# this runs the test automatically
+if __name__ == '__main__':
+    unittest.main()
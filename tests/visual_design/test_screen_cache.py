@@ -0,0 +1,55 @@
+import io
+import unittest
+from unittest.mock import patch, MagicMock
+from command_saver.visual_design.screen_cache import ScreenCache
+
+
+class TestScreenCache(unittest.TestCase):
+    """
+    Tests ScreenCache methods.
+    """
+
+    def setUp(self):
+        ScreenCache.clear()
+
+    @patch('command_saver.visual_design.screen_cache.QueryCache.database_state')
+    def test_show(self, mock_state):
+        """
+        Is a screen drawn once and replayed byte for byte, until the database changes?
+
+        """
+        # Arrange
+        from rich import get_console
+        mock_state.return_value = ('state', 1)
+        draw = MagicMock(side_effect=lambda: get_console().print('[bold]MENU[/bold] 42') or 'drawn')
+        output = io.StringIO()
+        # Act
+        with patch('sys.stdout', output):
+            first = ScreenCache.show('mm', draw)
+            first_text = output.getvalue()
+            second = ScreenCache.show('mm', draw)
+            # the database has been written
+            mock_state.return_value = ('state', 2)
+            ScreenCache.show('mm', draw)
+        # Assert
+        self.assertEqual(('drawn', 'drawn'), (first, second))
+        self.assertIn('MENU 42', first_text)
+        self.assertEqual(first_text * 3, output.getvalue())
+        self.assertEqual(2, draw.call_count)
+
+    @patch('command_saver.visual_design.screen_cache.screen_cache_size', 2)
+    def test_least_recently_shown_are_dropped(self):
+        """
+        Are only the most recently shown screens kept?
+
+        """
+        # Act
+        with patch('sys.stdout', io.StringIO()):
+            for page in range(3):
+                ScreenCache.show(('sc', page), lambda: None)
+        # Assert
+        self.assertEqual([('sc', 1), ('sc', 2)], list(ScreenCache.screens))
+
+
+if __name__ == '__main__':
+    unittest.main()